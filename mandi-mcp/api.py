@@ -2,40 +2,47 @@
 Mandi Price API - Using Real data.gov.in API
 Fetches live agricultural market prices from Government of India's Open Data Portal
 """
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
 from typing import Optional, List, Dict
 import os
+import re
 import json
-import csv
-import httpx
 import asyncio
 from datetime import datetime, timedelta
-from pathlib import Path
 from dotenv import load_dotenv
 
-from services.weather_service import get_weather
-from services.advice_service import generate_advice
-from services.tts_service import generate_marathi_speech
+from services.weather_service import get_weather, fallback_weather, WEATHER_COORD_DECIMALS
+from services.tts_service import synthesize_speech, audio_url, read_audio
+from services.pipeline import run_advice_pipeline, run_stage
 from services.seed_service import get_seed_suggestions, get_all_available_crops, generate_seed_advice_text
+from services.price_store import get_price_store
+from services.data_gov_service import fetch_from_data_gov
+from services.data_gov_sync import sync_data_gov, get_sync_status
+from services.cache import StaleWhileRevalidate, TTLCache, cache_stats
+from services.location_service import resolve_coords, find_nearest_mandis
+from services.rollups import RESOLUTIONS, get_rollups, bars_to_points
+from services.downsample import METHODS as DOWNSAMPLE_METHODS, downsample_points
+from services.analytics import get_price_analytics
+from services.batch_service import BATCH_MAX_ITEMS, BatchRun, stream_batch
+from services.feature_store import get_feature_store
+from services.crop_model import load_crop_model, predict_crops, crop_model_error, crop_model_stats
+from services.crop_heatmap import HEATMAP_CACHE, get_heatmap
+from services import http_client, ai_pool
 from translations import (
-    DISTRICT_TRANSLATIONS, 
-    COMMODITY_TRANSLATIONS, 
     translate_district, 
     translate_commodity,
+    translate_market,
+    localize_filters,
+    set_data_spellings,
     get_all_translations
 )
 
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-# data.gov.in API Configuration
-# data.gov.in API Configuration
-DATA_GOV_API_KEY = os.getenv("DATA_GOV_API_KEY")
-DATA_GOV_RESOURCE_ID = os.getenv("DATA_GOV_RESOURCE_ID", "9ef84268-d588-465a-a308-a864a43d0070") # Resource ID is public/safe
-DATA_GOV_BASE_URL = "https://api.data.gov.in/resource"
-
 app = FastAPI(title="Mandi Price API - Live Data", default_response_class=JSONResponse)
 
 # Enable CORS
@@ -47,175 +54,79 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Cache for filters (refreshed periodically)
-CACHE = {
-    "filters": None,
-    "filters_timestamp": None,
-    "cache_duration": 3600  # 1 hour
-}
-
-# District coordinates for weather
-DISTRICT_COORDS = {
-    "Pune": (18.5204, 73.8567),
-    "Mumbai": (19.0760, 72.8777),
-    "Nashik": (20.0063, 73.7909),
-    "Ahmednagar": (19.0948, 74.7500),
-    "Nagpur": (21.1458, 79.0882),
-    "Aurangabad": (19.8762, 75.3433),
-    "Solapur": (17.6599, 75.9064),
-    "Kolhapur": (16.7050, 74.2433),
-    "Dhule": (20.9042, 74.7749),
-    "Jalgaon": (21.0077, 75.5626),
-    "Thane": (19.2183, 72.9781),
-    "Raigad": (18.5158, 73.1822),
-    "Satara": (17.6805, 74.0183),
-    "Sangli": (16.8524, 74.5815),
-    "Ratnagiri": (16.9902, 73.3120),
-}
-
-async def fetch_from_data_gov(
-    filters: Dict = None,
-    limit: int = 100,
-    offset: int = 0
-) -> Dict:
-    """Fetch data from data.gov.in API"""
-    url = f"{DATA_GOV_BASE_URL}/{DATA_GOV_RESOURCE_ID}"
-    
-    params = {
-        "api-key": DATA_GOV_API_KEY,
-        "format": "json",
-        "limit": limit,
-        "offset": offset
-    }
-    
-    # Add filters
-    if filters:
-        for key, value in filters.items():
-            params[f"filters[{key}]"] = value
-    
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
-    except Exception as e:
-        print(f"data.gov.in API Error: {e}")
-        return None
-
-async def get_maharashtra_filters() -> Dict:
+async def load_maharashtra_filters() -> Dict:
     """Get available districts, markets, and commodities - merges live API with CSV"""
+    # Pull new/changed live records into the price store, then read the
+    # district -> market -> commodity tree straight from it
+    print("Syncing live data from data.gov.in...")
+    await sync_data_gov()
     
-    # Check cache
-    if CACHE["filters"] and CACHE["filters_timestamp"]:
-        if (datetime.now() - CACHE["filters_timestamp"]).seconds < CACHE["cache_duration"]:
-            return CACHE["filters"]
-    
-    # First, load comprehensive data from CSV
-    print("Loading base filters from CSV dataset...")
-    csv_filters = get_fallback_filters()
+    # Bring the OHLC rollups and model features up to date with whatever the sync merged
+    await asyncio.to_thread(get_rollups)
+    await asyncio.to_thread(get_feature_store)
     
-    print("Fetching fresh live data from data.gov.in...")
-    
-    # Fetch live data - get ALL states for comprehensive coverage
-    data = await fetch_from_data_gov(
-        filters={},  # No filter - get all states
-        limit=5000
-    )
-    
-    # Start with CSV data as base (deep copy to avoid modifying sets)
-    filters = {}
-    for district, markets in csv_filters.items():
-        filters[district] = {}
-        for market, crops in markets.items():
-            filters[district][market] = set(crops) if isinstance(crops, list) else crops.copy()
-    
-    # Add live API data on top (if available)
-    if data and "records" in data:
-        print(f"Merging {len(data.get('records', []))} live records...")
-        for record in data["records"]:
-            district = record.get("district", "").strip()
-            market = record.get("market", "").strip()
-            commodity = record.get("commodity", "").strip()
-            
-            if not district or not market or not commodity:
-                continue
-            
-            if district not in filters:
-                filters[district] = {}
-            if market not in filters[district]:
-                filters[district][market] = set()
-            filters[district][market].add(commodity)
-    else:
-        print("Live API failed, using CSV data only")
-    
-    # Convert sets to sorted lists
-    for district in filters:
-        for market in filters[district]:
-            if isinstance(filters[district][market], set):
-                filters[district][market] = sorted(list(filters[district][market]))
-    
-    # Update cache
-    CACHE["filters"] = filters
-    CACHE["filters_timestamp"] = datetime.now()
+    print("Loading filters from price store...")
+    filters = get_fallback_filters()
+    set_data_spellings(filters)
     
     print(f"Total: {len(filters)} districts with {sum(len(m) for m in filters.values())} markets")
     return filters
 
+# Filters are served from cache and refreshed in the background once an hour old
+FILTERS_CACHE = StaleWhileRevalidate("filters", load_maharashtra_filters, ttl=3600)
+
+async def get_maharashtra_filters() -> Dict:
+    """Cached filters; never waits on a refresh after the first load"""
+    filters = await FILTERS_CACHE.get()
+    if filters is None:
+        # The first load failed: serve the store's filters until a refresh succeeds
+        filters = get_fallback_filters()
+    return filters
+
+# lang -> (source filters, localized filters); re-rendered only when the filters refresh
+_LOCALIZED_FILTERS: Dict[str, tuple] = {}
+
+async def get_localized_filters(lang: str) -> Dict:
+    """Filters with names rendered in lang, rendered once per language per refresh"""
+    filters = await get_maharashtra_filters()
+    if lang != "mr":
+        return filters
+    cached = _LOCALIZED_FILTERS.get(lang)
+    if cached is None or cached[0] is not filters:
+        cached = _LOCALIZED_FILTERS[lang] = (filters, localize_filters(filters, lang))
+    return cached[1]
+
 def get_fallback_filters() -> Dict:
     """Fallback filters from CSV dataset - comprehensive data"""
-    csv_path = Path(__file__).parent.parent / "data" / "Dataset.csv"
+    store = get_price_store()
     
-    if not csv_path.exists():
-        print(f"CSV not found at {csv_path}, using minimal fallback")
+    if not len(store):
+        print("Price store is empty, using minimal fallback")
         return {
             "Pune": {"Pune": ["Tomato", "Onion", "Potato"]},
             "Nashik": {"Nashik": ["Onion", "Tomato", "Grapes"]},
             "Mumbai": {"Mumbai": ["Tomato", "Onion", "Potato"]},
         }
     
-    print(f"Loading comprehensive filters from CSV: {csv_path}")
-    filters = {}
-    
-    try:
-        import csv
-        with open(csv_path, mode='r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # Normalize keys by stripping whitespace
-                normalized = {k.strip(): v.strip() if isinstance(v, str) else v for k, v in row.items()}
-                
-                district = normalized.get('District', '')
-                market = normalized.get('Market', '')
-                commodity = normalized.get('Commodity', '')
-                
-                if not district or not market or not commodity:
-                    continue
-                
-                if district not in filters:
-                    filters[district] = {}
-                if market not in filters[district]:
-                    filters[district][market] = set()
-                filters[district][market].add(commodity)
-        
-        # Convert sets to sorted lists
-        for district in filters:
-            for market in filters[district]:
-                filters[district][market] = sorted(list(filters[district][market]))
-        
-        print(f"Loaded {len(filters)} districts from CSV with {sum(len(m) for m in filters.values())} markets")
-        return filters
-    except Exception as e:
-        print(f"CSV Error: {e}")
-        return {
-            "Pune": {"Pune": ["Tomato", "Onion", "Potato"]},
-            "Nashik": {"Nashik": ["Onion", "Tomato", "Grapes"]},
-        }
+    filters = store.filters()
+    print(f"Loaded {len(filters)} districts from CSV with {sum(len(m) for m in filters.values())} markets")
+    return filters
 
 @app.on_event("startup")
 async def startup_event():
-    """Pre-fetch filters on startup"""
+    """Open upstream clients, load the price store and pre-render filters on startup"""
     print("Starting Mandi API with LIVE data.gov.in connection...")
-    await get_maharashtra_filters()
+    await http_client.open_clients()
+    get_price_store()
+    await get_localized_filters("mr")
+    if await asyncio.to_thread(load_crop_model):
+        HEATMAP_CACHE.refresh_in_background()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close pooled upstream connections and the AI worker pool"""
+    await http_client.close_clients()
+    ai_pool.shutdown()
 
 @app.get("/")
 async def root():
@@ -226,11 +137,41 @@ async def root():
     }
 
 @app.get("/filters")
-async def get_filters():
-    """Returns available filter options from live API"""
-    filters = await get_maharashtra_filters()
+async def get_filters(lang: str = "en"):
+    """Returns available filter options from live API (names in Marathi with lang=mr)"""
+    filters = await get_localized_filters(lang)
     return filters
 
+@app.get("/metrics/http")
+async def get_http_pool_stats():
+    """Connection pool statistics for each upstream"""
+    return http_client.pool_stats()
+
+@app.get("/metrics/upstreams")
+async def get_upstream_breakers():
+    """Circuit breaker state and adaptive timeouts per upstream"""
+    return http_client.breaker_stats()
+
+@app.get("/metrics/sync")
+async def get_data_gov_sync_status():
+    """State of the last data.gov.in sync"""
+    return get_sync_status()
+
+@app.get("/metrics/ai")
+async def get_ai_pool_stats():
+    """Queue depth and latency of blocking Gemini/gTTS calls"""
+    return ai_pool.pool_stats()
+
+@app.get("/metrics/model")
+async def get_crop_model_stats():
+    """Crop model availability and how many requests share each inference call"""
+    return crop_model_stats()
+
+@app.get("/metrics/cache")
+async def get_cache_stats():
+    """Age, hit and refresh statistics for the server-side caches"""
+    return cache_stats()
+
 @app.get("/translations")
 async def get_translations_endpoint():
     """Returns all Marathi translations for frontend use"""
@@ -252,127 +193,170 @@ async def get_seeds(
     # Generate voice advice for seeds
     if suggestions.get("found"):
         advice_text = generate_seed_advice_text(crop, district or "", language)
-        audio_base64 = await generate_marathi_speech(advice_text, GEMINI_API_KEY)
+        audio_id = await synthesize_speech(advice_text, "mr")
         suggestions["advice_text"] = advice_text
-        suggestions["audio_base64"] = audio_base64
+        suggestions["audio_url"] = audio_url(audio_id)
     
     return suggestions
 
+@app.get("/audio/{audio_id}.mp3")
+async def get_audio(audio_id: str, request: Request):
+    """
+    Serves synthesized speech by content id.
+    Immutable, so clients and CDNs may cache it forever; supports ETag and Range.
+    """
+    audio_bytes = read_audio(audio_id)
+    if audio_bytes is None:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    
+    etag = f'"{audio_id}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "Accept-Ranges": "bytes",
+    }
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    
+    size = len(audio_bytes)
+    range_header = request.headers.get("range", "")
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", range_header.strip())
+    if match and (match.group(1) or match.group(2)):
+        if match.group(1):
+            start = int(match.group(1))
+            end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start = max(size - int(match.group(2)), 0)
+            end = size - 1
+        if start >= size or start > end:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        return Response(
+            content=audio_bytes[start:end + 1],
+            status_code=206,
+            media_type="audio/mpeg",
+            headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}"},
+        )
+    
+    return Response(content=audio_bytes, media_type="audio/mpeg", headers=headers)
+
 @app.get("/seeds/crops")
 async def get_available_seed_crops(language: str = "en"):
     """Returns list of all crops with seed data available"""
     return get_all_available_crops(language)
 
+@app.get("/mandis/nearest")
+async def get_nearest_mandis(lat: float, lon: float, k: int = 5, max_km: Optional[float] = None):
+    """
+    The k mandis closest to a coordinate, with distances in km. Mandis are placed at
+    their district's centroid, so distances are district-level and a district's
+    mandis tie; the one named after the district is listed first.
+    """
+    return find_nearest_mandis(lat, lon, min(k, 100), max_km)
+
+@app.get("/analytics")
+async def get_analytics_endpoint(crop: str, mandi: Optional[str] = None):
+    """
+    Price analytics for a crop in a mandi (or across all markets): 7/30-day moving
+    averages and % change, 30-day volatility, deviation from the seasonal average
+    """
+    crop = translate_commodity(crop, to_marathi=False)
+    if mandi:
+        mandi = translate_market(mandi, to_marathi=False)
+    analytics = await asyncio.to_thread(get_price_analytics, crop, mandi)
+    if analytics is None:
+        raise HTTPException(status_code=404, detail=f"No price history for {crop}")
+    return analytics
+
+# (query, lang) -> (rollups, chart points); entries from older rollups are re-rendered
+HISTORY_CACHE = TTLCache("history", ttl=3600, max_size=1024)
+
 @app.get("/history")
 async def get_historical_data(
     crop: str,
     mandi: Optional[str] = None,
-    days: int = 30
+    days: int = 30,
+    lang: str = "en",
+    resolution: Optional[str] = None,
+    points: Optional[int] = None,
+    downsample: str = "lttb"
 ):
     """
-    Fetch historical price data - first tries live API, then CSV, then synthetic
+    Fetch historical price data - daily OHLC bars from the precomputed rollups
+    (all markets combined when no mandi is given), synthetic when there are none
+    Names may be given in English or Marathi; lang=mr returns Marathi market names
+    With resolution=day|week|month, returns those bars over the last `days` days
+    (no synthetic fallback)
+    With points=N, long series are cut down to about N points (downsample=lttb|minmax)
     """
-    # Try live API first
-    filters = {"commodity": crop}  # Don't filter by state for more data
+    crop = translate_commodity(crop, to_marathi=False)
     if mandi:
-        filters["market"] = mandi
-    
-    data = await fetch_from_data_gov(filters=filters, limit=500)
-    
-    # Collect data from both sources
-    chart_data = []
-    seen_dates = set()
-    
-    # First add live API data if available
-    if data and "records" in data and len(data["records"]) > 0:
-        for record in data["records"]:
-            try:
-                date_str = record.get("arrival_date", "")
-                date_str = date_str.replace("\\/", "/")
-                dt = datetime.strptime(date_str, "%d/%m/%Y")
-                date_key = dt.strftime("%Y-%m-%d")
-                
-                if date_key in seen_dates:
-                    continue
-                seen_dates.add(date_key)
-                
-                chart_data.append({
-                    "date": date_key,
-                    "open": float(record.get("min_price", 0)),
-                    "high": float(record.get("max_price", 0)),
-                    "low": float(record.get("min_price", 0)),
-                    "close": float(record.get("modal_price", 0)),
-                    "market": record.get("market", ""),
-                    "source": "data.gov.in"
-                })
-            except (ValueError, KeyError):
-                continue
-    
-    # Always add CSV data to supplement (for more historical data points)
-    csv_data = get_history_from_csv(crop, mandi, days * 2)  # Get more data
-    for point in csv_data:
-        if point["date"] not in seen_dates:
-            seen_dates.add(point["date"])
-            chart_data.append(point)
-    
-    # Sort and limit
-    if len(chart_data) > 0:
-        chart_data.sort(key=lambda x: x["date"])
-        return chart_data[-days:] if len(chart_data) > days else chart_data
+        mandi = translate_market(mandi, to_marathi=False)
+    if resolution is not None and resolution not in RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"resolution must be one of {', '.join(RESOLUTIONS)}")
+    if points and downsample not in DOWNSAMPLE_METHODS:
+        raise HTTPException(status_code=400, detail=f"downsample must be one of {', '.join(DOWNSAMPLE_METHODS)}")
+
+    # Rendered once per language for each version of the rollups
+    rollups = await asyncio.to_thread(get_rollups)
+    key = (crop, mandi, days, resolution, points, downsample, lang)
+    cached = HISTORY_CACHE.get(key)
+    if cached is not None and cached[0] is rollups:
+        return cached[1]
+
+    if resolution is not None:
+        chart_data = await get_history_bars(crop, mandi, days, resolution)
+    else:
+        chart_data = await load_history(crop, mandi, days)
+    if points:
+        chart_data = downsample_points(chart_data, points, downsample)
+    if lang == "mr":
+        chart_data = [
+            {**point, "market": translate_market(point["market"])} if point.get("market") else point
+            for point in chart_data
+        ]
+    HISTORY_CACHE.set(key, (rollups, chart_data))
+    return chart_data
+
+async def load_history(crop: str, mandi: Optional[str], days: int) -> List[Dict]:
+    """
+    Daily bars from the rollups (which include the synced live records): the
+    mandi's own series, or all markets combined without one; synthetic otherwise
+    """
+    chart_data = await get_history_bars(crop, mandi, days, "day")
+    if chart_data:
+        return chart_data
     
     # Last resort: synthetic data
     print(f"No history found for {crop}/{mandi}, generating synthetic")
     return generate_synthetic_history(crop, days)
 
+async def get_history_bars(crop: str, mandi: Optional[str], days: int, resolution: str) -> List[Dict]:
+    """OHLC bars for crop in mandi (or across all markets) from the rollups"""
+    rollups = await asyncio.to_thread(get_rollups)
+    key = rollups.find_series(crop, mandi)
+    if key is None:
+        return []
+    return bars_to_points(rollups.bars(*key, resolution, days), rollups.market_name(key))
+
 def get_history_from_csv(crop: str, mandi: str = None, days: int = 30) -> List[Dict]:
     """Get historical data from CSV dataset"""
-    csv_path = Path(__file__).parent.parent / "data" / "Dataset.csv"
-    
-    if not csv_path.exists():
-        return []
+    store = get_price_store()
+    rows = store.history(crop, mandi, limit=days)
     
     chart_data = []
-    crop_lower = crop.lower()
-    mandi_lower = mandi.lower() if mandi else None
-    
-    try:
-        with open(csv_path, mode='r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                normalized = {k.strip(): v.strip() if isinstance(v, str) else v for k, v in row.items()}
-                
-                commodity = normalized.get('Commodity', '').lower()
-                market = normalized.get('Market', '').lower()
-                
-                # Match crop using contains (for cases like "Onion Green" matching "Onion")
-                if crop_lower not in commodity and commodity not in crop_lower:
-                    continue
-                # Match market using contains
-                if mandi_lower and mandi_lower not in market and market not in mandi_lower:
-                    continue
-                
-                try:
-                    date_str = normalized.get('Arrival_Date', '')
-                    dt = datetime.strptime(date_str, "%d-%m-%Y")
-                    
-                    chart_data.append({
-                        "date": dt.strftime("%Y-%m-%d"),
-                        "open": float(normalized.get('Min_Price', 0) or 0),
-                        "high": float(normalized.get('Max_Price', 0) or 0),
-                        "low": float(normalized.get('Min_Price', 0) or 0),
-                        "close": float(normalized.get('Modal_Price', 0) or 0),
-                        "market": normalized.get('Market', ''),
-                        "source": "CSV"
-                    })
-                except (ValueError, KeyError):
-                    continue
-        
-        # Sort and limit
-        chart_data.sort(key=lambda x: x["date"])
-        return chart_data[-days:] if len(chart_data) > days else chart_data
-    except Exception as e:
-        print(f"CSV history error: {e}")
-        return []
+    for i in rows.tolist():
+        row = store.row(i)
+        chart_data.append({
+            "date": row["date"].isoformat(),
+            "open": row["modal_price"],
+            "high": row["max_price"],
+            "low": row["min_price"],
+            "close": row["modal_price"],
+            "market": row["market"],
+            "source": "data.gov.in" if row["live"] else "CSV"
+        })
+    return chart_data
 
 def generate_synthetic_history(crop: str, days: int = 30) -> List[Dict]:
     """Generate synthetic history when API data is missing"""
@@ -404,31 +388,21 @@ def generate_synthetic_history(crop: str, days: int = 30) -> List[Dict]:
     
     return data
 
-@app.get("/data")
-async def get_unified_data(
-    district: str,
-    market: Optional[str] = None,
-    crop: str = "Tomato"
-):
-    """
-    Main endpoint - fetches current price, weather, and generates advice
-    All data from LIVE APIs
-    """
-    # 1. Get current price from data.gov.in
+async def get_current_price(district: str, market: Optional[str], crop: str) -> Dict:
+    """Current price from data.gov.in, falling back to the CSV dataset"""
     filters = {"state": "Maharashtra", "district": district, "commodity": crop}
     if market:
         filters["market"] = market
     
     price_data = await fetch_from_data_gov(filters=filters, limit=10)
     
-    current_price = None
     price_market = market or district
     
     if price_data and "records" in price_data and len(price_data["records"]) > 0:
         # Get the most recent record
         record = price_data["records"][0]
         modal_price = float(record.get("modal_price", 0))
-        current_price = {
+        return {
             "market": record.get("market", price_market),
             "crop": crop,
             "min_price_quintal": float(record.get("min_price", 0)),
@@ -437,80 +411,229 @@ async def get_unified_data(
             "arrival_date": record.get("arrival_date", ""),
             "source": "data.gov.in (LIVE)"
         }
-    else:
-        # Fallback to CSV data
-        print(f"No live data for {crop}/{market}, checking CSV...")
-        csv_history = get_history_from_csv(crop, market, days=1)
-        
-        if csv_history and len(csv_history) > 0:
-            latest = csv_history[-1]
-            current_price = {
-                "market": market or district,
-                "crop": crop,
-                "min_price_quintal": latest["low"],
-                "modal_price_kg": round(latest["close"] / 100, 2),
-                "max_price_kg": round(latest["high"] / 100, 2),
-                "arrival_date": latest["date"],
-                "source": "Historical Data (CSV)"
-            }
-        else:
-            # Last resort: empty/synthetic
-            current_price = {
-                "market": price_market,
-                "crop": crop,
-                "min_price_quintal": 0,
-                "modal_price_kg": 0,
-                "max_price_kg": 0,
-                "source": "No data available"
-            }
-    
-    # 2. Get weather from Open-Meteo API
-    lat, lon = DISTRICT_COORDS.get(district, (19.0760, 72.8777))
-    weather_data = await get_weather(lat, lon)
-    
-    # 3. Generate AI advice based on price and weather
-    advice_text = await generate_advice(current_price, weather_data, GEMINI_API_KEY)
-    
-    # 4. If no advice was generated, create a fallback advice in Marathi
-    crop_marathi = COMMODITY_TRANSLATIONS.get(crop, crop)
-    district_marathi = DISTRICT_TRANSLATIONS.get(district, district)
-    
-    if not advice_text or "उपलब्ध नाही" in advice_text or len(advice_text) < 20:
-        modal_price = current_price.get('modal_price_kg', 0)
-        rain_warning = weather_data.get('rain_next_3_days', False)
-        
-        advice_text = f"शेतकरी मित्रांनो, {district_marathi} मधील {crop_marathi} पिकाची सध्याची बाजारभाव माहिती. "
-        
-        if modal_price > 0:
-            advice_text += f"सध्याचा भाव प्रति किलो {modal_price} रुपये आहे. "
-        else:
-            advice_text += "आज बाजारात भाव स्थिर आहे. "
-        
-        if rain_warning:
-            advice_text += "पुढील तीन दिवसांत पावसाची शक्यता आहे, त्यामुळे पीक सुरक्षित ठेवा. "
-        else:
-            advice_text += "हवामान चांगले आहे. "
-        
-        advice_text += "बाजारभाव तपासून योग्य वेळी विक्री करा. शेतकरी मित्र सदैव तुमच्या सोबत आहे."
     
-    # 5. Generate voice audio
-    audio_base64 = await generate_marathi_speech(advice_text, GEMINI_API_KEY)
+    # Fallback to CSV data
+    print(f"No live data for {crop}/{market}, checking CSV...")
+    return get_csv_price(district, market, crop)
+
+def get_csv_price(district: str, market: Optional[str], crop: str) -> Dict:
+    """Latest CSV price, or an empty price when the dataset has none"""
+    csv_history = get_history_from_csv(crop, market, days=1)
+    
+    if csv_history and len(csv_history) > 0:
+        latest = csv_history[-1]
+        return {
+            "market": market or district,
+            "crop": crop,
+            "min_price_quintal": latest["low"],
+            "modal_price_kg": round(latest["close"] / 100, 2),
+            "max_price_kg": round(latest["high"] / 100, 2),
+            "arrival_date": latest["date"],
+            "source": "Historical Data (CSV)"
+        }
+    
+    # Last resort: empty/synthetic
+    return {
+        "market": market or district,
+        "crop": crop,
+        "min_price_quintal": 0,
+        "modal_price_kg": 0,
+        "max_price_kg": 0,
+        "source": "No data available"
+    }
+
+@app.get("/data")
+async def get_unified_data(
+    district: str,
+    market: Optional[str] = None,
+    crop: str = "Tomato",
+    lang: str = "en"
+):
+    """
+    Main endpoint - fetches current price, weather, and generates advice
+    All data from LIVE APIs
+    Names may be given in English or Marathi; lang=mr returns Marathi names
+    """
+    district = translate_district(district, to_marathi=False)
+    crop = translate_commodity(crop, to_marathi=False)
+    if market:
+        market = translate_market(market, to_marathi=False)
+    # Price (data.gov.in -> CSV), weather (Open-Meteo) and price analytics run
+    # concurrently, then advice and voice; a stage that misses its deadline uses its fallback
+    lat, lon = resolve_coords(district, market)
+    result = await run_advice_pipeline(
+        district=district,
+        crop=crop,
+        price=get_current_price(district, market, crop),
+        weather=get_weather(lat, lon),
+        price_fallback=lambda: get_csv_price(district, market, crop),
+        api_key=GEMINI_API_KEY,
+        analytics=asyncio.to_thread(get_price_analytics, crop, market or district),
+    )
+    
+    price_data = result["price_data"]
+    if lang == "mr":
+        price_data = {
+            **price_data,
+            "market": translate_market(price_data.get("market", "")),
+            "crop": translate_commodity(price_data.get("crop", "")),
+        }
     
     return {
         "location": {
-            "district": district,
-            "market": market or price_market,
+            "district": translate_district(district) if lang == "mr" else district,
+            "market": translate_market(market or district) if lang == "mr" else market or district,
             "lat": lat,
             "lon": lon
         },
-        "crop": crop,
-        "price_data": current_price,
-        "weather_data": weather_data,
-        "advice_marathi": advice_text,
-        "audio_base64": audio_base64,
+        "crop": translate_commodity(crop) if lang == "mr" else crop,
+        "price_data": price_data,
+        "weather_data": result["weather_data"],
+        "analytics": result["analytics"],
+        "advice_marathi": result["advice_marathi"],
+        "audio_url": audio_url(result["audio_id"]),
+        "timings_ms": result["timings_ms"],
         "data_source": "data.gov.in (Government of India)"
     }
 
+class BatchItem(BaseModel):
+    district: str
+    market: Optional[str] = None
+    crop: str = "Tomato"
+
+class BatchRequest(BaseModel):
+    items: List[BatchItem]
+    lang: str = "en"
+    advice: bool = False
+
+async def get_batch_item(run: BatchRun, item: BatchItem, lang: str, advice: bool) -> Dict:
+    """Price and weather (and optionally advice) for one batch item, sharing sub-requests"""
+    district = translate_district(item.district, to_marathi=False)
+    crop = translate_commodity(item.crop, to_marathi=False)
+    market = translate_market(item.market, to_marathi=False) if item.market else None
+    lat, lon = resolve_coords(district, market)
+    
+    price = run.shared(("price", district, market, crop), lambda: get_current_price(district, market, crop))
+    weather = run.shared(
+        ("weather", round(lat, WEATHER_COORD_DECIMALS), round(lon, WEATHER_COORD_DECIMALS)),
+        lambda: get_weather(lat, lon),
+    )
+    
+    if advice:
+        result = await run_advice_pipeline(
+            district=district,
+            crop=crop,
+            price=price,
+            weather=weather,
+            price_fallback=lambda: get_csv_price(district, market, crop),
+            api_key=GEMINI_API_KEY,
+            analytics=asyncio.to_thread(get_price_analytics, crop, market or district),
+        )
+    else:
+        timings = {}
+        price_data, weather_data = await asyncio.gather(
+            run_stage("price", price, lambda: get_csv_price(district, market, crop), timings),
+            run_stage("weather", weather, lambda: fallback_weather("Weather stage timed out"), timings),
+        )
+        result = {"price_data": price_data, "weather_data": weather_data, "timings_ms": timings}
+    
+    response = {
+        "district": translate_district(district) if lang == "mr" else district,
+        "market": translate_market(market or district) if lang == "mr" else market or district,
+        "crop": translate_commodity(crop) if lang == "mr" else crop,
+        "price_data": result["price_data"],
+        "weather_data": result["weather_data"],
+        "timings_ms": result["timings_ms"],
+    }
+    if advice:
+        response["analytics"] = result["analytics"]
+        response["advice_marathi"] = result["advice_marathi"]
+        response["audio_url"] = audio_url(result["audio_id"])
+    return response
+
+@app.post("/data/batch")
+async def get_batch_data(request: BatchRequest):
+    """
+    Prices and weather for many (district, market, crop) items in one request.
+    Streams newline-delimited JSON: one {"index": i, ...} line per item as it
+    completes, then a {"done": true, ...} summary line.
+    """
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_ITEMS} items per batch")
+    
+    async def lines():
+        handle = lambda run, item: get_batch_item(run, item, request.lang, request.advice)
+        async for result in stream_batch(request.items, handle):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+class CropPredictionRequest(BaseModel):
+    state: str = "Maharashtra"
+    district: str
+    soil_type: str = "black"
+    date: Optional[str] = None
+    temperature: Optional[float] = None
+    humidity: Optional[float] = None
+    rainfall: Optional[float] = None
+    top_k: int = 6
+
+@app.post("/crops/predict")
+async def predict_crop_suitability(request: CropPredictionRequest):
+    """
+    Crop suitability for a location from the exported model: every candidate
+    crop is scored in one batch, with market features from the feature store.
+    Weather not given uses the training averages.
+    """
+    try:
+        day = datetime.strptime(request.date, "%Y-%m-%d").date() if request.date else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="date must be YYYY-MM-DD")
+    
+    district = translate_district(request.district, to_marathi=False)
+    weather = {"temperature": request.temperature, "humidity": request.humidity, "rainfall": request.rainfall}
+    result = await predict_crops(district, request.soil_type, day, weather, min(max(request.top_k, 1), 50))
+    if result is None:
+        raise HTTPException(status_code=503, detail=crop_model_error())
+    
+    return {
+        "predictions": result["predictions"],
+        "weather": {**result["weather"], "description": f"{result['season'].capitalize()} season"},
+        "location": {
+            "state": request.state,
+            "district": district,
+            "soil_type": request.soil_type,
+            "model_district": result["model_district"],
+        },
+        "isFromFallback": False,
+        "timestamp": datetime.now().isoformat(),
+    }
+
+@app.get("/crops/heatmap")
+async def get_crop_heatmap(
+    state: str = "Maharashtra",
+    week: Optional[int] = None,
+    district: Optional[str] = None,
+    crop: Optional[str] = None
+):
+    """
+    Precomputed suitability of every crop in every district of a state for one
+    week (default: this week). suitability holds indexes into classes, one row
+    per district; district and crop narrow the map to a slice.
+    """
+    heatmap = await get_heatmap()
+    if heatmap is None:
+        raise HTTPException(status_code=503, detail=crop_model_error() or "Crop heatmap not built yet")
+    
+    if district:
+        district = translate_district(district, to_marathi=False)
+    if crop:
+        crop = translate_commodity(crop, to_marathi=False)
+    result = heatmap.slice(state, week or datetime.now().isocalendar()[1], district, crop)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"No heatmap for state={state} district={district} crop={crop}")
+    return result
+
 @app.get("/live-test")
 async def test_live_api():
     """Test endpoint to verify live API connection"""
@@ -0,0 +1,18 @@
+"""
+Build the memory-mapped price snapshot from Dataset.csv
+Run at deploy time so workers start by mapping the snapshot instead of parsing text
+"""
+import sys
+from pathlib import Path
+
+from services.price_store import DATASET_PATH, build_snapshot, open_snapshot
+
+if __name__ == "__main__":
+    csv_path = Path(sys.argv[1]) if len(sys.argv) > 1 else DATASET_PATH
+    if not csv_path.exists():
+        print(f"CSV not found at {csv_path}, nothing to build")
+        sys.exit(0)
+
+    path = build_snapshot(csv_path)
+    store = open_snapshot(path)
+    print(f"Snapshot ready at {path}: {len(store)} rows, {len(store.markets)} markets, {len(store.commodities)} commodities")
@@ -0,0 +1,75 @@
+"""
+Export the crop model's trees to NumPy node arrays
+Run at deploy time so workers load crop_model.npz instead of unpickling the
+XGBClassifier (and importing xgboost). The arrays are only written when their
+predictions match the original model's on a parity sample.
+"""
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from services.crop_model import CROP_MODEL_DIR, MODEL_FILE, ARRAY_MODEL_FILE, read_pickled_artifacts
+from services.tree_model import TreeEnsemble
+
+PARITY_SAMPLES = 20000
+PARITY_TOLERANCE = 1e-6   # max absolute difference in class probability
+
+
+def parity_inputs(trees: TreeEnsemble, n_features: int) -> np.ndarray:
+    """
+    Standardized inputs: random rows around the training distribution with a
+    few missing values, rows sitting exactly on split thresholds, and rows
+    with infinite values
+    """
+    rng = np.random.default_rng(0)
+    X = rng.normal(scale=1.5, size=(PARITY_SAMPLES, n_features)).astype(np.float32)
+    X[rng.random(X.shape) < 0.01] = np.nan
+
+    nodes = trees.nodes
+    splits = np.flatnonzero(np.isfinite(nodes["threshold"]))
+    on_threshold = rng.normal(size=(len(splits), n_features)).astype(np.float32)
+    on_threshold[np.arange(len(splits)), nodes["feature"][splits]] = nodes["threshold"][splits]
+    infinite = rng.normal(size=(1000, n_features)).astype(np.float32)
+    infinite[rng.random(infinite.shape) < 0.2] = np.inf
+    infinite[rng.random(infinite.shape) < 0.2] = -np.inf
+    return np.concatenate((X, on_threshold, infinite))
+
+
+if __name__ == "__main__":
+    model_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else CROP_MODEL_DIR
+    if not (model_dir / MODEL_FILE).exists():
+        print(f"{MODEL_FILE} not found in {model_dir}, nothing to export")
+        sys.exit(0)
+
+    artifacts = read_pickled_artifacts(model_dir)
+    model = artifacts.pop("model")
+    booster = model.get_booster()
+    best_iteration = booster.attr("best_iteration")
+    trees = TreeEnsemble.from_xgboost_json(
+        json.loads(booster.save_raw("json")),
+        meta={
+            "encoder_classes": artifacts["encoder_classes"],
+            "mean": artifacts["mean"].tolist(),
+            "scale": artifacts["scale"].tolist(),
+            "feature_columns": artifacts["feature_columns"],
+        },
+        # predict_proba stops at the best iteration when the model was early-stopped
+        iterations=None if best_iteration is None else int(best_iteration) + 1,
+    )
+
+    X = parity_inputs(trees, len(artifacts["feature_columns"]))
+    expected = np.asarray(model.predict_proba(X), dtype=np.float64)
+    actual = trees.predict_proba(X)
+    max_diff = float(np.abs(expected - actual).max())
+    mismatched = int((expected.argmax(axis=1) != actual.argmax(axis=1)).sum())
+    if max_diff > PARITY_TOLERANCE or mismatched:
+        print(f"Parity check failed on {len(X)} rows: max probability difference {max_diff:.2e}, "
+              f"{mismatched} different classes. {ARRAY_MODEL_FILE} not written")
+        sys.exit(1)
+
+    path = model_dir / ARRAY_MODEL_FILE
+    trees.save(path)
+    print(f"Exported {len(trees.roots)} trees ({len(trees.nodes['value'])} nodes, depth {trees.depth}) to {path}; "
+          f"parity on {len(X)} rows: max probability difference {max_diff:.2e}, same classes")
@@ -1,13 +1,16 @@
 from mcp.server.fastmcp import FastMCP
+import asyncio
 import os
 from dotenv import load_dotenv
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
-from services.location_service import get_all_locations, get_location_details
-from services.mandi_service import get_mandi_prices
-from services.weather_service import get_weather
-from services.advice_service import generate_advice
-from services.tts_service import generate_marathi_speech
+from services.location_service import get_all_locations, get_location_details, get_mandi_index
+from services.mandi_service import get_mandi_prices, get_synthetic_price
+from services.weather_service import get_weather, fallback_weather, WEATHER_COORD_DECIMALS
+from services.pipeline import run_advice_pipeline, run_stage
+from services.batch_service import BATCH_MAX_ITEMS, BatchRun, run_batch
+from services.analytics import get_price_analytics
+from services.tts_service import AUDIO_BASE_URL, audio_url, generate_marathi_speech
 
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
@@ -15,10 +18,13 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 mcp = FastMCP("Mandi Price & Weather Service")
 
 @mcp.tool()
-async def get_locations() -> str:
+async def get_locations(lat: Optional[float] = None, lon: Optional[float] = None, k: int = 10) -> str:
     """
     Returns a list of supported locations in Maharashtra (PoC database).
+    With lat/lon, returns the k nearest mandis and villages with distances in km.
     """
+    if lat is not None and lon is not None:
+        return str(get_mandi_index().nearest(lat, lon, k))
     locations = get_all_locations()
     return str(locations)
 
@@ -40,26 +46,78 @@ async def get_agricultural_advice(district: str, taluka: str, crop: str, village
     nearest_mandi = location_details["nearest_mandi"]
     lat, lon = location_details["lat"], location_details["lon"]
 
-    # 2. Fetch Prices
-    price_data = await get_mandi_prices(nearest_mandi, crop)
+    # 2-5. Prices, weather and the price trend concurrently, then advice and audio
+    result = await run_advice_pipeline(
+        district=district,
+        crop=crop,
+        price=get_mandi_prices(nearest_mandi, crop),
+        weather=get_weather(lat, lon),
+        price_fallback=lambda: get_synthetic_price(nearest_mandi, crop),
+        api_key=GEMINI_API_KEY,
+        analytics=asyncio.to_thread(get_price_analytics, crop, nearest_mandi),
+    )
     
-    # 3. Fetch Weather
-    weather_data = await get_weather(lat, lon)
-    
-    # 4. Generate Advice
-    advice_text = await generate_advice(price_data, weather_data, GEMINI_API_KEY)
-    
-    # 5. Generate Audio
-    audio_base64 = await generate_marathi_speech(advice_text, GEMINI_API_KEY)
-    
-    return {
+    response = {
         "location": location_details,
         "crop": crop,
-        "price_data": price_data,
-        "weather_data": weather_data,
-        "advice_marathi": advice_text,
-        "audio_base64": audio_base64
+        "price_data": result["price_data"],
+        "weather_data": result["weather_data"],
+        "analytics": result["analytics"],
+        "advice_marathi": result["advice_marathi"],
+        "audio_url": audio_url(result["audio_id"])
     }
+    
+    # Without a public API origin the URL is not reachable for MCP clients,
+    # so the audio is inlined instead
+    if not AUDIO_BASE_URL:
+        response["audio_base64"] = await generate_marathi_speech(result["advice_marathi"], GEMINI_API_KEY)
+    
+    return response
+
+@mcp.tool()
+async def get_batch_prices(items: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+    """
+    Mandi price and weather for many locations at once.
+    Each item has district, taluka and crop; shared price and weather lookups
+    run once, and results come back in the order of the items.
+    """
+    if len(items) > BATCH_MAX_ITEMS:
+        return [{"error": f"At most {BATCH_MAX_ITEMS} items per batch"}]
+
+    async def handle(run: BatchRun, item: Dict[str, str]) -> Dict[str, Any]:
+        district, taluka, crop = item.get("district", ""), item.get("taluka", ""), item.get("crop", "")
+        location_details = get_location_details(district, taluka)
+        if not location_details:
+            return {"error": f"Location not found for District: {district}, Taluka: {taluka}"}
+
+        nearest_mandi = location_details["nearest_mandi"]
+        lat, lon = location_details["lat"], location_details["lon"]
+        timings = {}
+        price_data, weather_data = await asyncio.gather(
+            run_stage(
+                "price",
+                run.shared(("price", nearest_mandi, crop), lambda: get_mandi_prices(nearest_mandi, crop)),
+                lambda: get_synthetic_price(nearest_mandi, crop),
+                timings,
+            ),
+            run_stage(
+                "weather",
+                run.shared(
+                    ("weather", round(lat, WEATHER_COORD_DECIMALS), round(lon, WEATHER_COORD_DECIMALS)),
+                    lambda: get_weather(lat, lon),
+                ),
+                lambda: fallback_weather("Weather stage timed out"),
+                timings,
+            ),
+        )
+        return {
+            "location": location_details,
+            "crop": crop,
+            "price_data": price_data,
+            "weather_data": weather_data,
+        }
+
+    return await run_batch(items, handle)
 
 if __name__ == "__main__":
     mcp.run()
@@ -1,34 +1,177 @@
-import google.generativeai as genai
-from typing import Dict, Any
+import datetime
+import math
+from typing import Dict, Any, Optional, Tuple
 
-async def generate_advice(price_data: Dict[str, Any], weather_data: Dict[str, Any], api_key: str) -> str:
+from services.ai_pool import get_gemini_model, run_blocking
+from services.cache import TTLCache
+from translations import COMMODITY_TRANSLATIONS, DISTRICT_TRANSLATIONS
+
+# Advice depends only on the market situation, so farmers asking about the same
+# crop under the same conditions on the same day share one Gemini answer
+ADVICE_CACHE = TTLCache("advice", ttl=6 * 3600, max_size=2048)
+PRICE_BUCKET_RATIO = 1.05   # prices within ~5% share a bucket
+RAIN_BUCKET_PCT = 20        # rain probability in 20-point bands
+TEMP_BUCKET_C = 2           # max temperature in 2°C bands
+CHANGE_BUCKET_PCT = 5       # 7/30-day price change and seasonal deviation in 5-point bands
+
+
+def _pct_bucket(value: Optional[float]) -> Optional[int]:
+    return None if value is None else int(round(value / CHANGE_BUCKET_PCT)) * CHANGE_BUCKET_PCT
+
+
+def advice_situation(
+    price_data: Dict[str, Any],
+    weather_data: Dict[str, Any],
+    language: str = "mr",
+    analytics: Optional[Dict[str, Any]] = None
+) -> Tuple:
     """
-    Generates advice in Marathi using Gemini based on price and weather data.
+    Normalized (crop, price bucket, rain bucket, rain flag, temp bucket, trend,
+    language, date) key. The prompt is rendered from this key alone, so a cached
+    answer is exactly what Gemini would have been asked for any situation in the
+    same bucket. analytics is a services.analytics entry (None when there is no history).
+    """
+    crop = str(price_data.get('crop') or '').strip().title()
+
+    modal_price = float(price_data.get('modal_price_kg') or 0)
+    price_bucket = round(math.log(modal_price, PRICE_BUCKET_RATIO)) if modal_price > 0 else None
+
+    rain_prob = min(max(float(weather_data.get('max_rain_probability') or 0), 0), 100)
+    rain_bucket = int(rain_prob // RAIN_BUCKET_PCT) * RAIN_BUCKET_PCT
+    temp = float(weather_data.get('avg_max_temp') or 0)
+    temp_bucket = int(round(temp / TEMP_BUCKET_C)) * TEMP_BUCKET_C
+
+    analytics = analytics or {}
+    trend = (
+        analytics.get('trend', 'Unknown'),
+        _pct_bucket(analytics.get('change_7d_pct')),
+        _pct_bucket(analytics.get('change_30d_pct')),
+        _pct_bucket(analytics.get('seasonal_deviation_pct')),
+    )
+
+    return (
+        crop,
+        price_bucket,
+        rain_bucket,
+        bool(weather_data.get('rain_next_3_days')),
+        temp_bucket,
+        trend,
+        language,
+        datetime.date.today().isoformat(),
+    )
+
+
+def _describe_trend(trend: Tuple) -> str:
+    label, change_7d, change_30d, seasonal = trend
+    if label == "Unknown" and change_30d is None:
+        return "Unknown (no recent price history)"
+    parts = []
+    if change_7d is not None:
+        parts.append(f"about {change_7d:+d}% over 7 days")
+    if change_30d is not None:
+        parts.append(f"about {change_30d:+d}% over 30 days")
+    if seasonal is not None:
+        parts.append(f"about {seasonal:+d}% vs the usual price for this month")
+    return f"{label} ({', '.join(parts)})" if parts else label
+
+
+def _rain_band(rain_bucket: int) -> str:
+    """Rain probability band of a bucket; a certain forecast is its own band"""
+    if rain_bucket >= 100:
+        return "100%"
+    return f"{rain_bucket}-{min(rain_bucket + RAIN_BUCKET_PCT, 100)}%"
+
+
+def _advice_prompt(situation: Tuple) -> str:
+    crop, price_bucket, rain_bucket, rain_warning, temp_bucket, trend, language, _ = situation
+    price = round(PRICE_BUCKET_RATIO ** price_bucket, 2) if price_bucket is not None else 0
+    output_language = "Marathi" if language == "mr" else "English"
+    return (
+        f"You are an expert agricultural advisor for farmers in Maharashtra. "
+        f"Based on the following data, provide simple, actionable advice in {output_language}. "
+        f"Do not just list numbers. Give a recommendation on whether to sell or hold. "
+        f"\n\nData:\n"
+        f"Crop: {crop}\n"
+        f"Current Price: ₹{price}/kg\n"
+        f"Price Trend: {_describe_trend(trend)}\n"
+        f"Weather Forecast: Max Rain Prob: {_rain_band(rain_bucket)}, Temp: {temp_bucket}C\n"
+        f"Rain Warning: {'Yes' if rain_warning else 'No'}\n"
+        f"\nOutput in {output_language} only."
+    )
+
+
+async def _ask_gemini(situation: Tuple, api_key: str) -> str:
+    """Uncached Gemini call; raises on unusable output so it is never cached"""
+    model = get_gemini_model(api_key, 'models/gemini-2.0-flash')
+    response = await run_blocking("gemini_advice", model.generate_content, _advice_prompt(situation))
+    text = response.text
+    if not is_usable_advice(text):
+        raise ValueError("Gemini returned no usable advice")
+    return text
+
+
+async def generate_advice(
+    price_data: Dict[str, Any],
+    weather_data: Dict[str, Any],
+    api_key: str,
+    language: str = "mr",
+    analytics: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Generates advice in Marathi using Gemini based on price, weather and price trend data.
+    Answers are cached per normalized situation (see advice_situation).
     """
     if not api_key:
         return "सल्ला उपलब्ध नाही (API Key missing)."
 
+    situation = advice_situation(price_data, weather_data, language, analytics)
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('models/gemini-2.0-flash') 
-        
-        prompt = (
-            f"You are an expert agricultural advisor for farmers in Maharashtra. "
-            f"Based on the following data, provide simple, actionable advice in Marathi. "
-            f"Do not just list numbers. Give a recommendation on whether to sell or hold. "
-            f"\n\nData:\n"
-            f"Crop: {price_data.get('crop')}\n"
-            f"Current Price: ₹{price_data.get('modal_price_kg')}/kg\n"
-            f"Price Trend: Stable (Assumed)\n"
-            f"Weather Forecast: {weather_data.get('forecast_text')}\n"
-            f"Rain Warning: {'Yes' if weather_data.get('rain_next_3_days') else 'No'}\n"
-            f"\nOutput in Marathi only."
-        )
-
-        response = model.generate_content(prompt)
-        
-        return response.text if response.text else "सल्ला उपलब्ध नाही."
+        return await ADVICE_CACHE.get_or_load(situation, lambda: _ask_gemini(situation, api_key))
 
     except Exception as e:
         print(f"Advice Generation Error: {e}")
         return "सध्या सल्ला उपलब्ध नाही. (Self-Analysis: Check market trends manually)."
+
+
+def is_usable_advice(advice_text: str) -> bool:
+    """False for empty, too short, or 'not available' Gemini responses"""
+    return bool(advice_text) and "उपलब्ध नाही" not in advice_text and len(advice_text) >= 20
+
+
+def build_template_advice(
+    district: str,
+    crop: str,
+    price_data: Dict[str, Any],
+    weather_data: Dict[str, Any],
+    analytics: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Rule-based Marathi advice: the always-available tier served when Gemini
+    is unavailable or misses its deadline (its answer still lands in ADVICE_CACHE).
+    """
+    crop_marathi = COMMODITY_TRANSLATIONS.get(crop, crop)
+    district_marathi = DISTRICT_TRANSLATIONS.get(district, district)
+    
+    modal_price = price_data.get('modal_price_kg', 0)
+    rain_warning = weather_data.get('rain_next_3_days', False)
+    
+    advice_text = f"शेतकरी मित्रांनो, {district_marathi} मधील {crop_marathi} पिकाची सध्याची बाजारभाव माहिती. "
+    
+    if modal_price > 0:
+        advice_text += f"सध्याचा भाव प्रति किलो {modal_price} रुपये आहे. "
+    else:
+        advice_text += "आज बाजारात भाव स्थिर आहे. "
+    
+    trend = (analytics or {}).get('trend')
+    if trend == "Rising":
+        advice_text += "गेल्या आठवड्यात भाव वाढत आहेत. "
+    elif trend == "Falling":
+        advice_text += "गेल्या आठवड्यात भाव घसरत आहेत. "
+    
+    if rain_warning:
+        advice_text += "पुढील तीन दिवसांत पावसाची शक्यता आहे, त्यामुळे पीक सुरक्षित ठेवा. "
+    else:
+        advice_text += "हवामान चांगले आहे. "
+    
+    advice_text += "बाजारभाव तपासून योग्य वेळी विक्री करा. शेतकरी मित्र सदैव तुमच्या सोबत आहे."
+    return advice_text
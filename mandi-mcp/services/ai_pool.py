@@ -0,0 +1,112 @@
+"""
+AI Worker Pool
+Runs blocking Gemini, gTTS and crop model calls on a dedicated thread pool so the event loop
+keeps serving /filters and /history, with a separate concurrency limit per call kind
+"""
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import google.generativeai as genai
+
+# Max concurrent calls per kind; calls beyond the limit queue without holding a thread
+CALL_LIMITS = {
+    "gemini_advice": 4,
+    "gemini_price": 2,
+    "tts": 4,
+    "crop_model": 2,
+}
+
+AI_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("AI_POOL_WORKERS", sum(CALL_LIMITS.values()))),
+    thread_name_prefix="ai-pool",
+)
+
+_SEMAPHORES: Dict[str, asyncio.Semaphore] = {}
+_STATS: Dict[str, Dict[str, float]] = {
+    kind: {"queued": 0, "running": 0, "max_queued": 0, "completed": 0, "failed": 0,
+           "total_wait_ms": 0.0, "total_run_ms": 0.0}
+    for kind in CALL_LIMITS
+}
+
+
+async def run_blocking(kind: str, fn: Callable, *args, **kwargs) -> Any:
+    """Run fn(*args, **kwargs) on the AI pool under the limit for its kind"""
+    semaphore = _SEMAPHORES.get(kind)
+    if semaphore is None:
+        semaphore = _SEMAPHORES[kind] = asyncio.Semaphore(CALL_LIMITS[kind])
+    stats = _STATS[kind]
+
+    queued_at = time.perf_counter()
+    stats["queued"] += 1
+    stats["max_queued"] = max(stats["max_queued"], stats["queued"])
+    try:
+        await semaphore.acquire()
+    finally:
+        stats["queued"] -= 1
+
+    started_at = time.perf_counter()
+    stats["total_wait_ms"] += (started_at - queued_at) * 1000
+    stats["running"] += 1
+    future = asyncio.get_running_loop().run_in_executor(AI_EXECUTOR, functools.partial(fn, *args, **kwargs))
+
+    def finished(f: asyncio.Future):
+        # The slot is held until the thread is done, even if the caller gave up
+        stats["running"] -= 1
+        stats["total_run_ms"] += (time.perf_counter() - started_at) * 1000
+        if f.cancelled() or f.exception() is not None:
+            stats["failed"] += 1
+        else:
+            stats["completed"] += 1
+        semaphore.release()
+
+    future.add_done_callback(finished)
+    return await asyncio.shield(future)
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Queue depth, concurrency and latency per call kind"""
+    stats = {}
+    for kind, s in _STATS.items():
+        done = s["completed"] + s["failed"]
+        stats[kind] = {
+            "limit": CALL_LIMITS[kind],
+            "queued": s["queued"],
+            "running": s["running"],
+            "max_queued": s["max_queued"],
+            "completed": s["completed"],
+            "failed": s["failed"],
+            "avg_wait_ms": round(s["total_wait_ms"] / done, 1) if done else None,
+            "avg_run_ms": round(s["total_run_ms"] / done, 1) if done else None,
+        }
+    return stats
+
+
+def shutdown():
+    AI_EXECUTOR.shutdown(wait=False, cancel_futures=True)
+
+
+# =============================================================================
+# GEMINI CLIENT - configured once per API key, models reused across requests
+# =============================================================================
+_GEMINI_LOCK = threading.Lock()
+_GEMINI_KEY: Optional[str] = None
+_GEMINI_MODELS: Dict[str, "genai.GenerativeModel"] = {}
+
+
+def get_gemini_model(api_key: str, model_name: str) -> "genai.GenerativeModel":
+    """Shared GenerativeModel; genai.configure only runs when the key changes"""
+    global _GEMINI_KEY
+    with _GEMINI_LOCK:
+        if api_key != _GEMINI_KEY:
+            genai.configure(api_key=api_key)
+            _GEMINI_KEY = api_key
+            _GEMINI_MODELS.clear()
+        model = _GEMINI_MODELS.get(model_name)
+        if model is None:
+            model = _GEMINI_MODELS[model_name] = genai.GenerativeModel(model_name)
+        return model
@@ -0,0 +1,163 @@
+"""
+Price Analytics
+Moving averages, volatility, 7/30-day change and seasonal deviation for every
+daily rollup series at once, recomputed only for series that changed on ingest
+"""
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.price_store import days_to_date
+from services.rollups import Rollups, get_rollups
+
+MA_WINDOWS = (7, 30)            # moving averages over calendar days
+VOLATILITY_WINDOW = 30          # days of daily log returns
+TREND_THRESHOLD_PCT = 5.0       # |7-day change| below this is "Stable"
+
+_KEY_SHIFT = 1 << 24            # days since epoch stay far below this
+
+
+def _window_start(keys: np.ndarray, group: np.ndarray, last_day: np.ndarray, days: int) -> np.ndarray:
+    """Per group, index of the first bar within `days` days of the group's last bar"""
+    return np.searchsorted(keys, group * _KEY_SHIFT + (last_day - days + 1), side="left")
+
+
+def _sum_between(cumsum: np.ndarray, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """Sum of values[start:end] for each pair, from a cumsum with a leading zero"""
+    return cumsum[end] - cumsum[start]
+
+
+def compute_metrics(keys: List[Tuple[int, int]], day_series: Dict[Tuple[int, int], Dict[str, np.ndarray]]) -> Dict[Tuple[int, int], Dict[str, Any]]:
+    """Metrics for the given series, computed together over their concatenated daily closes"""
+    if not keys:
+        return {}
+
+    lengths = np.asarray([len(day_series[k]["period"]) for k in keys], dtype=np.int64)
+    group = np.repeat(np.arange(len(keys), dtype=np.int64), lengths)
+    day = np.concatenate([day_series[k]["period"] for k in keys]).astype(np.int64)
+    close = np.concatenate([day_series[k]["close"] for k in keys]).astype(np.float64)
+    sort_keys = group * _KEY_SHIFT + day
+
+    ends = np.cumsum(lengths)              # one past each group's last bar
+    last = ends - 1
+    first = ends - lengths
+    last_day = day[last]
+    last_close = close[last]
+    groups = np.arange(len(keys), dtype=np.int64)
+    close_cumsum = np.concatenate(([0.0], np.cumsum(close)))
+
+    metrics: Dict[str, np.ndarray] = {}
+    for window in MA_WINDOWS:
+        start = _window_start(sort_keys, groups, last_day, window)
+        metrics[f"ma_{window}d"] = _sum_between(close_cumsum, start, ends) / (ends - start)
+
+        # Change vs the latest close at least `window` days before the last bar
+        before = np.searchsorted(sort_keys, groups * _KEY_SHIFT + (last_day - window), side="right") - 1
+        has_base = (before >= first) & (close[np.maximum(before, 0)] > 0)
+        base = close[np.maximum(before, 0)]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            metrics[f"change_{window}d_pct"] = np.where(has_base, (last_close / base - 1) * 100, np.nan)
+
+    # Rolling volatility: std of log returns between daily closes over the last VOLATILITY_WINDOW days, in %
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.log(close[1:] / close[:-1])
+    valid = np.concatenate(([False], (group[1:] == group[:-1]) & np.isfinite(returns)))
+    r = np.concatenate(([0.0], np.where(valid[1:], returns, 0.0)))
+    r_cumsum = np.concatenate(([0.0], np.cumsum(r)))
+    r2_cumsum = np.concatenate(([0.0], np.cumsum(r * r)))
+    n_cumsum = np.concatenate(([0], np.cumsum(valid)))
+    start = _window_start(sort_keys, groups, last_day, VOLATILITY_WINDOW)
+    n = _sum_between(n_cumsum, start, ends)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = _sum_between(r_cumsum, start, ends) / n
+        var = (_sum_between(r2_cumsum, start, ends) - n * mean * mean) / (n - 1)
+        metrics[f"volatility_{VOLATILITY_WINDOW}d_pct"] = np.where(n >= 2, np.sqrt(np.maximum(var, 0)) * 100, np.nan)
+
+    # Seasonal deviation: last close vs the mean close of the same calendar month in all years
+    month = day.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64) % 12
+    slot = group * 12 + month
+    slot_sum = np.bincount(slot, weights=close, minlength=len(keys) * 12)
+    slot_count = np.bincount(slot, minlength=len(keys) * 12)
+    last_slot = slot[last]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        seasonal_mean = slot_sum[last_slot] / slot_count[last_slot]
+        metrics["seasonal_deviation_pct"] = np.where(seasonal_mean > 0, (last_close / seasonal_mean - 1) * 100, np.nan)
+
+    result = {}
+    columns = {name: values.tolist() for name, values in metrics.items()}
+    for i, key in enumerate(keys):
+        entry = {
+            "last_date": days_to_date(int(last_day[i])).isoformat(),
+            "last_close": round(float(last_close[i]), 2),
+            "observations": int(lengths[i]),
+        }
+        for name, values in columns.items():
+            entry[name] = None if np.isnan(values[i]) else round(values[i], 2)
+        entry["trend"] = trend_label(entry["change_7d_pct"])
+        result[key] = entry
+    return result
+
+
+def trend_label(change_pct: Optional[float]) -> str:
+    if change_pct is None:
+        return "Unknown"
+    if change_pct >= TREND_THRESHOLD_PCT:
+        return "Rising"
+    if change_pct <= -TREND_THRESHOLD_PCT:
+        return "Falling"
+    return "Stable"
+
+
+class Analytics:
+    """Metrics for every daily series of one Rollups"""
+
+    def __init__(self, rollups: Rollups, metrics: Optional[Dict] = None):
+        self.rollups = rollups
+        day_series = rollups.series["day"]
+        if metrics is None:
+            metrics = compute_metrics(list(day_series), day_series)
+        self.metrics = metrics
+
+    def updated(self, rollups: Rollups) -> "Analytics":
+        """Recompute only the series whose daily bars were rebuilt"""
+        old, new = self.rollups.series["day"], rollups.series["day"]
+        changed = [key for key, series in new.items() if old.get(key) is not series]
+        metrics = {key: value for key, value in self.metrics.items() if key in new}
+        metrics.update(compute_metrics(changed, new))
+        return Analytics(rollups, metrics)
+
+    def for_crop(self, crop: str, market: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Metrics for crop in market (falling back to all markets), or None"""
+        key = (market and self.rollups.find_series(crop, market)) or self.rollups.find_series(crop)
+        if key is None:
+            return None
+        return {
+            "commodity": self.rollups.store.commodities[key[0]],
+            "market": self.rollups.market_name(key),
+            **self.metrics[key],
+        }
+
+
+_ANALYTICS: Optional[Analytics] = None
+_ANALYTICS_LOCK = threading.Lock()
+
+
+def get_analytics() -> Analytics:
+    """Analytics for the current rollups, updated incrementally when they change"""
+    global _ANALYTICS
+    rollups = get_rollups()
+    analytics = _ANALYTICS
+    if analytics is None or analytics.rollups is not rollups:
+        with _ANALYTICS_LOCK:
+            if _ANALYTICS is None:
+                _ANALYTICS = Analytics(rollups)
+            elif _ANALYTICS.rollups is not rollups:
+                _ANALYTICS = _ANALYTICS.updated(rollups)
+            analytics = _ANALYTICS
+    return analytics
+
+
+def get_price_analytics(crop: str, market: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Analytics for crop (in market when it has its own series), or None without data"""
+    return get_analytics().for_crop(crop, market)
@@ -0,0 +1,89 @@
+"""
+Batch Runner
+Runs many (district, market, crop) lookups in one request: identical sub-requests
+(the same price query, the same weather cell) run once per batch, all sub-requests
+share one global concurrency limit, and results are yielded as items complete
+"""
+import asyncio
+import os
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "100"))
+# Upstream sub-requests in flight across all batches at once
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+_SEMAPHORE: Optional[asyncio.Semaphore] = None
+
+
+async def _limited(work: Callable[[], Awaitable[Any]]) -> Any:
+    global _SEMAPHORE
+    if _SEMAPHORE is None:
+        _SEMAPHORE = asyncio.Semaphore(BATCH_CONCURRENCY)
+    async with _SEMAPHORE:
+        return await work()
+
+
+class BatchRun:
+    """Sub-request registry for one batch; each key runs at most once"""
+
+    def __init__(self):
+        self._tasks: Dict[Any, asyncio.Task] = {}
+        self.deduplicated = 0
+
+    def shared(self, key: Any, work: Callable[[], Awaitable[Any]]) -> Awaitable[Any]:
+        """
+        Awaitable result of work() for key, started on first use. Shielded so
+        one item giving up (e.g. a stage deadline) doesn't cancel it for the rest.
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(_limited(work))
+        else:
+            self.deduplicated += 1
+        return asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        return {"subrequests": len(self._tasks), "deduplicated": self.deduplicated}
+
+    def cancel(self):
+        for task in self._tasks.values():
+            task.cancel()
+
+
+async def stream_batch(
+    items: List[Any],
+    handle: Callable[[BatchRun, Any], Awaitable[Dict]],
+) -> AsyncIterator[Dict]:
+    """
+    Yields {"index": i, **handle(run, items[i])} in completion order, or
+    {"index": i, "error": ...} for an item that failed, then a final
+    {"done": True, ...} summary.
+    """
+    run = BatchRun()
+
+    async def one(i: int, item: Any) -> Dict:
+        try:
+            return {"index": i, **(await handle(run, item))}
+        except Exception as e:
+            print(f"Batch item {i} failed: {e}")
+            return {"index": i, "error": str(e)}
+
+    tasks = [asyncio.ensure_future(one(i, item)) for i, item in enumerate(items)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+        yield {"done": True, "items": len(items), **run.stats()}
+    finally:
+        # Client disconnected or the batch finished: stop any leftover work
+        for task in tasks:
+            task.cancel()
+        run.cancel()
+
+
+async def run_batch(items: List[Any], handle: Callable[[BatchRun, Any], Awaitable[Dict]]) -> List[Dict]:
+    """All results of stream_batch in input order (for callers that can't stream)"""
+    results: List[Dict] = [None] * len(items)
+    async for result in stream_batch(items, handle):
+        if "index" in result:
+            results[result["index"]] = result
+    return results
@@ -0,0 +1,193 @@
+"""
+Cache Primitives
+Shared caching building blocks; every cache registers itself for /metrics/cache
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# name -> cache object exposing stats()
+CACHES: Dict[str, Any] = {}
+
+
+def cache_stats() -> Dict[str, Dict]:
+    """Stats of every registered cache"""
+    return {name: cache.stats() for name, cache in CACHES.items()}
+
+
+class StaleWhileRevalidate:
+    """
+    Single value refreshed in the background once it is older than ttl.
+
+    Callers always get the last good value immediately; only the very first
+    load is awaited. At most one refresh runs at a time, and a failed refresh
+    keeps serving the previous value.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Awaitable[Any]], ttl: float):
+        self.name = name
+        self.loader = loader
+        self.ttl = ttl
+        self._value: Any = None
+        self._loaded_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._refreshes = 0
+        self._errors = 0
+        self._last_duration: Optional[float] = None
+        self._last_error: Optional[str] = None
+        CACHES[name] = self
+
+    def age(self) -> Optional[float]:
+        """Seconds since the value was loaded (monotonic), None before the first load"""
+        return None if self._loaded_at is None else time.monotonic() - self._loaded_at
+
+    def is_stale(self) -> bool:
+        age = self.age()
+        return age is None or age >= self.ttl
+
+    async def get(self) -> Any:
+        if self._loaded_at is None:
+            await self.refresh()
+        elif self.is_stale():
+            self.refresh_in_background()
+        return self._value
+
+    def refresh_in_background(self):
+        """Start a refresh task unless one is already running"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.refresh())
+
+    async def refresh(self) -> Any:
+        """Run the loader; concurrent callers wait for the refresh already in progress"""
+        if self._lock.locked():
+            async with self._lock:
+                return self._value
+
+        async with self._lock:
+            start = time.monotonic()
+            try:
+                value = await self.loader()
+                self._value = value
+                self._loaded_at = time.monotonic()
+                self._last_error = None
+            except Exception as e:
+                self._errors += 1
+                self._last_error = str(e)
+                print(f"Cache '{self.name}' refresh failed, serving last good value: {e}")
+            finally:
+                self._refreshes += 1
+                self._last_duration = time.monotonic() - start
+            return self._value
+
+    def stats(self) -> Dict:
+        age = self.age()
+        return {
+            "type": "stale-while-revalidate",
+            "ttl_seconds": self.ttl,
+            "age_seconds": None if age is None else round(age, 1),
+            "stale": self.is_stale(),
+            "refreshing": self._task is not None and not self._task.done(),
+            "refreshes": self._refreshes,
+            "errors": self._errors,
+            "last_refresh_seconds": None if self._last_duration is None else round(self._last_duration, 3),
+            "last_error": self._last_error,
+        }
+
+
+class TTLCache:
+    """
+    Bounded LRU mapping whose entries expire after ttl seconds.
+
+    get_or_load coalesces concurrent misses: the first caller for a key runs
+    the loader and everyone else awaits the same in-flight future. Loader
+    errors propagate to all waiters and are not cached.
+    """
+
+    def __init__(self, name: str, ttl: float, max_size: int = 1024):
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Any, asyncio.Future] = {}
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+        CACHES[name] = self
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Fresh cached value for key, or default"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        stored_at, value = entry
+        if time.monotonic() - stored_at >= self.ttl:
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Any, value: Any):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def __contains__(self, key: Any) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_or_load(self, key: Any, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            self._hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._coalesced += 1
+        else:
+            self._misses += 1
+            # The load runs as its own task so a caller hitting its deadline
+            # neither cancels it for the others nor loses the result for the cache
+            task = asyncio.ensure_future(self._load(key, loader))
+            task.add_done_callback(_consume_exception)
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Any, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+            self.set(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> Dict:
+        lookups = self._hits + self._misses + self._coalesced
+        return {
+            "type": "ttl-lru",
+            "ttl_seconds": self.ttl,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "in_flight": len(self._inflight),
+            "hits": self._hits,
+            "misses": self._misses,
+            "coalesced": self._coalesced,
+            "evictions": self._evictions,
+            "hit_rate": round((self._hits + self._coalesced) / lookups, 3) if lookups else None,
+        }
+
+
+_MISSING = object()
+
+
+def _consume_exception(task: asyncio.Task):
+    """Mark a background load's error as retrieved when every caller gave up on it"""
+    if not task.cancelled():
+        task.exception()
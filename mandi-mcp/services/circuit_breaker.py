@@ -0,0 +1,123 @@
+"""
+Circuit Breaker
+Per-upstream rolling error rate and latency. An unhealthy upstream is skipped
+outright (callers use their local fallbacks) and timeouts follow observed latency
+"""
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+BREAKER_WINDOW = 50            # most recent calls considered
+BREAKER_MIN_CALLS = 10         # don't judge an upstream on fewer calls
+BREAKER_ERROR_RATE = 0.5       # open at this error rate over the window
+BREAKER_OPEN_SECONDS = 30.0    # wait before letting a probe through
+TIMEOUT_PERCENTILE = 99        # adaptive timeout = multiplier x this latency percentile
+TIMEOUT_MULTIPLIER = 2.0
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    closed: calls flow; opens when the window's error rate reaches BREAKER_ERROR_RATE.
+    open: calls fail fast with CircuitOpenError for BREAKER_OPEN_SECONDS.
+    half_open: one probe call at a time; success closes, failure re-opens.
+    """
+
+    def __init__(self, name: str, min_timeout: float, max_timeout: float):
+        self.name = name
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.state = CLOSED
+        self._outcomes: deque = deque(maxlen=BREAKER_WINDOW)   # True = success
+        self._latencies: deque = deque(maxlen=BREAKER_WINDOW)  # seconds, successful calls
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self.rejected = 0
+        self.opened = 0
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now (claims the probe slot when half-open)"""
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < BREAKER_OPEN_SECONDS:
+                self.rejected += 1
+                return False
+            self.state = HALF_OPEN
+            self._probing = False
+        if self.state == HALF_OPEN:
+            if self._probing:
+                self.rejected += 1
+                return False
+            self._probing = True
+        return True
+
+    def record(self, ok: bool, latency: float):
+        if ok:
+            self._latencies.append(latency)
+        if self.state == HALF_OPEN:
+            self._probing = False
+            if ok:
+                print(f"Circuit '{self.name}' closed after successful probe")
+                self.state = CLOSED
+                self._outcomes.clear()
+            else:
+                self._open()
+            return
+
+        self._outcomes.append(ok)
+        if self.state == CLOSED and len(self._outcomes) >= BREAKER_MIN_CALLS and self.error_rate() >= BREAKER_ERROR_RATE:
+            self._open()
+
+    def release(self, latency: Optional[float] = None):
+        """
+        The allowed call never finished (cancelled): free the probe slot without
+        judging, keeping how long it had run as a latency sample
+        """
+        self._probing = False
+        if latency is not None:
+            self._latencies.append(latency)
+
+    def _open(self):
+        print(f"Circuit '{self.name}' opened (error rate {self.error_rate():.0%})")
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self.opened += 1
+
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return 1 - sum(self._outcomes) / len(self._outcomes)
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        if len(self._latencies) < BREAKER_MIN_CALLS:
+            return None
+        return float(np.percentile(np.fromiter(self._latencies, dtype=np.float64), q))
+
+    def timeout(self) -> float:
+        """Read timeout from observed latency, within [min_timeout, max_timeout]"""
+        p = self.latency_percentile(TIMEOUT_PERCENTILE)
+        if p is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, p * TIMEOUT_MULTIPLIER))
+
+    def stats(self) -> Dict[str, Any]:
+        p50 = self.latency_percentile(50)
+        p99 = self.latency_percentile(TIMEOUT_PERCENTILE)
+        return {
+            "state": self.state,
+            "calls_in_window": len(self._outcomes),
+            "error_rate": round(self.error_rate(), 3),
+            "p50_ms": None if p50 is None else round(p50 * 1000),
+            "p99_ms": None if p99 is None else round(p99 * 1000),
+            "timeout_s": round(self.timeout(), 2),
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "open_for_s": round(max(0.0, BREAKER_OPEN_SECONDS - (time.monotonic() - self._opened_at)), 1)
+            if self.state == OPEN else 0,
+        }
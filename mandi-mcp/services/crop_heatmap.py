@@ -0,0 +1,143 @@
+"""
+Crop Suitability Heatmap
+Suitability class of every crop in every district of districts_database.json for
+every week of the year, scored in a few large inference calls by a background
+job and kept as compact uint8 arrays that the map endpoint slices
+"""
+import datetime
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.ai_pool import run_blocking
+from services.cache import StaleWhileRevalidate
+from services.crop_model import CROP_MODEL_DIR, CropModel, get_crop_model, crop_model_error
+from services.feature_store import get_feature_store
+from services.location_service import DISTRICTS_DB_PATH
+
+HEATMAP_TTL = float(os.getenv("HEATMAP_TTL", str(6 * 3600)))               # rebuild after this many seconds
+HEATMAP_BATCH_ROWS = int(os.getenv("HEATMAP_BATCH_ROWS", "131072"))         # rows per inference call
+HEATMAP_WEEKS = 52
+DEFAULT_SOIL = "black"
+
+
+class Heatmap:
+    """
+    suitability[d, w, c]: class index (into classes) of crop c in district d in week w+1.
+    score[d, w, c]: expected suitability score 0-100.
+    """
+
+    def __init__(self, districts: List[Tuple[str, str]], crops: List[str], classes: List[str],
+                 suitability: np.ndarray, score: np.ndarray):
+        self.districts = districts
+        self.crops = crops
+        self.classes = classes
+        self.suitability = suitability
+        self.score = score
+        self.built_at = datetime.datetime.now().isoformat()
+        self._district_index = {name.lower(): i for i, (_, name) in enumerate(districts)}
+        self._crop_index = {name.lower(): i for i, name in enumerate(crops)}
+
+    def states(self) -> List[str]:
+        return list(dict.fromkeys(state for state, _ in self.districts))
+
+    def slice(self, state: str, week: int, district: Optional[str] = None, crop: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """One week of a state's map, optionally narrowed to a district and/or crop; None if unknown"""
+        if district:
+            d = self._district_index.get(district.strip().lower())
+            if d is None:
+                return None
+            rows = [d]
+        else:
+            rows = [i for i, (s, _) in enumerate(self.districts) if s.lower() == state.strip().lower()]
+            if not rows:
+                return None
+        if crop:
+            c = self._crop_index.get(crop.strip().lower())
+            if c is None:
+                return None
+            cols = [c]
+        else:
+            cols = list(range(len(self.crops)))
+
+        w = min(max(week, 1), HEATMAP_WEEKS) - 1
+        index = np.ix_(rows, [w], cols)
+        return {
+            "state": self.districts[rows[0]][0],
+            "week": w + 1,
+            "classes": self.classes,
+            "districts": [self.districts[i][1] for i in rows],
+            "crops": [self.crops[i] for i in cols],
+            "suitability": self.suitability[index][:, 0, :].tolist(),
+            "score": self.score[index][:, 0, :].tolist(),
+            "built_at": self.built_at,
+        }
+
+
+def _load_districts() -> List[Tuple[str, str]]:
+    """(state, district) for every district in the districts database"""
+    with open(DISTRICTS_DB_PATH, "r", encoding="utf-8") as f:
+        return [(state, name) for state, districts in json.load(f).items() for name in districts]
+
+
+def _soils_by_state() -> Dict[str, str]:
+    """First soil type of soil_types.json listing each state as a region"""
+    with open(CROP_MODEL_DIR / "soil_types.json", "r", encoding="utf-8") as f:
+        soils = json.load(f)
+    by_state: Dict[str, str] = {}
+    for soil, info in soils.items():
+        for state in info.get("regions", []):
+            by_state.setdefault(state.lower(), soil)
+    return by_state
+
+
+def week_days(year: int) -> List[datetime.date]:
+    """Thursday of ISO weeks 1..HEATMAP_WEEKS of a year"""
+    return [datetime.date.fromisocalendar(year, week, 4) for week in range(1, HEATMAP_WEEKS + 1)]
+
+
+async def build_heatmap(model: CropModel) -> Heatmap:
+    """Score the whole district x week x crop grid in HEATMAP_BATCH_ROWS-row inference calls"""
+    districts = _load_districts()
+    soils = _soils_by_state()
+    names = [name for _, name in districts]
+    features = get_feature_store()
+    days = week_days(datetime.date.today().year)
+
+    market = features.lookup_grid(names, model.feature_store_codes(features), list(range(1, HEATMAP_WEEKS + 1)))
+    X = model.feature_grid(
+        [model.district_code(name)[1] for name in names],
+        [soils.get(state.lower(), DEFAULT_SOIL) for state, _ in districts],
+        days,
+        market=market,
+    )
+    grid_shape = X.shape[:3]
+    rows = model.standardize(X.reshape(-1, X.shape[-1]))
+
+    chunks = []
+    for start in range(0, len(rows), HEATMAP_BATCH_ROWS):
+        chunks.append(await run_blocking("crop_model", model.predict_proba, rows[start:start + HEATMAP_BATCH_ROWS]))
+    proba = np.concatenate(chunks)
+
+    suitability = proba.argmax(axis=1).astype(np.uint8).reshape(grid_shape)
+    score = np.rint(proba @ model.class_scores).astype(np.uint8).reshape(grid_shape)
+    print(f"Built crop heatmap: {len(districts)} districts x {HEATMAP_WEEKS} weeks x "
+          f"{len(model.crop_names)} crops in {len(chunks)} inference calls")
+    return Heatmap(districts, list(model.crop_names), list(model.classes), suitability, score)
+
+
+async def _load_heatmap() -> Heatmap:
+    model = get_crop_model()
+    if model is None:
+        raise RuntimeError(crop_model_error() or "Crop model not loaded")
+    return await build_heatmap(model)
+
+
+# Rebuilt in the background once HEATMAP_TTL old; requests never wait on a rebuild after the first
+HEATMAP_CACHE = StaleWhileRevalidate("crop_heatmap", _load_heatmap, ttl=HEATMAP_TTL)
+
+
+async def get_heatmap() -> Optional[Heatmap]:
+    return await HEATMAP_CACHE.get()
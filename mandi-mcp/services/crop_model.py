@@ -0,0 +1,376 @@
+"""
+Crop Suitability Model
+The exported XGBClassifier (as NumPy tree arrays once export_crop_model.py has
+run) and its preprocessors, loaded once at startup. Every
+candidate crop of a location is scored in one predict_proba call, and requests
+arriving within PREDICT_BATCH_WINDOW share a single inference call
+"""
+import asyncio
+import datetime
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from services.ai_pool import run_blocking
+from services.feature_store import FEATURES as MARKET_FEATURES, FeatureStore, get_feature_store
+from services.geo_index import haversine_km
+from services.location_service import get_district_coords
+from services.tree_model import TreeEnsemble
+
+CROP_MODEL_DIR = Path(os.getenv("CROP_MODEL_DIR", Path(__file__).parent.parent.parent / "export"))
+MODEL_FILE = "crop_prediction_model.pkl"
+ARRAY_MODEL_FILE = "crop_model.npz"      # written by export_crop_model.py; served without xgboost
+
+PREDICT_BATCH_WINDOW = float(os.getenv("PREDICT_BATCH_WINDOW", "0.005"))     # seconds to wait for company
+PREDICT_BATCH_MAX_ROWS = int(os.getenv("PREDICT_BATCH_MAX_ROWS", "8192"))    # rows per inference call
+
+# soil_suitability feature (0-100) when the crop does / doesn't grow in the soil type
+SOIL_MATCH_SCORE = 85.0
+SOIL_MISMATCH_SCORE = 40.0
+
+# Score band midpoints of each suitability class, for ranking by expected score
+CLASS_SCORES = {"Very High": 90.0, "High": 70.0, "Medium": 50.0, "Low": 20.0}
+
+
+def season_for_month(month: int) -> str:
+    """Kharif June-October, rabi November-March, zaid April-May"""
+    if 6 <= month <= 10:
+        return "kharif"
+    if month >= 11 or month <= 3:
+        return "rabi"
+    return "zaid"
+
+
+def _season_matches(crop_season: str, season: str) -> bool:
+    return crop_season in (season, "all") or (crop_season == "summer" and season == "zaid")
+
+
+class CropModel:
+    """
+    Model (anything with predict_proba), label encoder classes and scaler
+    parameters, plus the candidate crops as arrays
+    """
+
+    def __init__(self, model: Any, encoder_classes: Dict[str, List[str]], mean: np.ndarray, scale: np.ndarray,
+                 feature_columns: List[str], crops: Dict[str, Dict], soils: Dict[str, Dict], source: str = ""):
+        self.model = model
+        self.encoder_classes = encoder_classes
+        self.source = source
+        self.feature_columns = list(feature_columns)
+        self.column = {name: i for i, name in enumerate(self.feature_columns)}
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.classes = [str(c) for c in encoder_classes["target"]]
+        self.class_scores = np.asarray([CLASS_SCORES.get(c, 50.0) for c in self.classes])
+        self.soils = soils
+
+        # Only crops the model saw as a commodity can be scored
+        commodity_codes = self._codes("Commodity")
+        self.crops = {name: info for name, info in crops.items() if name in commodity_codes}
+        self.crop_names = list(self.crops)
+        self.crop_codes = np.asarray([commodity_codes[name] for name in self.crop_names], dtype=np.float64)
+        self.crop_soils: List[Set[str]] = [set(self.crops[name].get("soil_types", [])) for name in self.crop_names]
+
+        self.district_codes = self._codes("District")
+        self.season_codes = self._codes("Season")
+        self.soil_codes = self._codes("soil_type")
+        coords = {name: get_district_coords(name) for name in self.district_codes}
+        self.district_coords = {name: latlon for name, latlon in coords.items() if latlon}
+        self._market_codes: Tuple[Optional[FeatureStore], np.ndarray] = (None, np.empty(0, dtype=np.int64))
+
+    def _codes(self, encoder: str) -> Dict[str, int]:
+        return {str(name): code for code, name in enumerate(self.encoder_classes[encoder])}
+
+    def district_code(self, district: str) -> Tuple[str, int]:
+        """
+        Encoded district, or the nearest district the model was trained on
+        (the first one when the district's position is unknown)
+        """
+        for name, code in self.district_codes.items():
+            if name.lower() == district.strip().lower():
+                return name, code
+        latlon = get_district_coords(district)
+        if latlon and self.district_coords:
+            name = min(self.district_coords, key=lambda n: haversine_km(*latlon, *self.district_coords[n]))
+            return name, self.district_codes[name]
+        name = next(iter(self.district_codes))
+        return name, self.district_codes[name]
+
+    def feature_store_codes(self, features: FeatureStore) -> np.ndarray:
+        """Feature store commodity code of every candidate crop (-1 when it has no data)"""
+        store, codes = self._market_codes
+        if store is not features:
+            codes = features.commodity_codes(self.crop_names)
+            self._market_codes = (features, codes)
+        return codes
+
+    def market_features(self, features: FeatureStore, district: str, week: int) -> np.ndarray:
+        """Feature store rows for every candidate crop in a district and week (NaN where unknown)"""
+        return features.lookup(district, self.feature_store_codes(features), week)
+
+    def feature_grid(self, district_codes: Sequence[int], soil_types: Sequence[str], days: Sequence[datetime.date],
+                     weather: Optional[Dict[str, Optional[float]]] = None, market: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Raw features shaped (district, day, crop, feature): every candidate crop for
+        every district (each with its soil type) on every day. Weather the caller
+        doesn't know and market features missing from `market` (shaped like the
+        grid, last axis in MARKET_FEATURES order) fall back to their training averages.
+        """
+        shape = (len(district_codes), len(days), len(self.crop_names))
+        X = np.broadcast_to(self.mean, shape + self.mean.shape).copy()
+        col = self.column
+        soils = [soil.lower() for soil in soil_types]
+        per_district = lambda values: np.asarray(values, dtype=np.float64)[:, None, None]
+        per_day = lambda values: np.asarray(values, dtype=np.float64)[None, :, None]
+
+        X[..., col["Month"]] = per_day([day.month for day in days])
+        X[..., col["WeekOfYear"]] = per_day([day.isocalendar()[1] for day in days])
+        for name in ("temperature", "humidity", "rainfall"):
+            if weather and weather.get(name) is not None:
+                X[..., col[name]] = weather[name]
+        soil_match = np.asarray([[soil in crop_soils for crop_soils in self.crop_soils] for soil in soils])
+        X[..., col["soil_suitability"]] = np.where(soil_match, SOIL_MATCH_SCORE, SOIL_MISMATCH_SCORE)[:, None, :]
+        X[..., col["State_encoded"]] = 0
+        X[..., col["District_encoded"]] = per_district(district_codes)
+        X[..., col["Commodity_encoded"]] = self.crop_codes
+        X[..., col["Season_encoded"]] = per_day([self.season_codes.get(season_for_month(day.month), 0) for day in days])
+        X[..., col["soil_type_encoded"]] = per_district([self.soil_codes.get(soil, 0) for soil in soils])
+        if market is not None:
+            for j, name in enumerate(MARKET_FEATURES):
+                known = np.isfinite(market[..., j])
+                column = X[..., col[name]]
+                column[known] = market[..., j][known]
+        return X
+
+    def feature_matrix(self, district_code: int, soil_type: str, day: datetime.date,
+                       weather: Dict[str, Optional[float]], market: Optional[np.ndarray] = None) -> np.ndarray:
+        """Raw features of one district and day, one row per candidate crop"""
+        grid_market = None if market is None else market[None, None]
+        return self.feature_grid([district_code], [soil_type], [day], weather, grid_market)[0, 0]
+
+    def standardize(self, X: np.ndarray) -> np.ndarray:
+        """StandardScaler.transform without going through sklearn"""
+        return (X - self.mean) / self.scale
+
+    def predict_proba(self, X_scaled: np.ndarray) -> np.ndarray:
+        return np.asarray(self.model.predict_proba(X_scaled), dtype=np.float64)
+
+    def rank(self, proba: np.ndarray, soil_type: str, season: str, top_k: int) -> List[Dict[str, Any]]:
+        """Top crops by expected suitability score, in the frontend's CropPrediction shape"""
+        scores = proba @ self.class_scores
+        best = proba.argmax(axis=1)
+        soil = soil_type.lower()
+        soil_name = self.soils.get(soil, {}).get("name", soil_type)
+
+        predictions = []
+        for i in np.argsort(-scores, kind="stable")[:top_k].tolist():
+            name = self.crop_names[i]
+            info = self.crops[name]
+            reasons = []
+            if soil in self.crop_soils[i]:
+                reasons.append(f"Suitable for {soil_name} soil")
+            if _season_matches(info.get("season", ""), season):
+                reasons.append(f"Ideal for {season} season planting")
+            reasons.append(f"Optimal temperature: {info.get('temp_min')}-{info.get('temp_max')}°C")
+            reasons.append(f"Category: {info.get('category', '').replace('_', ' ')}")
+            predictions.append({
+                "crop": name,
+                "suitability_class": self.classes[best[i]],
+                "confidence": round(float(proba[i, best[i]]), 2),
+                "score": round(float(scores[i]), 1),
+                "season": info.get("season"),
+                "category": info.get("category"),
+                "hindi_name": info.get("hindi_name"),
+                "reasons": reasons,
+            })
+        return predictions
+
+
+# =============================================================================
+# LOADING - once at startup; the endpoint reports why when it isn't available
+# =============================================================================
+_CROP_MODEL: Optional[CropModel] = None
+_CROP_MODEL_ERROR: Optional[str] = "Crop model not loaded yet"
+_CROP_MODEL_LOCK = threading.Lock()
+
+
+def _read_json(name: str) -> Dict:
+    with open(CROP_MODEL_DIR / name, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_pickled_artifacts(model_dir: Path = CROP_MODEL_DIR) -> Dict[str, Any]:
+    """
+    The pickled model and preprocessors as plain values. Unpickling needs
+    joblib, scikit-learn and xgboost.
+    """
+    import joblib
+    encoders = joblib.load(model_dir / "label_encoders.pkl")
+    scaler = joblib.load(model_dir / "feature_scaler.pkl")
+    return {
+        "model": joblib.load(model_dir / MODEL_FILE),
+        "encoder_classes": {name: [str(c) for c in encoder.classes_] for name, encoder in encoders.items()},
+        "mean": np.asarray(scaler.mean_, dtype=np.float64),
+        "scale": np.asarray(scaler.scale_, dtype=np.float64),
+        "feature_columns": [str(c) for c in joblib.load(model_dir / "feature_columns.pkl")],
+    }
+
+
+def _read_array_artifacts() -> Dict[str, Any]:
+    """The tree arrays written by export_crop_model.py, which carry the preprocessors in their metadata"""
+    model = TreeEnsemble.load(CROP_MODEL_DIR / ARRAY_MODEL_FILE)
+    meta = model.meta
+    return {
+        "model": model,
+        "encoder_classes": meta["encoder_classes"],
+        "mean": np.asarray(meta["mean"], dtype=np.float64),
+        "scale": np.asarray(meta["scale"], dtype=np.float64),
+        "feature_columns": meta["feature_columns"],
+    }
+
+
+def load_crop_model() -> Optional[CropModel]:
+    """
+    Load the model from CROP_MODEL_DIR, preferring the NumPy tree arrays over the
+    pickle; None (with the reason kept) if neither can be loaded
+    """
+    global _CROP_MODEL, _CROP_MODEL_ERROR
+    with _CROP_MODEL_LOCK:
+        if _CROP_MODEL is not None:
+            return _CROP_MODEL
+        if (CROP_MODEL_DIR / ARRAY_MODEL_FILE).exists():
+            source, read = ARRAY_MODEL_FILE, _read_array_artifacts
+        elif (CROP_MODEL_DIR / MODEL_FILE).exists():
+            source, read = MODEL_FILE, read_pickled_artifacts
+        else:
+            _CROP_MODEL_ERROR = f"Neither {ARRAY_MODEL_FILE} nor {MODEL_FILE} found in {CROP_MODEL_DIR}"
+            print(f"Crop model unavailable: {_CROP_MODEL_ERROR}")
+            return None
+        try:
+            _CROP_MODEL = CropModel(
+                **read(),
+                crops=_read_json("crops_database.json"),
+                soils=_read_json("soil_types.json"),
+                source=source,
+            )
+        except Exception as e:
+            _CROP_MODEL_ERROR = f"Could not load crop model from {source}: {e}"
+            print(_CROP_MODEL_ERROR)
+            return None
+        _CROP_MODEL_ERROR = None
+        print(f"Loaded crop model from {source} with {len(_CROP_MODEL.crop_names)} candidate crops")
+        return _CROP_MODEL
+
+
+def get_crop_model() -> Optional[CropModel]:
+    return _CROP_MODEL
+
+
+def crop_model_error() -> Optional[str]:
+    return _CROP_MODEL_ERROR
+
+
+# =============================================================================
+# MICRO-BATCHING - concurrent requests' matrices go through one predict_proba
+# =============================================================================
+_PENDING_ROWS: List[Tuple[np.ndarray, asyncio.Future]] = []
+_FLUSH_TASKS: Set[asyncio.Task] = set()
+_BATCH_STATS = {"calls": 0, "requests": 0, "rows": 0}
+
+
+async def _flush_predictions(model: CropModel, delay: float = 0.0):
+    """Score pending matrices, up to PREDICT_BATCH_MAX_ROWS rows per call"""
+    if delay:
+        await asyncio.sleep(delay)
+
+    while _PENDING_ROWS:
+        batch, rows = [], 0
+        while _PENDING_ROWS and (not batch or rows + len(_PENDING_ROWS[0][0]) <= PREDICT_BATCH_MAX_ROWS):
+            X, future = _PENDING_ROWS.pop(0)
+            batch.append((X, future))
+            rows += len(X)
+
+        try:
+            proba = await run_blocking("crop_model", model.predict_proba, np.concatenate([X for X, _ in batch]))
+        except Exception as e:
+            print(f"Crop model inference failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            continue
+
+        _BATCH_STATS["calls"] += 1
+        _BATCH_STATS["requests"] += len(batch)
+        _BATCH_STATS["rows"] += rows
+        offset = 0
+        for X, future in batch:
+            if not future.done():
+                future.set_result(proba[offset:offset + len(X)])
+            offset += len(X)
+
+
+def _schedule_flush(model: CropModel, delay: float):
+    task = asyncio.create_task(_flush_predictions(model, delay))
+    _FLUSH_TASKS.add(task)
+    task.add_done_callback(_FLUSH_TASKS.discard)
+
+
+async def predict_batched(model: CropModel, X_scaled: np.ndarray) -> np.ndarray:
+    """Class probabilities for X_scaled, computed together with other requests in the window"""
+    future = asyncio.get_running_loop().create_future()
+    first = not _PENDING_ROWS
+    _PENDING_ROWS.append((X_scaled, future))
+    if sum(len(X) for X, _ in _PENDING_ROWS) >= PREDICT_BATCH_MAX_ROWS:
+        _schedule_flush(model, 0.0)
+    elif first:
+        _schedule_flush(model, PREDICT_BATCH_WINDOW)
+    return await asyncio.shield(future)
+
+
+async def predict_crops(
+    district: str,
+    soil_type: str = "black",
+    day: Optional[datetime.date] = None,
+    weather: Optional[Dict[str, Optional[float]]] = None,
+    top_k: int = 6,
+) -> Optional[Dict[str, Any]]:
+    """Ranked crop suitability for a location, or None when the model isn't available"""
+    model = get_crop_model()
+    if model is None:
+        return None
+    day = day or datetime.date.today()
+    weather = weather or {}
+    model_district, code = model.district_code(district)
+    market = model.market_features(get_feature_store(), district, day.isocalendar()[1])
+
+    X = model.feature_matrix(code, soil_type, day, weather, market)
+    proba = await predict_batched(model, model.standardize(X))
+    season = season_for_month(day.month)
+
+    col = model.column
+    return {
+        "predictions": model.rank(proba, soil_type, season, top_k),
+        "season": season,
+        "model_district": model_district,
+        "weather": {name: round(float(X[0, col[name]]), 1) for name in ("temperature", "humidity", "rainfall")},
+    }
+
+
+def crop_model_stats() -> Dict[str, Any]:
+    model = get_crop_model()
+    calls = _BATCH_STATS["calls"]
+    return {
+        "available": model is not None,
+        "source": model.source if model else None,
+        "error": crop_model_error(),
+        "candidate_crops": len(model.crop_names) if model else 0,
+        "pending_requests": len(_PENDING_ROWS),
+        "inference_calls": calls,
+        "requests": _BATCH_STATS["requests"],
+        "requests_per_call": round(_BATCH_STATS["requests"] / calls, 1) if calls else None,
+        "rows_per_call": round(_BATCH_STATS["rows"] / calls, 1) if calls else None,
+    }
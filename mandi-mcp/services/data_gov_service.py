@@ -0,0 +1,72 @@
+"""
+data.gov.in Service
+Client for the Government of India Open Data Portal mandi price resource
+"""
+import os
+from typing import Dict, Tuple
+
+from dotenv import load_dotenv
+
+from services import http_client
+from services.cache import TTLCache
+
+load_dotenv()
+
+# data.gov.in API Configuration
+DATA_GOV_API_KEY = os.getenv("DATA_GOV_API_KEY")
+DATA_GOV_RESOURCE_ID = os.getenv("DATA_GOV_RESOURCE_ID", "9ef84268-d588-465a-a308-a864a43d0070") # Resource ID is public/safe
+DATA_GOV_BASE_URL = "https://api.data.gov.in/resource"
+
+# Identical queries in flight share one upstream call, and answers are reused
+# briefly, so upstream QPS is bounded by distinct queries rather than traffic
+DATA_GOV_CACHE = TTLCache("data_gov", ttl=float(os.getenv("DATA_GOV_CACHE_TTL", "120")), max_size=512)
+
+def query_key(filters: Dict, limit: int, offset: int) -> Tuple:
+    """Canonical key: filter order and value types don't matter"""
+    return (
+        tuple(sorted((str(k), str(v)) for k, v in (filters or {}).items())),
+        int(limit),
+        int(offset),
+    )
+
+async def fetch_from_data_gov(
+    filters: Dict = None,
+    limit: int = 100,
+    offset: int = 0,
+    cache: bool = True
+) -> Dict:
+    """
+    Fetch data from data.gov.in API (None on error).
+    With cache=False the upstream is always asked (used by the sync probe).
+    """
+    filters = dict(filters or {})
+    try:
+        if not cache:
+            return await _fetch(filters, limit, offset)
+        return await DATA_GOV_CACHE.get_or_load(
+            query_key(filters, limit, offset),
+            lambda: _fetch(filters, limit, offset),
+        )
+    except Exception as e:
+        print(f"data.gov.in API Error: {e}")
+        return None
+
+async def _fetch(filters: Dict, limit: int, offset: int) -> Dict:
+    """Uncached upstream call; raises on failure so errors are never cached"""
+    url = f"{DATA_GOV_BASE_URL}/{DATA_GOV_RESOURCE_ID}"
+    
+    params = {
+        "api-key": DATA_GOV_API_KEY,
+        "format": "json",
+        "limit": limit,
+        "offset": offset
+    }
+    
+    # Add filters
+    if filters:
+        for key, value in filters.items():
+            params[f"filters[{key}]"] = value
+    
+    response = await http_client.get("data_gov", url, params=params)
+    response.raise_for_status()
+    return response.json()
@@ -0,0 +1,215 @@
+"""
+data.gov.in Sync
+Pages through the mandi price resource with bounded parallel requests and merges
+only new or changed records into the price store, matching records against the
+rows it already holds
+"""
+import asyncio
+import datetime
+from typing import Dict, List, Optional, Tuple
+
+from services.data_gov_service import fetch_from_data_gov
+from services.price_store import PriceStore, days_to_date, get_price_store, set_price_store
+
+SYNC_PAGE_SIZE = 1000
+SYNC_CONCURRENCY = 4
+# Past this many days since the last seen arrival date, a full resync is cheaper
+# than one filtered query per missing date
+SYNC_DELTA_MAX_DAYS = 7
+# Markets report late, so a delta sync also re-reads this many days before the newest one
+SYNC_DELTA_OVERLAP_DAYS = 1
+
+SYNC_STATE = {
+    "updated_date": None,
+    "total": None,
+    "latest_arrival": None,
+    "last_check": None,
+    "last_sync": None,
+    "last_mode": None,
+    "records_fetched": 0,
+    "records_new": 0,
+    "records_changed": 0,
+    "failed_pages": 0,
+}
+
+_SYNC_LOCK = asyncio.Lock()
+
+
+def _parse_record(record: Dict) -> Optional[Tuple[Tuple, Dict]]:
+    """Record -> (identity key, price store row), or None if unusable"""
+    district = record.get("district", "").strip()
+    market = record.get("market", "").strip()
+    commodity = record.get("commodity", "").strip()
+    if not district or not market or not commodity:
+        return None
+
+    try:
+        date_str = record.get("arrival_date", "").replace("\\/", "/")
+        arrival = datetime.datetime.strptime(date_str, "%d/%m/%Y").date()
+        row = {
+            "state": record.get("state", "").strip(),
+            "district": district,
+            "market": market,
+            "commodity": commodity,
+            "variety": record.get("variety", "").strip(),
+            "date": arrival,
+            "min_price": float(record.get("min_price", 0) or 0),
+            "max_price": float(record.get("max_price", 0) or 0),
+            "modal_price": float(record.get("modal_price", 0) or 0),
+        }
+    except (ValueError, TypeError):
+        return None
+
+    return _row_key(row), row
+
+
+def _row_key(row: Dict) -> Tuple:
+    """Identity of a price report: the same market, commodity and variety on the same day"""
+    return row["district"], row["market"], row["commodity"], row["variety"], row["date"]
+
+
+async def _fetch_all(filters: Dict, semaphore: asyncio.Semaphore) -> Tuple[List[Dict], int]:
+    """
+    All records matching filters: first page for the total, then the rest in
+    parallel. Pages bypass the response cache; they are read once and merged.
+    """
+    async with semaphore:
+        first = await fetch_from_data_gov(filters=filters, limit=SYNC_PAGE_SIZE, offset=0, cache=False)
+    if not first or "records" not in first:
+        return [], 1
+
+    records = list(first["records"])
+    total = int(first.get("total", len(records)) or 0)
+
+    async def fetch_page(offset: int) -> Optional[Dict]:
+        async with semaphore:
+            return await fetch_from_data_gov(filters=filters, limit=SYNC_PAGE_SIZE, offset=offset, cache=False)
+
+    pages = await asyncio.gather(*(fetch_page(o) for o in range(SYNC_PAGE_SIZE, total, SYNC_PAGE_SIZE)))
+    failed = 0
+    for page in pages:
+        if page and "records" in page:
+            records.extend(page["records"])
+        else:
+            failed += 1
+    return records, failed
+
+
+def _store_keys(store: PriceStore, start: datetime.date, end: datetime.date) -> Dict[Tuple, Tuple[int, Tuple]]:
+    """Row key -> (row id, prices) of the store's rows between two dates; the first row of a key wins"""
+    rows = store.rows_between(start, end)
+    keys = zip(
+        (store.districts[c] for c in store.district_codes[rows].tolist()),
+        (store.markets[c] for c in store.market_codes[rows].tolist()),
+        (store.commodities[c] for c in store.commodity_codes[rows].tolist()),
+        (store.varieties[c] for c in store.variety_codes[rows].tolist()),
+        (days_to_date(d) for d in store.dates[rows].tolist()),
+    )
+    prices = zip(store.min_price[rows].tolist(), store.max_price[rows].tolist(), store.modal_price[rows].tolist())
+    index: Dict[Tuple, Tuple[int, Tuple]] = {}
+    for key, row_id, row_prices in zip(keys, rows.tolist(), prices):
+        index.setdefault(key, (row_id, row_prices))
+    return index
+
+
+def _merge(records: List[Dict]) -> Tuple[List[Dict], Dict[int, Dict], Optional[datetime.date]]:
+    """
+    Split fetched records into rows to append and row ids whose prices changed,
+    plus the newest arrival date among them. A record already in the store (from
+    the CSV or an earlier sync) updates that row instead of adding a second one.
+    """
+    parsed = [p for p in map(_parse_record, records) if p is not None]
+    if not parsed:
+        return [], {}, None
+
+    store = get_price_store()
+    dates = [row["date"] for _, row in parsed]
+    seen = _store_keys(store, min(dates), max(dates))
+    new_rows: List[Dict] = []
+    updates: Dict[int, Dict] = {}
+
+    for key, row in parsed:
+        prices = (row["min_price"], row["max_price"], row["modal_price"])
+        match = seen.get(key)
+        if match is None:
+            seen[key] = (len(store) + len(new_rows), prices)
+            new_rows.append(row)
+        elif match[1] != prices:
+            row_id = match[0]
+            seen[key] = (row_id, prices)
+            if row_id < len(store):
+                updates[row_id] = row
+            else:
+                new_rows[row_id - len(store)] = row
+
+    return new_rows, updates, max(dates)
+
+
+async def sync_data_gov(force_full: bool = False) -> Dict:
+    """
+    Bring the price store up to date with data.gov.in.
+
+    A one-record probe reads the resource's updated_date and total; if neither
+    moved since the last sync nothing else is downloaded. Otherwise only the
+    arrival dates since the newest one already seen are fetched (or the whole
+    resource on first run), paged with at most SYNC_CONCURRENCY requests in flight.
+    """
+    async with _SYNC_LOCK:
+        SYNC_STATE["last_check"] = datetime.datetime.now().isoformat()
+        probe = await fetch_from_data_gov(limit=1, cache=False)
+        if not probe or "records" not in probe:
+            print("data.gov.in sync: API unavailable, keeping local data")
+            return get_sync_status()
+
+        updated_date, total = probe.get("updated_date"), probe.get("total")
+        if (not force_full and SYNC_STATE["last_sync"]
+                and updated_date == SYNC_STATE["updated_date"] and total == SYNC_STATE["total"]):
+            return get_sync_status()
+
+        semaphore = asyncio.Semaphore(SYNC_CONCURRENCY)
+        latest = SYNC_STATE["latest_arrival"]
+        today = datetime.date.today()
+        if not force_full and latest and (today - latest).days <= SYNC_DELTA_MAX_DAYS:
+            mode = "delta"
+            start = latest - datetime.timedelta(days=SYNC_DELTA_OVERLAP_DAYS)
+            days = [start + datetime.timedelta(days=d) for d in range((today - start).days + 1)]
+            results = await asyncio.gather(
+                *(_fetch_all({"arrival_date": d.strftime("%d/%m/%Y")}, semaphore) for d in days)
+            )
+            records = [r for page_records, _ in results for r in page_records]
+            failed = sum(f for _, f in results)
+        else:
+            mode = "full"
+            records, failed = await _fetch_all({}, semaphore)
+
+        new_rows, updates, newest = _merge(records)
+        if new_rows or updates:
+            store = get_price_store()
+            set_price_store(await asyncio.to_thread(store.with_rows, new_rows, updates))
+
+        # The next delta sync starts from latest_arrival, so it only moves past dates
+        # whose pages all arrived; otherwise the failed pages would never be fetched again
+        if not failed and newest and (latest is None or newest > latest):
+            SYNC_STATE["latest_arrival"] = newest
+
+        SYNC_STATE.update({
+            # Forget the version when pages failed so the next sync retries them
+            "updated_date": updated_date if not failed else None,
+            "total": total,
+            "last_sync": datetime.datetime.now().isoformat(),
+            "last_mode": mode,
+            "records_fetched": len(records),
+            "records_new": len(new_rows),
+            "records_changed": len(updates),
+            "failed_pages": failed,
+        })
+        print(f"data.gov.in sync ({mode}): {len(records)} fetched, {len(new_rows)} new, {len(updates)} changed")
+        return get_sync_status()
+
+
+def get_sync_status() -> Dict:
+    """Last sync state, JSON-safe"""
+    status = dict(SYNC_STATE)
+    if status["latest_arrival"]:
+        status["latest_arrival"] = status["latest_arrival"].isoformat()
+    return status
@@ -0,0 +1,82 @@
+"""
+Downsampling
+Shape-preserving point selection for long price series, vectorized with NumPy:
+the response keeps a fixed number of real points however long the window is
+"""
+from typing import Dict, List
+
+import numpy as np
+
+METHODS = ("lttb", "minmax")
+
+
+def _bucket_ids(n: int, buckets: int) -> np.ndarray:
+    """Bucket of each of n points when split into equal-width consecutive buckets"""
+    return (np.arange(n) * buckets // n).astype(np.int64)
+
+
+def _first_per_bucket(bucket: np.ndarray, order_key: np.ndarray) -> np.ndarray:
+    """Index of the point with the smallest order_key in each bucket"""
+    order = np.lexsort((np.arange(len(bucket)), order_key, bucket))
+    sorted_buckets = bucket[order]
+    first = np.concatenate(([True], sorted_buckets[1:] != sorted_buckets[:-1]))
+    return order[first]
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, target: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets. First and last points are always kept; every
+    bucket in between keeps the point forming the largest triangle with the mean
+    of the previous and of the next bucket. (Classic LTTB anchors on the point
+    chosen in the previous bucket, which is sequential; the previous bucket's mean
+    makes the whole selection a handful of array operations.)
+    """
+    n = len(y)
+    if target >= n or target < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    inner = target - 2
+    bucket = _bucket_ids(n - 2, inner)
+    bx, by = x[1:-1], y[1:-1]
+
+    counts = np.bincount(bucket, minlength=inner)
+    mean_x = np.bincount(bucket, weights=bx, minlength=inner) / counts
+    mean_y = np.bincount(bucket, weights=by, minlength=inner) / counts
+    # Anchors: previous bucket mean (first point for bucket 0), next bucket mean (last point at the end)
+    prev_x = np.concatenate(([x[0]], mean_x[:-1]))[bucket]
+    prev_y = np.concatenate(([y[0]], mean_y[:-1]))[bucket]
+    next_x = np.concatenate((mean_x[1:], [x[-1]]))[bucket]
+    next_y = np.concatenate((mean_y[1:], [y[-1]]))[bucket]
+
+    area = np.abs((prev_x - next_x) * (by - prev_y) - (prev_x - bx) * (next_y - prev_y))
+    chosen = _first_per_bucket(bucket, -area) + 1
+    return np.concatenate(([0], np.sort(chosen), [n - 1]))
+
+
+def minmax_indices(y: np.ndarray, target: int) -> np.ndarray:
+    """Lowest and highest point of each of target/2 buckets, in original order"""
+    n = len(y)
+    if target >= n or target < 2:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+    bucket = _bucket_ids(n, target // 2)
+    lows = _first_per_bucket(bucket, y)
+    highs = _first_per_bucket(bucket, -y)
+    return np.unique(np.concatenate((lows, highs)))
+
+
+def downsample_points(points: List[Dict], target: int, method: str = "lttb") -> List[Dict]:
+    """Subset of /history points (sorted by date) keeping the shape of the close series"""
+    if target <= 0 or len(points) <= target:
+        return points
+
+    y = np.fromiter((p["close"] for p in points), dtype=np.float64, count=len(points))
+    if method == "minmax":
+        keep = minmax_indices(y, target)
+    else:
+        x = np.asarray([p["date"] for p in points], dtype="datetime64[D]").astype(np.float64)
+        keep = lttb_indices(x, y, target)
+    return [points[i] for i in keep.tolist()]
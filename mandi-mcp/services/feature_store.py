@@ -0,0 +1,146 @@
+"""
+Feature Store
+Market features of the crop model (avg_modal_price, price_volatility,
+transaction_count, demand_score) per (district, commodity, week of year), kept
+as dense arrays so a prediction reads them with one index operation
+"""
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.price_store import PriceStore, get_price_store
+
+WEEKS = 53
+FEATURES = ("avg_modal_price", "price_volatility", "transaction_count", "demand_score")
+
+
+def iso_week(days: np.ndarray) -> np.ndarray:
+    """ISO week of year (1-53) of days since epoch"""
+    days = np.asarray(days, dtype=np.int64)
+    # The ISO week belongs to the year of its Thursday; 1970-01-01 was a Thursday
+    thursday = days - (days + 3) % 7 + 3
+    year_start = thursday.astype("datetime64[D]").astype("datetime64[Y]").astype("datetime64[D]").astype(np.int64)
+    return (thursday - year_start) // 7 + 1
+
+
+def _accumulate(store: PriceStore, rows: np.ndarray, shape: Tuple[int, int], sign: float = 1.0) -> Tuple[np.ndarray, ...]:
+    """Report count, sum and sum of squares of modal price per cell for the given rows"""
+    size = shape[0] * shape[1] * WEEKS
+    cells = ((store.district_codes[rows].astype(np.int64) * shape[1] + store.commodity_codes[rows])
+             * WEEKS + iso_week(store.dates[rows]) - 1)
+    modal = store.modal_price[rows]
+    return (
+        sign * np.bincount(cells, minlength=size),
+        sign * np.bincount(cells, weights=modal, minlength=size),
+        sign * np.bincount(cells, weights=modal * modal, minlength=size),
+    )
+
+
+class FeatureStore:
+    """
+    Running sums per cell for one PriceStore, plus the derived features as a
+    (district, commodity, week, feature) float32 array. NaN where a cell has no reports.
+    """
+
+    def __init__(self, store: PriceStore, sums: Optional[Tuple[np.ndarray, ...]] = None):
+        self.store = store
+        self.shape = (len(store.districts), len(store.commodities))
+        if sums is None:
+            sums = _accumulate(store, np.arange(len(store)), self.shape)
+        self.count, self.total, self.total_sq = sums
+        self.features = self._derive()
+        self._districts = {name.lower(): i for i, name in enumerate(store.districts)}
+        self._commodities = {name.lower(): i for i, name in enumerate(store.commodities)}
+
+    def _derive(self) -> np.ndarray:
+        n_d, n_c = self.shape
+        count = self.count.reshape(n_d, n_c, WEEKS)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = self.total.reshape(n_d, n_c, WEEKS) / count
+            var = self.total_sq.reshape(n_d, n_c, WEEKS) / count - mean * mean
+            volatility = np.sqrt(np.maximum(var, 0))
+            # Demand: the district's share of reports relative to the commodity's busiest district that week
+            busiest = count.max(axis=0, initial=0)
+            demand = 100 * count / busiest
+        empty = count == 0
+        features = np.stack([mean, volatility, count, demand], axis=-1).astype(np.float32)
+        features[empty] = np.nan
+        return features
+
+    def updated(self, store: PriceStore) -> "FeatureStore":
+        """
+        Feature store for a store derived from this one with with_rows(): appended
+        rows are added to the sums and re-priced rows swapped out. Anything else
+        gets a full rebuild.
+        """
+        old = self.store
+        n = len(old)
+        if (len(store) < n or store.districts[:len(old.districts)] != old.districts
+                or store.commodities[:len(old.commodities)] != old.commodities):
+            return FeatureStore(store)
+
+        changed = store.repriced_rows(old)
+        added = np.arange(n, len(store))
+        if not len(changed) and not len(added):
+            return FeatureStore(store, (self.count, self.total, self.total_sq))
+
+        shape = (len(store.districts), len(store.commodities))
+        sums = [self._resized(s, shape) for s in (self.count, self.total, self.total_sq)]
+        for delta in (_accumulate(old, changed, shape, -1.0), _accumulate(store, np.concatenate((changed, added)), shape)):
+            for s, d in zip(sums, delta):
+                s += d
+        return FeatureStore(store, tuple(sums))
+
+    def _resized(self, flat: np.ndarray, shape: Tuple[int, int]) -> np.ndarray:
+        """Copy of a flat per-cell array laid out for more districts/commodities"""
+        n_d, n_c = self.shape
+        grown = np.zeros((shape[0], shape[1], WEEKS), dtype=np.float64)
+        grown[:n_d, :n_c] = flat.reshape(n_d, n_c, WEEKS)
+        return grown.reshape(-1)
+
+    def commodity_codes(self, names: Sequence[str]) -> np.ndarray:
+        """Code of each commodity name (case-insensitive), -1 when it isn't in the data"""
+        return np.asarray([self._commodities.get(name.lower(), -1) for name in names], dtype=np.int64)
+
+    def lookup(self, district: str, commodities: np.ndarray, week: int) -> np.ndarray:
+        """Features (len(commodities) x FEATURES) for a district and week; NaN rows for unknown cells"""
+        return self.lookup_grid([district], commodities, [week])[0, 0]
+
+    def lookup_grid(self, districts: Sequence[str], commodities: np.ndarray, weeks: Sequence[int]) -> np.ndarray:
+        """Features shaped (district, week, commodity, FEATURES); NaN for unknown districts, commodities or cells"""
+        commodities = np.asarray(commodities, dtype=np.int64)
+        result = np.full((len(districts), len(weeks), len(commodities), len(FEATURES)), np.nan, dtype=np.float32)
+        codes = np.asarray([self._districts.get(name.strip().lower(), -1) for name in districts], dtype=np.int64)
+        rows, cols = np.flatnonzero(codes >= 0), np.flatnonzero(commodities >= 0)
+        if len(rows) and len(cols):
+            week_index = np.asarray(weeks, dtype=np.int64) - 1
+            cells = self.features[codes[rows][:, None, None], commodities[cols][None, None, :], week_index[None, :, None]]
+            result[rows[:, None, None], np.arange(len(weeks))[None, :, None], cols[None, None, :]] = cells
+        return result
+
+    def get(self, district: str, commodity: str, week: int) -> Optional[Dict[str, float]]:
+        """Features of one cell, or None without reports"""
+        row = self.lookup(district, self.commodity_codes([commodity]), week)[0]
+        if np.isnan(row[0]):
+            return None
+        return {name: round(float(value), 2) for name, value in zip(FEATURES, row)}
+
+
+_FEATURE_STORE: Optional[FeatureStore] = None
+_FEATURE_STORE_LOCK = threading.Lock()
+
+
+def get_feature_store() -> FeatureStore:
+    """Features for the current price store, updated incrementally when the store is swapped"""
+    global _FEATURE_STORE
+    store = get_price_store()
+    features = _FEATURE_STORE
+    if features is None or features.store is not store:
+        with _FEATURE_STORE_LOCK:
+            if _FEATURE_STORE is None:
+                _FEATURE_STORE = FeatureStore(store)
+            elif _FEATURE_STORE.store is not store:
+                _FEATURE_STORE = _FEATURE_STORE.updated(store)
+            features = _FEATURE_STORE
+    return features
@@ -0,0 +1,120 @@
+"""
+Geo Index
+Grid (geohash-style) spatial index for k-nearest lookups over lat/lon points
+"""
+import math
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.19
+GRID_CELL_DEG = 0.25   # ~28 km cells: a handful of mandis, a few hundred villages each
+BRUTE_FORCE_POINTS = 2048   # up to this many points, one vectorized pass beats walking the grid
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distance from one point to arrays of points"""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class GeoIndex:
+    """
+    Points bucketed into fixed lat/lon grid cells. A query scans rings of
+    cells outward from the query cell and stops once no unvisited cell can
+    hold a point closer than the current k-th best, so only nearby cells
+    are ever touched. Rings are clipped to the cells' bounding box, and small
+    indexes skip the grid for a single pass over every point.
+    """
+
+    def __init__(self, lats: List[float], lons: List[float], cell_deg: float = GRID_CELL_DEG):
+        self.cell_deg = cell_deg
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+
+        cells: Dict[Tuple[int, int], List[int]] = {}
+        for i, (lat, lon) in enumerate(zip(self.lats.tolist(), self.lons.tolist())):
+            cells.setdefault(self._cell(lat, lon), []).append(i)
+        self.cells = {cell: np.asarray(ids, dtype=np.int64) for cell, ids in cells.items()}
+
+        if cells:
+            rows = [r for r, _ in cells]
+            cols = [c for _, c in cells]
+            self._bounds = (min(rows), max(rows), min(cols), max(cols))
+
+    def __len__(self) -> int:
+        return len(self.lats)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return (int(math.floor(lat / self.cell_deg)), int(math.floor(lon / self.cell_deg)))
+
+    def _ring(self, row: int, col: int, r: int) -> List[np.ndarray]:
+        """Point ids in the occupied cells exactly r steps from (row, col)"""
+        if r == 0:
+            ids = self.cells.get((row, col))
+            return [ids] if ids is not None else []
+        min_row, max_row, min_col, max_col = self._bounds
+        # Only the parts of the ring inside the bounding box can hold points
+        cells = []
+        for dr in (-r, r):
+            if min_row <= row + dr <= max_row:
+                cells.extend((row + dr, c) for c in range(max(col - r, min_col), min(col + r, max_col) + 1))
+        for dc in (-r, r):
+            if min_col <= col + dc <= max_col:
+                cells.extend((rr, col + dc) for rr in range(max(row - r + 1, min_row), min(row + r - 1, max_row) + 1))
+        return [self.cells[cell] for cell in cells if cell in self.cells]
+
+    def _ring_min_km(self, lat: float, r: int) -> float:
+        """Lower bound on the distance to any point outside rings 0..r"""
+        if r <= 0:
+            return 0.0
+        # Longitude degrees shrink towards the poles, so bound with the widest latitude reached
+        widest = min(89.0, abs(lat) + (r + 1) * self.cell_deg)
+        return r * self.cell_deg * KM_PER_DEGREE * math.cos(math.radians(widest))
+
+    def nearest(self, lat: float, lon: float, k: int = 5, max_km: float = None) -> List[Tuple[int, float]]:
+        """Up to k (point id, distance km) pairs, closest first, lowest id first among equals"""
+        if not len(self) or k <= 0:
+            return []
+
+        if len(self) <= BRUTE_FORCE_POINTS:
+            return self._closest(np.arange(len(self)), haversine_km(lat, lon, self.lats, self.lons), k, max_km)
+
+        row, col = self._cell(lat, lon)
+        min_row, max_row, min_col, max_col = self._bounds
+        # Rings before the first one reaching the bounding box are empty; beyond
+        # the last one every occupied cell has been visited
+        first_ring = max(0, row - max_row, min_row - row, col - max_col, min_col - col)
+        last_ring = max(abs(row - min_row), abs(row - max_row), abs(col - min_col), abs(col - max_col))
+
+        ids_seen: List[np.ndarray] = []
+        dists_seen: List[np.ndarray] = []
+        for r in range(first_ring, last_ring + 1):
+            for ids in self._ring(row, col, r):
+                ids_seen.append(ids)
+                dists_seen.append(haversine_km(lat, lon, self.lats[ids], self.lons[ids]))
+
+            bound = self._ring_min_km(lat, r)
+            if max_km is not None and bound > max_km:
+                break
+            if dists_seen and sum(len(i) for i in ids_seen) >= k:
+                best = np.partition(np.concatenate(dists_seen), k - 1)[k - 1]
+                if best <= bound:
+                    break
+
+        if not ids_seen:
+            return []
+        return self._closest(np.concatenate(ids_seen), np.concatenate(dists_seen), k, max_km)
+
+    @staticmethod
+    def _closest(ids: np.ndarray, dists: np.ndarray, k: int, max_km: float = None) -> List[Tuple[int, float]]:
+        # Equal distances (e.g. points sharing a position) go in point id order
+        order = np.lexsort((ids, dists))[:k]
+        return [
+            (int(ids[i]), round(float(dists[i]), 2))
+            for i in order
+            if max_km is None or dists[i] <= max_km
+        ]
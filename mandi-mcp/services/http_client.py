@@ -0,0 +1,230 @@
+"""
+Shared HTTP Client Registry
+One pooled httpx.AsyncClient per upstream, opened at startup and closed on shutdown
+"""
+import asyncio
+import os
+import time
+from typing import Dict, Any, Optional
+
+import httpx
+
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+# =============================================================================
+# UPSTREAM CONFIGURATION - pool size and timeouts per host
+# =============================================================================
+UPSTREAMS: Dict[str, Dict[str, Any]] = {
+    "data_gov": {
+        "base_url": "https://api.data.gov.in",
+        "timeout": httpx.Timeout(30.0, connect=5.0),
+        "min_timeout": 3.0,
+        "max_connections": 20,
+        "max_keepalive_connections": 10,
+    },
+    "open_meteo": {
+        "base_url": "https://api.open-meteo.com",
+        "timeout": httpx.Timeout(10.0, connect=3.0),
+        "min_timeout": 2.0,
+        "max_connections": 10,
+        "max_keepalive_connections": 5,
+    },
+}
+
+KEEPALIVE_EXPIRY = 60.0
+
+# Hedged reads (opt-in, e.g. HEDGE_UPSTREAMS=data_gov,open_meteo): when the first
+# attempt hasn't answered by the HEDGE_PERCENTILE latency, a second one is sent and
+# whichever answers first wins. Hedges are capped by a token bucket: each request
+# earns HEDGE_BUDGET of a hedge and at most HEDGE_BURST hedges can be saved up, so
+# a slowdown after a long healthy stretch still hedges only HEDGE_BUDGET of requests.
+HEDGE_UPSTREAMS = {n.strip() for n in os.getenv("HEDGE_UPSTREAMS", "").split(",") if n.strip()}
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+HEDGE_BUDGET = float(os.getenv("HEDGE_BUDGET", "0.05"))
+HEDGE_BURST = float(os.getenv("HEDGE_BURST", "2"))
+
+
+def _http2_enabled() -> bool:
+    """HTTP/2 is opt-in via HTTP2_ENABLED and needs the h2 package"""
+    if os.getenv("HTTP2_ENABLED", "false").lower() not in ("1", "true", "yes"):
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        print("HTTP2_ENABLED set but h2 is not installed, using HTTP/1.1")
+        return False
+
+
+HTTP2_ENABLED = _http2_enabled()
+
+_CLIENTS: Dict[str, httpx.AsyncClient] = {}
+# The configured timeout is the ceiling; the breaker lowers it to what the upstream actually needs
+BREAKERS: Dict[str, CircuitBreaker] = {
+    name: CircuitBreaker(name, config["min_timeout"], config["timeout"].read)
+    for name, config in UPSTREAMS.items()
+}
+_STATS: Dict[str, Dict[str, int]] = {
+    name: {"requests": 0, "in_use": 0, "waits": 0, "errors": 0, "hedges_fired": 0, "hedges_won": 0}
+    for name in UPSTREAMS
+}
+_HEDGE_TOKENS: Dict[str, float] = {name: HEDGE_BURST for name in UPSTREAMS}
+
+
+def _create_client(name: str) -> httpx.AsyncClient:
+    config = UPSTREAMS[name]
+    return httpx.AsyncClient(
+        base_url=config["base_url"],
+        timeout=config["timeout"],
+        limits=httpx.Limits(
+            max_connections=config["max_connections"],
+            max_keepalive_connections=config["max_keepalive_connections"],
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+        http2=HTTP2_ENABLED,
+    )
+
+
+async def open_clients():
+    """Open one pooled client per upstream (FastAPI startup)"""
+    for name in UPSTREAMS:
+        if name not in _CLIENTS or _CLIENTS[name].is_closed:
+            _CLIENTS[name] = _create_client(name)
+
+
+async def close_clients():
+    """Close all pooled clients (FastAPI shutdown)"""
+    for name, client in list(_CLIENTS.items()):
+        await client.aclose()
+        del _CLIENTS[name]
+
+
+def get_client(name: str) -> httpx.AsyncClient:
+    """
+    Returns the pooled client for an upstream.
+    Created lazily for processes without a startup hook (e.g. the MCP server).
+    """
+    client = _CLIENTS.get(name)
+    if client is None or client.is_closed:
+        client = _CLIENTS[name] = _create_client(name)
+    return client
+
+
+async def get(name: str, url: str, **kwargs) -> httpx.Response:
+    """
+    GET through the named upstream's pool, recording pool usage.
+    Raises CircuitOpenError without calling out while the upstream's breaker is open;
+    5xx responses and errors count against the breaker. Hedged for HEDGE_UPSTREAMS.
+    """
+    breaker = BREAKERS[name]
+    if not breaker.allow():
+        raise CircuitOpenError(f"{name} circuit open, skipping upstream call")
+
+    hedge_after = _hedge_delay(name)
+    if hedge_after is None:
+        return await _attempt(name, url, kwargs)
+
+    _HEDGE_TOKENS[name] = min(HEDGE_BURST, _HEDGE_TOKENS[name] + HEDGE_BUDGET)
+    first = asyncio.ensure_future(_attempt(name, url, kwargs))
+    attempts = [first]
+    # Whatever happens from here (including the caller being cancelled), no attempt outlives get()
+    try:
+        done, _ = await asyncio.wait({first}, timeout=hedge_after)
+        if done or not _hedge_allowed(name):
+            return await first
+
+        stats = _STATS[name]
+        stats["hedges_fired"] += 1
+        second = asyncio.ensure_future(_attempt(name, url, kwargs))
+        attempts.append(second)
+        pending = {first, second}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # First success wins, even when a failed attempt finished in the same wait
+            for attempt in done:
+                if attempt.exception() is None:
+                    if attempt is second:
+                        stats["hedges_won"] += 1
+                    return attempt.result()
+        # Both attempts failed: surface the original attempt's error
+        return first.result()
+    finally:
+        for attempt in attempts:
+            attempt.cancel()
+
+
+def _hedge_delay(name: str) -> Optional[float]:
+    """Seconds to wait before hedging, or None when this upstream isn't hedged"""
+    breaker = BREAKERS[name]
+    if name not in HEDGE_UPSTREAMS or breaker.state != "closed":
+        return None
+    return breaker.latency_percentile(HEDGE_PERCENTILE)
+
+
+def _hedge_allowed(name: str) -> bool:
+    """Within budget: takes a token from the upstream's hedge bucket if one is left"""
+    if _HEDGE_TOKENS[name] < 1:
+        return False
+    _HEDGE_TOKENS[name] -= 1
+    return True
+
+
+async def _attempt(name: str, url: str, kwargs: Dict[str, Any]) -> httpx.Response:
+    """One upstream call, recorded in pool stats and the breaker"""
+    breaker = BREAKERS[name]
+    stats = _STATS[name]
+    stats["requests"] += 1
+    if stats["in_use"] >= UPSTREAMS[name]["max_connections"]:
+        stats["waits"] += 1
+    stats["in_use"] += 1
+    config_timeout = UPSTREAMS[name]["timeout"]
+    kwargs = {"timeout": httpx.Timeout(breaker.timeout(), connect=config_timeout.connect), **kwargs}
+    start = time.monotonic()
+    finished = False
+    try:
+        response = await get_client(name).get(url, **kwargs)
+        breaker.record(response.status_code < 500, time.monotonic() - start)
+        finished = True
+        return response
+    except Exception:
+        stats["errors"] += 1
+        breaker.record(False, time.monotonic() - start)
+        finished = True
+        raise
+    finally:
+        stats["in_use"] -= 1
+        if not finished:
+            # A cancelled hedge loser took at least this long; dropping it would skew the percentiles low
+            breaker.release(time.monotonic() - start)
+
+
+def _pool_connections(client: Optional[httpx.AsyncClient]) -> Dict[str, int]:
+    """Open/idle connection counts from the transport pool, if it exposes them"""
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is None:
+        return {"open": 0, "idle": 0}
+    return {
+        "open": len(connections),
+        "idle": sum(1 for c in connections if c.is_idle()),
+    }
+
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """Circuit state, rolling error rate, latency percentiles and current timeout per upstream"""
+    return {name: breaker.stats() for name, breaker in BREAKERS.items()}
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-upstream pool statistics: in use, idle, waits"""
+    stats = {}
+    for name, config in UPSTREAMS.items():
+        client = _CLIENTS.get(name)
+        stats[name] = {
+            **_STATS[name],
+            **_pool_connections(client),
+            "max_connections": config["max_connections"],
+            "http2": HTTP2_ENABLED,
+            "hedged": name in HEDGE_UPSTREAMS,
+        }
+    return stats
@@ -1,6 +1,13 @@
-from typing import List, Dict, Optional
+import json
+import os
+import threading
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
 from pydantic import BaseModel
 
+from services.geo_index import GeoIndex
+from services.price_store import get_price_store
+
 class Location(BaseModel):
     village: Optional[str] = None
     taluka: str
@@ -38,13 +45,167 @@ LOCATION_DB = [
     }
 ]
 
+# District coordinates for weather
+DISTRICT_COORDS = {
+    "Pune": (18.5204, 73.8567),
+    "Mumbai": (19.0760, 72.8777),
+    "Nashik": (20.0063, 73.7909),
+    "Ahmednagar": (19.0948, 74.7500),
+    "Nagpur": (21.1458, 79.0882),
+    "Aurangabad": (19.8762, 75.3433),
+    "Solapur": (17.6599, 75.9064),
+    "Kolhapur": (16.7050, 74.2433),
+    "Dhule": (20.9042, 74.7749),
+    "Jalgaon": (21.0077, 75.5626),
+    "Thane": (19.2183, 72.9781),
+    "Raigad": (18.5158, 73.1822),
+    "Satara": (17.6805, 74.0183),
+    "Sangli": (16.8524, 74.5815),
+    "Ratnagiri": (16.9902, 73.3120),
+}
+DEFAULT_COORDS = DISTRICT_COORDS["Mumbai"]
+
+# District centroids for every state, shipped with the crop prediction export
+DISTRICTS_DB_PATH = Path(os.getenv(
+    "DISTRICTS_DB_PATH", Path(__file__).parent.parent.parent / "export" / "districts_database.json"
+))
+
+def _load_district_coords() -> Dict[str, Tuple[float, float]]:
+    """district (lowercase) -> (lat, lon); the hand-tuned DISTRICT_COORDS win"""
+    coords = {}
+    try:
+        with open(DISTRICTS_DB_PATH, 'r', encoding='utf-8') as f:
+            for districts in json.load(f).values():
+                for name, info in districts.items():
+                    coords.setdefault(name.lower(), (float(info["lat"]), float(info["lon"])))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Districts database unavailable ({e}), using built-in coordinates")
+    for name, latlon in DISTRICT_COORDS.items():
+        coords[name.lower()] = latlon
+    return coords
+
+ALL_DISTRICT_COORDS = _load_district_coords()
+
+def get_district_coords(district: str) -> Optional[Tuple[float, float]]:
+    """Coordinates of a district, or None when it is unknown"""
+    return ALL_DISTRICT_COORDS.get(district.strip().lower())
+
+
+class MandiIndex:
+    """
+    Every known mandi and village as a point in a GeoIndex. Mandis come from
+    the price data and villages from LOCATION_DB at their own coordinates.
+
+    Mandi distances are district-level: the data has no mandi coordinates, so
+    each mandi sits at its district's centroid ("position": "district") and all
+    of a district's mandis are equally far from any point. Among those, the
+    mandi named after the district comes first, then the rest alphabetically.
+    """
+
+    def __init__(self, filters: Dict[str, Dict[str, List[str]]], villages: List[Dict]):
+        self.points: List[Dict] = []
+        for district, markets in filters.items():
+            latlon = get_district_coords(district)
+            if latlon is None:
+                continue
+            for market in sorted(markets, key=lambda m: _district_market_rank(m, district)):
+                self.points.append({
+                    "kind": "mandi", "name": market, "district": district, "position": "district",
+                    "lat": latlon[0], "lon": latlon[1],
+                })
+        for loc in villages:
+            self.points.append({
+                "kind": "village", "name": loc["village"], "district": loc["district"],
+                "taluka": loc["taluka"], "nearest_mandi": loc["nearest_mandi"],
+                "lat": loc["lat"], "lon": loc["lon"],
+            })
+
+        self.by_name = {}
+        for point in self.points:
+            self.by_name.setdefault(point["name"].lower(), point)
+        mandis = [i for i, p in enumerate(self.points) if p["kind"] == "mandi"]
+        self._mandi_ids = mandis
+        self.mandis = GeoIndex([self.points[i]["lat"] for i in mandis], [self.points[i]["lon"] for i in mandis])
+        self.all = GeoIndex([p["lat"] for p in self.points], [p["lon"] for p in self.points])
+
+    def nearest_mandis(self, lat: float, lon: float, k: int = 5, max_km: float = None) -> List[Dict]:
+        """k closest mandis with their distance in km"""
+        return [
+            {**self.points[self._mandi_ids[i]], "distance_km": d}
+            for i, d in self.mandis.nearest(lat, lon, k, max_km)
+        ]
+
+    def nearest(self, lat: float, lon: float, k: int = 5, max_km: float = None) -> List[Dict]:
+        """k closest mandis or villages with their distance in km"""
+        return [{**self.points[i], "distance_km": d} for i, d in self.all.nearest(lat, lon, k, max_km)]
+
+
+def _district_market_rank(market: str, district: str) -> Tuple[int, str]:
+    """Orders a district's mandis: the one named after the district, then names starting with it, then the rest"""
+    name, district = market.strip().lower(), district.strip().lower()
+    if name == district:
+        return 0, name
+    return (1 if name.startswith(district) else 2), name
+
+
+# (price store the index was built from, index); rebuilt when the store is swapped
+_MANDI_INDEX: Optional[Tuple[object, MandiIndex]] = None
+_MANDI_INDEX_LOCK = threading.Lock()
+
+def get_mandi_index() -> MandiIndex:
+    """Shared MandiIndex for the current price store"""
+    global _MANDI_INDEX
+    store = get_price_store()
+    cached = _MANDI_INDEX
+    if cached is None or cached[0] is not store:
+        with _MANDI_INDEX_LOCK:
+            if _MANDI_INDEX is None or _MANDI_INDEX[0] is not store:
+                index = MandiIndex(store.filters(), LOCATION_DB)
+                print(f"Mandi index built: {len(index.points)} points")
+                _MANDI_INDEX = (store, index)
+            cached = _MANDI_INDEX
+    return cached[1]
+
+def resolve_coords(district: str, market: Optional[str] = None) -> Tuple[float, float]:
+    """District centroid, else the indexed position of the market or district name, else Mumbai"""
+    latlon = get_district_coords(district)
+    if latlon:
+        return latlon
+    index = get_mandi_index()
+    for name in (market, district):
+        point = index.by_name.get(name.lower()) if name else None
+        if point:
+            return point["lat"], point["lon"]
+    return DEFAULT_COORDS
+
 def get_all_locations() -> List[Dict]:
     """Returns all available locations."""
     return LOCATION_DB
 
+def find_nearest_mandis(lat: float, lon: float, k: int = 5, max_km: Optional[float] = None) -> List[Dict]:
+    """The k mandis closest to a coordinate, with distances in km"""
+    return get_mandi_index().nearest_mandis(lat, lon, k, max_km)
+
 def get_location_details(district: str, taluka: str) -> Optional[Dict]:
-    """Finds location details for a given district and taluka."""
+    """
+    Finds location details for a given district and taluka.
+    Talukas outside LOCATION_DB resolve to the district centroid and its nearest mandi.
+    """
     for loc in LOCATION_DB:
         if loc["district"].lower() == district.lower() and loc["taluka"].lower() == taluka.lower():
             return loc
-    return None
+
+    latlon = get_district_coords(district)
+    if latlon is None:
+        return None
+    nearest = find_nearest_mandis(latlon[0], latlon[1], k=1)
+    if not nearest:
+        return None
+    return {
+        "district": district,
+        "taluka": taluka,
+        "village": None,
+        "nearest_mandi": nearest[0]["name"],
+        "lat": latlon[0],
+        "lon": latlon[1]
+    }
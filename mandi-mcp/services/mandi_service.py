@@ -1,10 +1,20 @@
 import httpx
-from typing import Dict, Optional
+import asyncio
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
 import datetime
 import os
 import json
 from dotenv import load_dotenv
 
+try:
+    import fcntl
+except ImportError:  # Windows: saves are not serialized across processes
+    fcntl = None
+
+from services.price_store import get_price_store
+
 load_dotenv()
 
 # =============================================================================
@@ -38,66 +48,267 @@ BASE_CROP_PRICES = {
     "sunflower": {"min": 4500, "modal": 5000, "max": 5500},
 }
 
-import google.generativeai as genai
+from services.ai_pool import get_gemini_model, run_blocking
+from services.cache import CACHES
 
-# Cache for AI-generated prices to avoid repeated Gemini calls
-AI_PRICE_CACHE: Dict = {}
+# =============================================================================
+# AI PRICE ESTIMATES - batched Gemini calls, cached per day and persisted
+# =============================================================================
+AI_PRICE_CACHE_PATH = Path(os.getenv(
+    "AI_PRICE_CACHE_PATH", Path(__file__).resolve().parent.parent / "data" / "ai_price_cache.json"
+))
+AI_PRICE_CACHE_MAX = 5000
+AI_PRICE_BATCH_SIZE = 25       # pairs per Gemini prompt
+AI_PRICE_BATCH_WINDOW = 0.05   # seconds to collect misses before flushing
 
-async def get_gemini_price_estimate(market: str, crop: str) -> Optional[Dict]:
+
+class DailyPriceCache:
     """
-    Uses Gemini to estimate market price if data is missing.
+    Bounded LRU of AI price estimates keyed by (date, market, crop) and
+    persisted as JSON. Keys carry the date, so an estimate is only ever served
+    on the day it was made; older entries are dropped on load and when the day
+    changes. Saves merge with the file, so workers sharing it keep each other's
+    estimates.
     """
-    cache_key = f"{market.lower()}_{crop.lower()}"
-    if cache_key in AI_PRICE_CACHE:
-        print(f"Using cached AI price for {market}/{crop}")
-        return AI_PRICE_CACHE[cache_key]
-    
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        print("No GEMINI_API_KEY found, using synthetic prices")
-        return None
-    
+
+    def __init__(self, path: Path, max_size: int):
+        self.path = path
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._loaded = False
+        self._day = datetime.date.today().isoformat()
+        self._save_lock = asyncio.Lock()
+        self._hits = 0
+        self._misses = 0
+        CACHES["ai_price"] = self
+
+    @staticmethod
+    def key(market: str, crop: str) -> str:
+        return f"{datetime.date.today().isoformat()}|{market.lower()}|{crop.lower()}"
+
+    def _read_file(self) -> Dict[str, Dict]:
+        """Today's entries in the file (empty when it is missing or unreadable)"""
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except Exception as e:
+            print(f"AI price cache load error: {e}")
+            return {}
+        today = f"{datetime.date.today().isoformat()}|"
+        return {key: value for key, value in entries.items() if key.startswith(today)}
+
+    def _load(self):
+        self._loaded = True
+        self._merge(self._read_file())
+        print(f"Loaded {len(self._entries)} AI price estimates for {self._day}")
+
+    def _merge(self, entries: Dict[str, Dict]):
+        """Add entries this worker doesn't have yet, as least recently used"""
+        missing = [(key, value) for key, value in entries.items() if key not in self._entries]
+        if not missing:
+            return
+        self._entries = OrderedDict(missing + list(self._entries.items()))
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _roll_day(self):
+        """Yesterday's keys are never read again; drop them once when the date changes"""
+        today = datetime.date.today().isoformat()
+        if today != self._day:
+            self._day = today
+            for stale in [k for k in self._entries if not k.startswith(f"{today}|")]:
+                del self._entries[stale]
+
+    def get(self, market: str, crop: str) -> Optional[Dict]:
+        if not self._loaded:
+            self._load()
+        key = self.key(market, crop)
+        value = self._entries.get(key)
+        if value is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, market: str, crop: str, value: Dict):
+        key = self.key(market, crop)
+        self._roll_day()
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def save(self):
+        """
+        Snapshot the entries and write them off the event loop, one writer at a
+        time; other workers' estimates found in the file are kept and picked up
+        """
+        async with self._save_lock:
+            others = await asyncio.to_thread(self._write, dict(self._entries))
+            self._merge(others)
+
+    def _write(self, entries: Dict[str, Dict]) -> Dict[str, Dict]:
+        """
+        Merge with the file and write atomically, holding a lock file so workers
+        don't overwrite each other. Returns the file's entries this worker lacked.
+        """
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path.with_suffix(".lock"), 'w') as lock:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                others = {k: v for k, v in self._read_file().items() if k not in entries}
+                merged = {**others, **entries}
+                # Trim the oldest of the other workers' entries first
+                for key in list(others)[:max(0, len(merged) - self.max_size)]:
+                    del merged[key]
+                tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(merged, f, ensure_ascii=False)
+                os.replace(tmp, self.path)
+                return others
+        except OSError as e:
+            print(f"AI price cache save error: {e}")
+            return {}
+
+    def stats(self) -> Dict:
+        lookups = self._hits + self._misses
+        return {
+            "type": "daily-persistent-lru",
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 3) if lookups else None,
+            "pending": len(_PENDING_ESTIMATES),
+            "batches": _BATCH_STATS["batches"],
+            "pairs_per_batch": round(_BATCH_STATS["pairs"] / _BATCH_STATS["batches"], 1) if _BATCH_STATS["batches"] else None,
+        }
+
+
+AI_PRICE_CACHE = DailyPriceCache(AI_PRICE_CACHE_PATH, AI_PRICE_CACHE_MAX)
+
+# Cache key -> (market, crop, future) of misses waiting for the next batch
+_PENDING_ESTIMATES: "OrderedDict[str, Tuple[str, str, asyncio.Future]]" = OrderedDict()
+_FLUSH_TASKS: Set[asyncio.Task] = set()
+_BATCH_STATS = {"batches": 0, "pairs": 0}
+
+
+def _ai_price_result(market: str, crop: str, min_q: float, modal_q: float, max_q: float) -> Dict:
+    return {
+        "market": market,
+        "crop": crop,
+        "min_price_quintal": min_q,
+        "modal_price_quintal": modal_q,
+        "max_price_quintal": max_q,
+        "min_price_kg": min_q / 100,
+        "modal_price_kg": modal_q / 100,
+        "max_price_kg": max_q / 100,
+        "date": datetime.date.today().isoformat(),
+        "found": True,
+        "source": "Gemini AI Estimate"
+    }
+
+
+async def _estimate_batch(pairs: List[Tuple[str, str]], api_key: str) -> List[Optional[Dict]]:
+    """One Gemini call for many (market, crop) pairs; None for pairs it could not price"""
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.0-flash')
+        model = get_gemini_model(api_key, 'gemini-2.0-flash')
         
+        listing = "\n".join(f"{i}. '{crop}' in '{market}'" for i, (market, crop) in enumerate(pairs, 1))
         prompt = (
-            f"Estimate the current agricultural market price for '{crop}' in '{market}', Maharashtra, India. "
-            f"Provide a realistic estimate for today's date ({datetime.date.today()}) based on seasonality and typical trends. "
-            f"Return ONLY a JSON object with this format (no markdown, no explanation):\n"
-            f'{{"min_price_quintal": 1000, "modal_price_quintal": 1200, "max_price_quintal": 1500}}'
+            f"Estimate the current agricultural market price in Maharashtra, India for each of these crops and markets:\n"
+            f"{listing}\n"
+            f"Provide realistic estimates for today's date ({datetime.date.today()}) based on seasonality and typical trends. "
+            f"Return ONLY a JSON array with one object per line above, using its number as id (no markdown, no explanation):\n"
+            f'[{{"id": 1, "min_price_quintal": 1000, "modal_price_quintal": 1200, "max_price_quintal": 1500}}]'
         )
         
-        response = model.generate_content(prompt)
+        response = await run_blocking("gemini_price", model.generate_content, prompt)
         text = response.text.replace("```json", "").replace("```", "").strip()
         data = json.loads(text)
         
-        min_q = float(data.get("min_price_quintal", 0))
-        modal_q = float(data.get("modal_price_quintal", 0))
-        max_q = float(data.get("max_price_quintal", 0))
-        
-        result = {
-            "market": market,
-            "crop": crop,
-            "min_price_quintal": min_q,
-            "modal_price_quintal": modal_q,
-            "max_price_quintal": max_q,
-            "min_price_kg": min_q / 100,
-            "modal_price_kg": modal_q / 100,
-            "max_price_kg": max_q / 100,
-            "date": datetime.date.today().isoformat(),
-            "found": True,
-            "source": "Gemini AI Estimate"
-        }
-        
-        # Cache the result
-        AI_PRICE_CACHE[cache_key] = result
-        print(f"Generated AI price for {market}/{crop}: {modal_q}/quintal")
-        return result
+        by_id = {int(item.get("id", 0)): item for item in data if isinstance(item, dict)}
+        results = []
+        for i, (market, crop) in enumerate(pairs, 1):
+            item = by_id.get(i)
+            try:
+                results.append(_ai_price_result(
+                    market, crop,
+                    float(item.get("min_price_quintal", 0)),
+                    float(item.get("modal_price_quintal", 0)),
+                    float(item.get("max_price_quintal", 0)),
+                ) if item else None)
+            except (TypeError, ValueError):
+                results.append(None)
+        return results
         
     except Exception as e:
         print(f"Gemini Estimate Error: {e}")
+        return [None] * len(pairs)
+
+
+async def _flush_estimates(api_key: str, delay: float = 0.0):
+    """Send pending misses to Gemini in batches of AI_PRICE_BATCH_SIZE"""
+    if delay:
+        await asyncio.sleep(delay)
+    
+    while _PENDING_ESTIMATES:
+        batch = []
+        while _PENDING_ESTIMATES and len(batch) < AI_PRICE_BATCH_SIZE:
+            batch.append(_PENDING_ESTIMATES.popitem(last=False)[1])
+        
+        results = await _estimate_batch([(market, crop) for market, crop, _ in batch], api_key)
+        _BATCH_STATS["batches"] += 1
+        _BATCH_STATS["pairs"] += len(batch)
+        
+        for (market, crop, future), result in zip(batch, results):
+            if result:
+                AI_PRICE_CACHE.put(market, crop, result)
+            if not future.done():
+                future.set_result(result)
+        print(f"Generated AI prices for {sum(1 for r in results if r)}/{len(batch)} pairs in one call")
+        await AI_PRICE_CACHE.save()
+
+
+def _schedule_flush(api_key: str, delay: float):
+    task = asyncio.create_task(_flush_estimates(api_key, delay))
+    _FLUSH_TASKS.add(task)
+    task.add_done_callback(_FLUSH_TASKS.discard)
+
+
+async def get_gemini_price_estimate(market: str, crop: str) -> Optional[Dict]:
+    """
+    Uses Gemini to estimate market price if data is missing.
+    Misses arriving within AI_PRICE_BATCH_WINDOW share one multi-pair prompt.
+    """
+    cached = AI_PRICE_CACHE.get(market, crop)
+    if cached:
+        print(f"Using cached AI price for {market}/{crop}")
+        return cached
+    
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        print("No GEMINI_API_KEY found, using synthetic prices")
         return None
+    
+    key = AI_PRICE_CACHE.key(market, crop)
+    pending = _PENDING_ESTIMATES.get(key)
+    if pending:
+        future = pending[2]
+    else:
+        future = asyncio.get_running_loop().create_future()
+        first = not _PENDING_ESTIMATES
+        _PENDING_ESTIMATES[key] = (market, crop, future)
+        if len(_PENDING_ESTIMATES) >= AI_PRICE_BATCH_SIZE:
+            _schedule_flush(api_key, 0.0)
+        elif first:
+            _schedule_flush(api_key, AI_PRICE_BATCH_WINDOW)
+    
+    return await asyncio.shield(future)
 
 
 def get_synthetic_price(market: str, crop: str) -> Dict:
@@ -143,52 +354,26 @@ async def get_mandi_prices(market: str, crop: str) -> Dict:
     2. Gemini AI Estimate
     3. Synthetic prices based on typical crop values
     """
-    import csv 
-    from pathlib import Path
-
-    csv_path = Path(__file__).resolve().parent.parent.parent / "data" / "Dataset.csv"
-    
     real_data = None
     
     # 1. Try CSV
-    if csv_path.exists():
-        try:
-            entries = []
-            with open(csv_path, mode='r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # Flexible matching
-                    if crop.lower() in row['Commodity'].lower():
-                        if market and market.lower() in row['Market'].lower():
-                            try:
-                                d_str = row['Arrival_Date']
-                                dt = datetime.datetime.strptime(d_str, "%d-%m-%Y")
-                                entries.append({
-                                    "dt": dt,
-                                    "row": row
-                                })
-                            except:
-                                pass
-            
-            if entries:
-                entries.sort(key=lambda x: x['dt'], reverse=True)
-                latest = entries[0]['row']
-                
-                real_data = {
-                    "market": latest.get("Market"),
-                    "crop": latest.get("Commodity"),
-                    "min_price_quintal": float(latest.get("Min_Price", 0)),
-                    "modal_price_quintal": float(latest.get("Modal_Price", 0)),
-                    "max_price_quintal": float(latest.get("Max_Price", 0)),
-                    "min_price_kg": float(latest.get("Min_Price", 0)) / 100,
-                    "modal_price_kg": float(latest.get("Modal_Price", 0)) / 100,
-                    "max_price_kg": float(latest.get("Max_Price", 0)) / 100,
-                    "date": latest.get("Arrival_Date"),
-                    "found": True,
-                    "source": "Dataset.csv"
-                }
-        except Exception as e:
-            print(f"CSV Error: {e}")
+    store = get_price_store()
+    i = store.latest(crop, market) if market else None
+    if i is not None:
+        latest = store.row(i)
+        real_data = {
+            "market": latest["market"],
+            "crop": latest["commodity"],
+            "min_price_quintal": latest["min_price"],
+            "modal_price_quintal": latest["modal_price"],
+            "max_price_quintal": latest["max_price"],
+            "min_price_kg": latest["min_price"] / 100,
+            "modal_price_kg": latest["modal_price"] / 100,
+            "max_price_kg": latest["max_price"] / 100,
+            "date": latest["date"].strftime("%d-%m-%Y"),
+            "found": True,
+            "source": "Dataset.csv"
+        }
 
     if real_data:
         return real_data
@@ -0,0 +1,85 @@
+"""
+Advice Pipeline
+Shared by /data and the MCP advice tool: price, weather and price analytics are fetched
+concurrently, advice starts as soon as they are in, and every stage has its own deadline
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from services.advice_service import generate_advice, is_usable_advice, build_template_advice
+from services.tts_service import synthesize_speech
+from services.weather_service import fallback_weather
+
+# Seconds each stage may take before its fallback is used instead
+STAGE_DEADLINES = {
+    "price": 10.0,
+    "weather": 6.0,
+    "analytics": 3.0,
+    "advice": 20.0,
+    "speech": 15.0,
+}
+
+
+async def run_stage(name: str, work: Awaitable, fallback: Callable[[], Any], timings: Dict[str, int]) -> Any:
+    """Await one stage under its deadline; on timeout or error return fallback()"""
+    start = time.perf_counter()
+    try:
+        return await asyncio.wait_for(work, STAGE_DEADLINES[name])
+    except asyncio.TimeoutError:
+        print(f"Pipeline stage '{name}' exceeded {STAGE_DEADLINES[name]}s, using fallback")
+    except Exception as e:
+        print(f"Pipeline stage '{name}' failed: {e}, using fallback")
+    finally:
+        timings[name] = round((time.perf_counter() - start) * 1000)
+    return fallback()
+
+
+async def _none() -> None:
+    return None
+
+
+async def run_advice_pipeline(
+    district: str,
+    crop: str,
+    price: Awaitable[Dict],
+    weather: Awaitable[Dict],
+    price_fallback: Callable[[], Dict],
+    api_key: str,
+    analytics: Optional[Awaitable[Optional[Dict[str, Any]]]] = None,
+) -> Dict[str, Any]:
+    """
+    Runs price -> advice -> speech with weather and analytics alongside price.
+    analytics (services.analytics) gives the advice the actual price trend;
+    without it, or past its deadline, the advice goes without.
+
+    Returns price_data, weather_data, analytics, advice_marathi, audio_id (see
+    tts_service.audio_url) and per-stage timings_ms.
+    """
+    timings: Dict[str, int] = {}
+    start = time.perf_counter()
+
+    price_data, weather_data, analytics_data = await asyncio.gather(
+        run_stage("price", price, price_fallback, timings),
+        run_stage("weather", weather, lambda: fallback_weather("Weather stage timed out"), timings),
+        run_stage("analytics", analytics, lambda: None, timings) if analytics is not None else _none(),
+    )
+
+    template = lambda: build_template_advice(district, crop, price_data, weather_data, analytics_data)
+    advice_text = await run_stage(
+        "advice", generate_advice(price_data, weather_data, api_key, analytics=analytics_data), template, timings
+    )
+    if not is_usable_advice(advice_text):
+        advice_text = template()
+
+    audio_id = await run_stage("speech", synthesize_speech(advice_text, "mr"), lambda: "", timings)
+
+    timings["total"] = round((time.perf_counter() - start) * 1000)
+    return {
+        "price_data": price_data,
+        "weather_data": weather_data,
+        "analytics": analytics_data,
+        "advice_marathi": advice_text,
+        "audio_id": audio_id,
+        "timings_ms": timings,
+    }
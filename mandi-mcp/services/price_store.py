@@ -0,0 +1,637 @@
+"""
+Price Store
+Columnar in-memory view of Dataset.csv, loaded once and shared by every price lookup,
+with the records synced from the live API kept in a small overlay on top
+"""
+import csv
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+DATASET_PATH = Path(__file__).resolve().parent.parent.parent / "data" / "Dataset.csv"
+
+
+class PriceStore:
+    """
+    Mandi price rows kept as parallel NumPy columns.
+
+    Names are dictionary-encoded into small string tables, dates are stored as
+    days since epoch, and rows are indexed by (commodity, market) and by date
+    so lookups never touch the rows they do not return.
+    """
+
+    def __init__(
+        self,
+        states: List[str],
+        districts: List[str],
+        markets: List[str],
+        commodities: List[str],
+        varieties: List[str],
+        state_codes: np.ndarray,
+        district_codes: np.ndarray,
+        market_codes: np.ndarray,
+        commodity_codes: np.ndarray,
+        variety_codes: np.ndarray,
+        dates: np.ndarray,
+        min_price: np.ndarray,
+        max_price: np.ndarray,
+        modal_price: np.ndarray,
+        pair_order: Optional[np.ndarray] = None,
+        date_order: Optional[np.ndarray] = None,
+        sorted_dates: Optional[np.ndarray] = None,
+    ):
+        self._set_tables(states, districts, markets, commodities, varieties)
+        self.state_codes = state_codes
+        self.district_codes = district_codes
+        self.market_codes = market_codes
+        self.commodity_codes = commodity_codes
+        self.variety_codes = variety_codes
+        self.dates = dates
+        self.min_price = min_price
+        self.max_price = max_price
+        self.modal_price = modal_price
+        # Rows past base_rows were merged from the live API rather than the CSV
+        self.base_rows = len(dates)
+        self._build_indexes(pair_order, date_order, sorted_dates)
+
+    def _set_tables(self, states: List[str], districts: List[str], markets: List[str],
+                    commodities: List[str], varieties: List[str]):
+        self.states = states
+        self.districts = districts
+        self.markets = markets
+        self.commodities = commodities
+        self.varieties = varieties
+        self._markets_lower = [m.lower() for m in markets]
+        self._commodities_lower = [c.lower() for c in commodities]
+        self._filters: Optional[Dict] = None
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def _build_indexes(
+        self,
+        pair_order: Optional[np.ndarray] = None,
+        date_order: Optional[np.ndarray] = None,
+        sorted_dates: Optional[np.ndarray] = None,
+    ):
+        """Build the (commodity, market) and date indexes, reusing sort orders if given"""
+        # Group rows by (commodity, market), date ascending, file order within a date
+        if pair_order is None:
+            rows = np.arange(len(self.dates), dtype=np.int64)
+            pair_order = np.lexsort((rows, self.dates, self.market_codes, self.commodity_codes))
+        order = self.pair_order = pair_order
+        self.by_pair: Dict[Tuple[int, int], np.ndarray] = {}
+        self.markets_by_commodity: Dict[int, List[int]] = {}
+        if len(order):
+            c = self.commodity_codes[order]
+            m = self.market_codes[order]
+            breaks = np.flatnonzero((c[1:] != c[:-1]) | (m[1:] != m[:-1])) + 1
+            starts = np.concatenate(([0], breaks))
+            ends = np.concatenate((breaks, [len(order)]))
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                key = (int(c[start]), int(m[start]))
+                self.by_pair[key] = order[start:end]
+                self.markets_by_commodity.setdefault(key[0], []).append(key[1])
+
+        # Date index: row ids sorted by date, probed with searchsorted
+        if date_order is None:
+            date_order = np.argsort(self.dates, kind="stable")
+        self.date_order = date_order
+        self.sorted_dates = self.dates[date_order] if sorted_dates is None else sorted_dates
+
+    # ------------------------------------------------------------------
+    # Name resolution
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _match(table: List[str], name: str, bidirectional: bool) -> List[int]:
+        needle = name.lower()
+        if bidirectional:
+            return [i for i, v in enumerate(table) if needle in v or v in needle]
+        return [i for i, v in enumerate(table) if needle in v]
+
+    def match_commodities(self, crop: str, bidirectional: bool = True) -> List[int]:
+        """Commodity codes whose name contains (or is contained in) crop"""
+        return self._match(self._commodities_lower, crop, bidirectional)
+
+    def match_markets(self, market: str, bidirectional: bool = True) -> List[int]:
+        """Market codes whose name contains (or is contained in) market"""
+        return self._match(self._markets_lower, market, bidirectional)
+
+    def _pair_rows(self, crop: str, market: Optional[str], bidirectional: bool) -> List[np.ndarray]:
+        """Row groups for every (commodity, market) pair matching the query"""
+        commodity_codes = self.match_commodities(crop, bidirectional)
+        market_filter = set(self.match_markets(market, bidirectional)) if market else None
+
+        groups = []
+        for c in commodity_codes:
+            for m in self.markets_by_commodity.get(c, []):
+                if market_filter is None or m in market_filter:
+                    groups.append(self.by_pair[(c, m)])
+        return groups
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def rows_between(self, start: datetime.date, end: datetime.date) -> np.ndarray:
+        """Row ids with start <= date <= end, in date order"""
+        lo = np.searchsorted(self.sorted_dates, date_to_days(start), side="left")
+        hi = np.searchsorted(self.sorted_dates, date_to_days(end), side="right")
+        return self.date_order[lo:hi]
+
+    def history(self, crop: str, market: Optional[str] = None, limit: int = 30) -> np.ndarray:
+        """
+        Row ids of the latest `limit` rows for crop (and optionally market),
+        sorted by date then file order.
+        """
+        groups = self._pair_rows(crop, market, bidirectional=True)
+        if not groups or limit <= 0:
+            return np.empty(0, dtype=np.int64)
+
+        # Each group is already date sorted, so only its tail can survive the cut
+        candidates = np.concatenate([g[-limit:] for g in groups])
+        candidates = candidates[np.lexsort((candidates, self.dates[candidates]))]
+        return candidates[-limit:]
+
+    def latest(self, crop: str, market: str) -> Optional[int]:
+        """Row id of the most recent entry for crop in market, or None"""
+        groups = self._pair_rows(crop, market, bidirectional=False)
+        if not groups:
+            return None
+
+        # Tail of each group is its newest date; earliest row wins a tie
+        best = None
+        for g in groups:
+            last_date = self.dates[g[-1]]
+            first_of_day = g[np.searchsorted(self.dates[g], last_date, side="left")]
+            if best is None or (last_date, -first_of_day) > (self.dates[best], -best):
+                best = int(first_of_day)
+        return best
+
+    def filters(self) -> Dict[str, Dict[str, List[str]]]:
+        """District -> market -> sorted commodities, computed once"""
+        if self._filters is None:
+            triples = np.unique(
+                np.stack([self.district_codes, self.market_codes, self.commodity_codes], axis=1),
+                axis=0,
+            ) if len(self.dates) else np.empty((0, 3), dtype=np.int32)
+
+            filters: Dict[str, Dict[str, set]] = {}
+            for d, m, c in triples.tolist():
+                filters.setdefault(self.districts[d], {}).setdefault(self.markets[m], set()).add(self.commodities[c])
+            self._filters = {
+                district: {market: sorted(crops) for market, crops in markets.items()}
+                for district, markets in filters.items()
+            }
+        return self._filters
+
+    def row(self, i: int) -> Dict:
+        """Materialize a single row as a plain dict"""
+        return {
+            "state": self.states[self.state_codes[i]],
+            "district": self.districts[self.district_codes[i]],
+            "market": self.markets[self.market_codes[i]],
+            "commodity": self.commodities[self.commodity_codes[i]],
+            "variety": self.varieties[self.variety_codes[i]],
+            "date": days_to_date(int(self.dates[i])),
+            "min_price": float(self.min_price[i]),
+            "max_price": float(self.max_price[i]),
+            "modal_price": float(self.modal_price[i]),
+            "live": i >= self.base_rows,
+        }
+
+    def repriced_rows(self, old: "PriceStore") -> np.ndarray:
+        """Row ids of old whose prices differ in this store (derived from old with with_rows)"""
+        n = len(old)
+        return np.flatnonzero(
+            (self.modal_price[:n] != old.modal_price[:n])
+            | (self.min_price[:n] != old.min_price[:n])
+            | (self.max_price[:n] != old.max_price[:n])
+        )
+
+    def with_rows(self, rows: List[Dict], updates: Optional[Dict[int, Dict]] = None) -> "PriceStore":
+        """
+        Store with rows appended and the prices of existing row ids replaced.
+        Rows use the keys returned by row(). This store's columns are not
+        copied: the changes go into a small overlay on top of them, so a
+        memory-mapped base stays shared between workers.
+        """
+        return OverlayPriceStore(self).with_rows(rows, updates)
+
+
+PRICE_COLUMNS = ("min_price", "max_price", "modal_price")
+CODE_COLUMNS = ("state", "district", "market", "commodity", "variety")
+# Row key -> its string table
+_TABLES = {"state": "states", "district": "districts", "market": "markets", "commodity": "commodities",
+           "variety": "varieties"}
+
+
+class _LayeredColumn:
+    """
+    One column of an overlay store read through to the base: row ids below
+    len(base) come from the base (with the prices of overridden rows replaced),
+    the rest from the live rows. Indexed like the NumPy column it stands in for.
+    """
+
+    def __init__(self, base: np.ndarray, live: np.ndarray,
+                 override_rows: Optional[np.ndarray] = None, override_values: Optional[np.ndarray] = None):
+        self.base = base
+        self.live = live
+        self.override_rows = override_rows
+        self.override_values = override_values
+        self.dtype = live.dtype
+
+    def __len__(self) -> int:
+        return len(self.base) + len(self.live)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            index = np.arange(len(self))[index]
+        scalar = np.ndim(index) == 0
+        rows = np.atleast_1d(np.asarray(index, dtype=np.int64))
+        n = len(self.base)
+        out = np.empty(len(rows), dtype=self.dtype)
+        in_base = rows < n
+        out[in_base] = self.base[rows[in_base]]
+        out[~in_base] = self.live[rows[~in_base] - n]
+        if self.override_rows is not None and len(self.override_rows):
+            pos = np.minimum(np.searchsorted(self.override_rows, rows), len(self.override_rows) - 1)
+            hit = self.override_rows[pos] == rows
+            out[hit] = self.override_values[pos[hit]]
+        return out[0] if scalar else out
+
+    def __array__(self, dtype=None, copy=None):
+        column = self[:]
+        return column if dtype is None else column.astype(dtype)
+
+
+class _OverlayPairs(Mapping):
+    """(commodity, market) -> row ids of an overlay store, merging a pair's live rows in on access"""
+
+    def __init__(self, base: Dict[Tuple[int, int], np.ndarray], live: Dict[Tuple[int, int], np.ndarray],
+                 dates: _LayeredColumn):
+        self.base = base
+        self.live = live
+        self.dates = dates
+
+    def __getitem__(self, key: Tuple[int, int]) -> np.ndarray:
+        base, live = self.base.get(key), self.live.get(key)
+        if live is None:
+            return self.base[key]
+        if base is None:
+            return live
+        # Live row ids follow every base row id, so a stable sort keeps row order within a date
+        rows = np.concatenate((base, live))
+        return rows[np.argsort(self.dates[rows], kind="stable")]
+
+    def __contains__(self, key) -> bool:
+        return key in self.base or key in self.live
+
+    def __iter__(self):
+        yield from self.base
+        yield from (key for key in self.live if key not in self.base)
+
+    def __len__(self) -> int:
+        return len(self.base) + sum(1 for key in self.live if key not in self.base)
+
+
+class OverlayPriceStore(PriceStore):
+    """
+    A base PriceStore (usually the memory-mapped snapshot) plus the rows merged
+    from the live API: appended rows and new prices for base rows are kept in
+    small private arrays, and every lookup reads through to the base. Row ids
+    0..len(base)-1 are the base's, live rows follow.
+    """
+
+    def __init__(self, base: PriceStore, tables: Optional[Dict[str, List[str]]] = None,
+                 live: Optional[Dict[str, np.ndarray]] = None, overrides: Optional[Dict[int, Tuple[float, ...]]] = None):
+        self.base = base
+        tables = tables or {name: list(getattr(base, _TABLES[name])) for name in CODE_COLUMNS}
+        self._set_tables(*(tables[name] for name in CODE_COLUMNS))
+        self.live = live or {
+            **{f"{name}_codes": np.empty(0, dtype=np.int32) for name in CODE_COLUMNS},
+            "dates": np.empty(0, dtype=np.int32),
+            **{name: np.empty(0, dtype=np.float64) for name in PRICE_COLUMNS},
+        }
+        # Base row id -> (min, max, modal) replacing the base's prices
+        self.overrides = overrides or {}
+        self.base_rows = len(base)
+
+        for name in CODE_COLUMNS:
+            column = f"{name}_codes"
+            setattr(self, column, _LayeredColumn(getattr(base, column), self.live[column]))
+        self.dates = _LayeredColumn(base.dates, self.live["dates"])
+        override_rows = np.asarray(sorted(self.overrides), dtype=np.int64)
+        override_values = np.asarray([self.overrides[i] for i in override_rows.tolist()], dtype=np.float64).reshape(-1, 3)
+        for j, name in enumerate(PRICE_COLUMNS):
+            setattr(self, name, _LayeredColumn(getattr(base, name), self.live[name], override_rows, override_values[:, j]))
+
+        # Indexes over the live rows only; lookups merge them with the base's
+        n = len(base)
+        live_dates = self.live["dates"]
+        order = n + np.lexsort((live_dates, self.live["market_codes"], self.live["commodity_codes"]))
+        live_pairs: Dict[Tuple[int, int], np.ndarray] = {}
+        if len(order):
+            c = self.live["commodity_codes"][order - n]
+            m = self.live["market_codes"][order - n]
+            breaks = np.flatnonzero((c[1:] != c[:-1]) | (m[1:] != m[:-1])) + 1
+            for start, rows in zip(np.concatenate(([0], breaks)).tolist(), np.split(order, breaks)):
+                live_pairs[(int(c[start]), int(m[start]))] = rows
+        self.by_pair = _OverlayPairs(base.by_pair, live_pairs, self.dates)
+        self.markets_by_commodity = {c: list(markets) for c, markets in base.markets_by_commodity.items()}
+        for c, m in live_pairs:
+            if (c, m) not in base.by_pair:
+                self.markets_by_commodity.setdefault(c, []).append(m)
+        self._live_date_order = n + np.argsort(live_dates, kind="stable")
+        self._live_sorted_dates = live_dates[self._live_date_order - n]
+
+    def rows_between(self, start: datetime.date, end: datetime.date) -> np.ndarray:
+        lo = np.searchsorted(self._live_sorted_dates, date_to_days(start), side="left")
+        hi = np.searchsorted(self._live_sorted_dates, date_to_days(end), side="right")
+        rows = np.concatenate((self.base.rows_between(start, end), self._live_date_order[lo:hi]))
+        return rows[np.argsort(self.dates[rows], kind="stable")]
+
+    def filters(self) -> Dict[str, Dict[str, List[str]]]:
+        if self._filters is None:
+            filters = {
+                district: {market: set(crops) for market, crops in markets.items()}
+                for district, markets in self.base.filters().items()
+            }
+            triples = zip(self.live["district_codes"].tolist(), self.live["market_codes"].tolist(),
+                          self.live["commodity_codes"].tolist())
+            for d, m, c in set(triples):
+                filters.setdefault(self.districts[d], {}).setdefault(self.markets[m], set()).add(self.commodities[c])
+            self._filters = {
+                district: {market: sorted(crops) for market, crops in markets.items()}
+                for district, markets in filters.items()
+            }
+        return self._filters
+
+    def repriced_rows(self, old: PriceStore) -> np.ndarray:
+        if old is not self.base and getattr(old, "base", None) is not self.base:
+            return super().repriced_rows(old)
+        # Only overridden base rows and live rows can differ from the base or an earlier overlay
+        n = len(old)
+        candidates = np.union1d(
+            np.fromiter({*self.overrides, *getattr(old, "overrides", {})}, dtype=np.int64),
+            np.arange(self.base_rows, n, dtype=np.int64),
+        )
+        candidates = candidates[candidates < n]
+        differs = np.zeros(len(candidates), dtype=bool)
+        for name in PRICE_COLUMNS:
+            differs |= getattr(self, name)[candidates] != getattr(old, name)[candidates]
+        return candidates[differs]
+
+    def with_rows(self, rows: List[Dict], updates: Optional[Dict[int, Dict]] = None) -> "PriceStore":
+        tables = {name: list(getattr(self, _TABLES[name])) for name in CODE_COLUMNS}
+        lookup = {name: {v: i for i, v in enumerate(table)} for name, table in tables.items()}
+        new_codes = {name: [] for name in tables}
+        for row in rows:
+            for name, table in tables.items():
+                value = row.get(name, "")
+                code = lookup[name].get(value)
+                if code is None:
+                    code = lookup[name][value] = len(table)
+                    table.append(value)
+                new_codes[name].append(code)
+
+        def extend(column: np.ndarray, values: List) -> np.ndarray:
+            return np.concatenate([column, np.asarray(values, dtype=column.dtype)])
+
+        live = {f"{name}_codes": extend(self.live[f"{name}_codes"], new_codes[name]) for name in CODE_COLUMNS}
+        live["dates"] = extend(self.live["dates"], [date_to_days(r["date"]) for r in rows])
+        for name in PRICE_COLUMNS:
+            live[name] = extend(self.live[name], [r[name] for r in rows])
+
+        overrides = dict(self.overrides)
+        for i, row in (updates or {}).items():
+            if i < self.base_rows:
+                overrides[i] = tuple(float(row[name]) for name in PRICE_COLUMNS)
+            else:
+                for name in PRICE_COLUMNS:
+                    live[name][i - self.base_rows] = row[name]
+
+        return OverlayPriceStore(self.base, tables, live, overrides)
+
+
+EPOCH = datetime.date(1970, 1, 1)
+
+
+def date_to_days(d: datetime.date) -> int:
+    return (d - EPOCH).days
+
+
+def days_to_date(days: int) -> datetime.date:
+    return EPOCH + datetime.timedelta(days=days)
+
+
+def _read_csv_columns(csv_path: Path) -> Dict:
+    """Single pass over the CSV into dictionary-encoded column lists"""
+    tables = {"State": {}, "District": {}, "Market": {}, "Commodity": {}, "Variety": {}}
+    columns = {name: [] for name in tables}
+    columns.update({"dates": [], "min_price": [], "max_price": [], "modal_price": []})
+    parsed_dates: Dict[str, int] = {}
+
+    with open(csv_path, mode='r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader, [])]
+        col = {name: i for i, name in enumerate(header)}
+        for raw in reader:
+            row = [v.strip() for v in raw]
+            try:
+                names = {name: row[col[name]] if name in col else "" for name in tables}
+                if not names["District"] or not names["Market"] or not names["Commodity"]:
+                    continue
+
+                # Dates repeat across thousands of rows, parse each string once
+                date_str = row[col['Arrival_Date']]
+                day = parsed_dates.get(date_str)
+                if day is None:
+                    day = date_to_days(datetime.datetime.strptime(date_str, "%d-%m-%Y").date())
+                    parsed_dates[date_str] = day
+
+                prices = (
+                    float(row[col['Min_Price']] or 0),
+                    float(row[col['Max_Price']] or 0),
+                    float(row[col['Modal_Price']] or 0),
+                )
+            except (ValueError, KeyError, IndexError):
+                continue
+
+            for name, value in names.items():
+                table = tables[name]
+                columns[name].append(table.setdefault(value, len(table)))
+            columns["dates"].append(day)
+            columns["min_price"].append(prices[0])
+            columns["max_price"].append(prices[1])
+            columns["modal_price"].append(prices[2])
+
+    columns["tables"] = {name: list(table) for name, table in tables.items()}
+    return columns
+
+
+def _columns_to_store(columns: Dict) -> PriceStore:
+    tables = columns["tables"]
+    return PriceStore(
+        states=tables["State"],
+        districts=tables["District"],
+        markets=tables["Market"],
+        commodities=tables["Commodity"],
+        varieties=tables["Variety"],
+        state_codes=np.asarray(columns["State"], dtype=np.int32),
+        district_codes=np.asarray(columns["District"], dtype=np.int32),
+        market_codes=np.asarray(columns["Market"], dtype=np.int32),
+        commodity_codes=np.asarray(columns["Commodity"], dtype=np.int32),
+        variety_codes=np.asarray(columns["Variety"], dtype=np.int32),
+        dates=np.asarray(columns["dates"], dtype=np.int32),
+        min_price=np.asarray(columns["min_price"], dtype=np.float64),
+        max_price=np.asarray(columns["max_price"], dtype=np.float64),
+        modal_price=np.asarray(columns["modal_price"], dtype=np.float64),
+    )
+
+
+def _empty_store() -> PriceStore:
+    columns = {name: [] for name in ("State", "District", "Market", "Commodity", "Variety",
+                                     "dates", "min_price", "max_price", "modal_price")}
+    columns["tables"] = {name: [] for name in ("State", "District", "Market", "Commodity", "Variety")}
+    return _columns_to_store(columns)
+
+
+# =============================================================================
+# BINARY SNAPSHOT - columnar .npy files memory-mapped read-only
+# =============================================================================
+# A snapshot is a directory named after the CSV's sha256. Every uvicorn worker
+# maps the same files, so the pages live once in the OS page cache instead of
+# once per process, and a changed CSV simply hashes to a new directory.
+
+SNAPSHOT_VERSION = 2
+SNAPSHOT_ARRAYS = (
+    "state_codes", "district_codes", "market_codes", "commodity_codes", "variety_codes",
+    "dates", "min_price", "max_price", "modal_price", "pair_order", "date_order", "sorted_dates",
+)
+
+
+def dataset_digest(csv_path: Path) -> str:
+    """sha256 of the source CSV"""
+    h = hashlib.sha256()
+    with open(csv_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def snapshot_path(csv_path: Path, digest: str) -> Path:
+    return csv_path.parent / f"{csv_path.stem}.{digest[:16]}.v{SNAPSHOT_VERSION}.snapshot"
+
+
+def build_snapshot(csv_path: Path = DATASET_PATH, digest: Optional[str] = None) -> Path:
+    """Compile the CSV into a snapshot directory and return its path"""
+    digest = digest or dataset_digest(csv_path)
+    target = snapshot_path(csv_path, digest)
+    if target.exists():
+        return target
+
+    store = _columns_to_store(_read_csv_columns(csv_path))
+    tmp = Path(tempfile.mkdtemp(prefix=f".{target.name}.", dir=csv_path.parent))
+    try:
+        for name in SNAPSHOT_ARRAYS:
+            np.save(tmp / f"{name}.npy", np.ascontiguousarray(getattr(store, name)))
+        meta = {
+            "version": SNAPSHOT_VERSION,
+            "source_sha256": digest,
+            "rows": len(store),
+            "states": store.states,
+            "districts": store.districts,
+            "markets": store.markets,
+            "commodities": store.commodities,
+            "varieties": store.varieties,
+        }
+        with open(tmp / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        # Another worker may have finished the same snapshot first; theirs is identical
+        try:
+            os.rename(tmp, target)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    # Drop snapshots of older CSV versions
+    for old in csv_path.parent.glob(f"{csv_path.stem}.*.snapshot"):
+        if old != target:
+            shutil.rmtree(old, ignore_errors=True)
+
+    print(f"Built price snapshot {target.name} ({len(store)} rows)")
+    return target
+
+
+def open_snapshot(path: Path) -> PriceStore:
+    """Memory-map a snapshot directory read-only"""
+    with open(path / "meta.json", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {meta.get('version')}")
+
+    arrays = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in SNAPSHOT_ARRAYS}
+    return PriceStore(
+        states=meta["states"],
+        districts=meta["districts"],
+        markets=meta["markets"],
+        commodities=meta["commodities"],
+        varieties=meta["varieties"],
+        **arrays,
+    )
+
+
+def load_price_store(csv_path: Path = DATASET_PATH) -> PriceStore:
+    """Open the snapshot for Dataset.csv, building it first if the CSV changed"""
+    if not csv_path.exists():
+        print(f"CSV not found at {csv_path}, price store is empty")
+        return _empty_store()
+
+    try:
+        store = open_snapshot(build_snapshot(csv_path))
+        print(f"Price store mapped: {len(store)} rows, {len(store.markets)} markets, {len(store.commodities)} commodities")
+        return store
+    except Exception as e:
+        print(f"Snapshot Error: {e}, parsing CSV directly")
+
+    try:
+        store = _columns_to_store(_read_csv_columns(csv_path))
+    except Exception as e:
+        print(f"CSV Error: {e}")
+        return _empty_store()
+    print(f"Price store loaded: {len(store)} rows, {len(store.markets)} markets, {len(store.commodities)} commodities")
+    return store
+
+
+_STORE: Optional[PriceStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_price_store() -> PriceStore:
+    """Shared PriceStore, loaded on first use"""
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                _STORE = load_price_store()
+    return _STORE
+
+
+def set_price_store(store: PriceStore):
+    """Swap in a new PriceStore (e.g. after merging live records)"""
+    global _STORE
+    with _STORE_LOCK:
+        _STORE = store
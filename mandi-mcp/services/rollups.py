@@ -0,0 +1,243 @@
+"""
+Price Rollups
+Daily, weekly and monthly OHLC bars per (commodity, market) and per commodity
+across all markets, computed vectorized over the PriceStore and updated
+incrementally when live rows are merged in
+"""
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.price_store import PriceStore, get_price_store, days_to_date
+
+RESOLUTIONS = ("day", "week", "month")
+ALL_MARKETS = -1   # market code of the commodity-wide series
+BAR_FIELDS = ("period", "open", "high", "low", "close", "volume")
+
+# (commodity code, market code or ALL_MARKETS) -> field -> array, one bar per period
+Series = Dict[Tuple[int, int], Dict[str, np.ndarray]]
+
+
+def period_start(days: np.ndarray, resolution: str) -> np.ndarray:
+    """First day (days since epoch) of the day/week/month containing each day; weeks start Monday"""
+    days = np.asarray(days, dtype=np.int64)
+    if resolution == "day":
+        return days
+    if resolution == "week":
+        # 1970-01-01 was a Thursday
+        return days - (days + 3) % 7
+    if resolution == "month":
+        return days.astype("datetime64[D]").astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+    raise ValueError(f"Unknown resolution: {resolution}")
+
+
+def _group_bars(groups: np.ndarray, periods: np.ndarray, bars: Dict[str, np.ndarray]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Merge consecutive entries with the same (group, period) into one bar.
+    Input must be sorted by group, then period, then time.
+    """
+    n = len(groups)
+    if not n:
+        return groups, {"period": periods, **bars}
+    breaks = np.flatnonzero((groups[1:] != groups[:-1]) | (periods[1:] != periods[:-1])) + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.concatenate((breaks, [n]))
+    return groups[starts], {
+        "period": periods[starts],
+        "open": bars["open"][starts],
+        "high": np.maximum.reduceat(bars["high"], starts),
+        "low": np.minimum.reduceat(bars["low"], starts),
+        "close": bars["close"][ends - 1],
+        "volume": np.add.reduceat(bars["volume"], starts),
+    }
+
+
+def _market_daily(store: PriceStore, rows: np.ndarray) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Daily bars per (commodity, market) from rows sorted by commodity, market,
+    date, row (the store's pair order). Open/close are the day's first/last
+    modal price, high/low the extremes of max/min price, volume the report count.
+    """
+    groups = store.commodity_codes[rows].astype(np.int64) * (len(store.markets) + 1) + store.market_codes[rows]
+    modal = store.modal_price[rows]
+    return _group_bars(groups, store.dates[rows].astype(np.int64), {
+        "open": modal,
+        "high": store.max_price[rows],
+        "low": store.min_price[rows],
+        "close": modal,
+        "volume": np.ones(len(rows), dtype=np.int64),
+    })
+
+
+def _commodity_daily(commodities: np.ndarray, daily: Dict[str, np.ndarray]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Daily bars per commodity across markets, from per-market daily bars:
+    open/close average the markets' opens/closes, high/low are the extremes.
+    """
+    if not len(commodities):
+        return commodities, daily
+    order = np.lexsort((daily["period"], commodities))
+    c, period = commodities[order], daily["period"][order]
+    breaks = np.flatnonzero((c[1:] != c[:-1]) | (period[1:] != period[:-1])) + 1
+    starts = np.concatenate(([0], breaks))
+    markets = np.diff(np.concatenate((starts, [len(c)])))
+    return c[starts], {
+        "period": period[starts],
+        "open": np.add.reduceat(daily["open"][order], starts) / markets,
+        "high": np.maximum.reduceat(daily["high"][order], starts),
+        "low": np.minimum.reduceat(daily["low"][order], starts),
+        "close": np.add.reduceat(daily["close"][order], starts) / markets,
+        "volume": np.add.reduceat(daily["volume"][order], starts),
+    }
+
+
+def _resample(groups: np.ndarray, daily: Dict[str, np.ndarray], resolution: str) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Weekly/monthly bars from daily bars sorted by group then day"""
+    if resolution == "day":
+        return groups, daily
+    return _group_bars(groups, period_start(daily["period"], resolution), daily)
+
+
+def _split(keys: List[Tuple[int, int]], groups: np.ndarray, bars: Dict[str, np.ndarray]) -> Series:
+    """Group-sorted bar arrays -> one entry per group"""
+    series: Series = {}
+    if not len(groups):
+        return series
+    breaks = np.flatnonzero(groups[1:] != groups[:-1]) + 1
+    starts = np.concatenate(([0], breaks)).tolist()
+    ends = np.concatenate((breaks, [len(groups)])).tolist()
+    for key, start, end in zip(keys, starts, ends):
+        series[key] = {field: bars[field][start:end] for field in BAR_FIELDS}
+    return series
+
+
+def _build_series(store: PriceStore, pairs: List[Tuple[int, int]], all_pairs: Series) -> Dict[str, Series]:
+    """
+    Bars at every resolution for the given (commodity, market) pairs, plus the
+    commodity-wide series of their commodities (from all_pairs' daily bars,
+    which must already hold the fresh daily bars of these pairs).
+    """
+    result: Dict[str, Series] = {resolution: {} for resolution in RESOLUTIONS}
+    pairs = sorted(pairs)
+    if not pairs:
+        return result
+
+    rows = np.concatenate([store.by_pair[pair] for pair in pairs])
+    groups, daily = _market_daily(store, rows)
+    for resolution in RESOLUTIONS:
+        result[resolution].update(_split(pairs, *_resample(groups, daily, resolution)))
+
+    # Commodity-wide bars from every market's daily bars for the touched commodities
+    merged = {**all_pairs, **result["day"]}
+    commodities = sorted({c for c, _ in pairs})
+    market_series = [(c, merged[(c, m)]) for c in commodities for m in store.markets_by_commodity.get(c, [])]
+    codes = np.concatenate([np.full(len(s["period"]), c, dtype=np.int64) for c, s in market_series])
+    market_daily = {field: np.concatenate([s[field] for _, s in market_series]) for field in BAR_FIELDS}
+    c_groups, c_daily = _commodity_daily(codes, market_daily)
+    keys = [(c, ALL_MARKETS) for c in commodities]
+    for resolution in RESOLUTIONS:
+        result[resolution].update(_split(keys, *_resample(c_groups, c_daily, resolution)))
+    return result
+
+
+class Rollups:
+    """OHLC bars for one PriceStore; lookups are a dict access plus a binary search"""
+
+    def __init__(self, store: PriceStore, series: Optional[Dict[str, Series]] = None):
+        self.store = store
+        if series is None:
+            series = _build_series(store, list(store.by_pair), {})
+        self.series = series
+
+    def updated(self, store: PriceStore) -> "Rollups":
+        """
+        Rollups for a store derived from this one with with_rows(): only pairs
+        with appended or re-priced rows (and their commodity-wide series) are
+        recomputed. Anything else gets a full rebuild.
+        """
+        old = self.store
+        n = len(old)
+        if (len(store) < n or store.markets[:len(old.markets)] != old.markets
+                or store.commodities[:len(old.commodities)] != old.commodities):
+            return Rollups(store)
+
+        changed = np.concatenate((store.repriced_rows(old), np.arange(n, len(store))))
+        if not len(changed):
+            return Rollups(store, self.series)
+
+        pairs = set(zip(store.commodity_codes[changed].tolist(), store.market_codes[changed].tolist()))
+        fresh = _build_series(store, list(pairs), self.series["day"])
+        return Rollups(store, {
+            resolution: {**self.series[resolution], **fresh[resolution]} for resolution in RESOLUTIONS
+        })
+
+    def find_series(self, crop: str, market: Optional[str] = None) -> Optional[Tuple[int, int]]:
+        """
+        (commodity, market) key of the series for a crop and optional market name,
+        or the commodity-wide key without a market. Exact names beat substring matches.
+        """
+        store = self.store
+
+        def best(codes: List[int], table: List[str], name: str) -> List[int]:
+            return sorted(codes, key=lambda code: table[code].lower() != name.lower())
+
+        days = self.series["day"]
+        for commodity in best(store.match_commodities(crop), store.commodities, crop):
+            if not market:
+                if (commodity, ALL_MARKETS) in days:
+                    return commodity, ALL_MARKETS
+                continue
+            for code in best(store.match_markets(market), store.markets, market):
+                if (commodity, code) in days:
+                    return commodity, code
+        return None
+
+    def market_name(self, key: Tuple[int, int]) -> str:
+        return "All markets" if key[1] == ALL_MARKETS else self.store.markets[key[1]]
+
+    def bars(self, commodity: int, market: int, resolution: str, days: int) -> Dict[str, np.ndarray]:
+        """Bars of one series covering its last `days` days"""
+        series = self.series[resolution].get((commodity, market))
+        if series is None:
+            return {field: np.empty(0) for field in BAR_FIELDS}
+        periods = series["period"]
+        last_day = int(series["period"][-1])
+        start = np.searchsorted(periods, period_start(np.asarray([last_day - days + 1]), resolution)[0], side="left")
+        return {field: series[field][start:] for field in BAR_FIELDS}
+
+
+def bars_to_points(bars: Dict[str, np.ndarray], market: str) -> List[Dict]:
+    """Chart points in the /history format"""
+    return [
+        {
+            "date": days_to_date(period).isoformat(),
+            "open": round(o, 2),
+            "high": round(h, 2),
+            "low": round(l, 2),
+            "close": round(c, 2),
+            "volume": v,
+            "market": market,
+            "source": "rollup",
+        }
+        for period, o, h, l, c, v in zip(*(bars[field].tolist() for field in BAR_FIELDS))
+    ]
+
+
+_ROLLUPS: Optional[Rollups] = None
+_ROLLUPS_LOCK = threading.Lock()
+
+
+def get_rollups() -> Rollups:
+    """Rollups for the current price store, updated incrementally when the store is swapped"""
+    global _ROLLUPS
+    store = get_price_store()
+    rollups = _ROLLUPS
+    if rollups is None or rollups.store is not store:
+        with _ROLLUPS_LOCK:
+            if _ROLLUPS is None:
+                _ROLLUPS = Rollups(store)
+            elif _ROLLUPS.store is not store:
+                _ROLLUPS = _ROLLUPS.updated(store)
+            rollups = _ROLLUPS
+    return rollups
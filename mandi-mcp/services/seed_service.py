@@ -3,13 +3,99 @@ Seed Suggestion Service
 Provides seed variety recommendations based on crop, district, and season
 """
 import json
+import threading
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set
 from datetime import datetime
 
+from services.cache import TTLCache
+from translations import COMMODITY_TRANSLATIONS
+
 # Load seeds database
 SEEDS_DB_PATH = Path(__file__).parent.parent / "data" / "seeds_database.json"
 
+# Rendered suggestions / advice text per (crop, district, language, season, db version)
+SEED_RENDER_CACHE = TTLCache("seed_suggestions", ttl=24 * 3600, max_size=1024)
+SEASONS = ("Kharif", "Rabi", "Summer")
+
+
+class SeedsIndex:
+    """Parsed seeds database with lookup indexes, rebuilt only when the file changes"""
+
+    def __init__(self, db: Dict, version: int):
+        self.db = db
+        self.version = version
+        self.seeds: Dict[str, Dict] = db.get("seeds", {})
+
+        # Crop lookup: exact English name, then aliases (Marathi name and
+        # mandi commodity spellings that translate to the same Marathi word)
+        self.by_name = {key.lower(): key for key in self.seeds}
+        self.by_alias: Dict[str, str] = {}
+        for key, crop_data in self.seeds.items():
+            marathi = crop_data.get("marathi_name")
+            if not marathi:
+                continue
+            self.by_alias.setdefault(marathi, key)
+            for commodity, commodity_marathi in COMMODITY_TRANSLATIONS.items():
+                if commodity_marathi == marathi:
+                    self.by_alias.setdefault(commodity.lower(), key)
+
+        # Per crop: season -> variety positions in season, and variety -> lowercased districts
+        self.season_varieties: Dict[str, Dict[str, Set[int]]] = {}
+        self.variety_districts: Dict[str, List[List[str]]] = {}
+        for key, crop_data in self.seeds.items():
+            varieties = crop_data.get("varieties", [])
+            self.season_varieties[key] = {
+                season: {
+                    i for i, v in enumerate(varieties)
+                    if season.lower() in v.get("season", "").lower() or "all" in v.get("season", "").lower()
+                }
+                for season in SEASONS
+            }
+            self.variety_districts[key] = [
+                [d.lower() for d in v.get("suitable_districts", [])] for v in varieties
+            ]
+
+    def find_crop(self, crop: str) -> Optional[str]:
+        """Database key for a crop name, alias, or (as before) substring match"""
+        crop_lower = crop.lower()
+        key = self.by_name.get(crop_lower) or self.by_alias.get(crop_lower) or self.by_alias.get(crop)
+        if key:
+            return key
+        for key in self.seeds:
+            if crop_lower in key.lower():
+                return key
+        return None
+
+    def suits_district(self, crop_key: str, variety_index: int, district: str) -> bool:
+        district_lower = district.lower()
+        return any(
+            district_lower in d or d in district_lower
+            for d in self.variety_districts[crop_key][variety_index]
+        )
+
+_SEEDS_INDEX: Optional[SeedsIndex] = None
+_SEEDS_LOCK = threading.Lock()
+
+
+def get_seeds_index() -> SeedsIndex:
+    """Shared SeedsIndex; reloaded when seeds_database.json's mtime changes"""
+    global _SEEDS_INDEX
+    try:
+        version = SEEDS_DB_PATH.stat().st_mtime_ns
+    except OSError:
+        version = 0
+
+    index = _SEEDS_INDEX
+    if index is None or index.version != version:
+        with _SEEDS_LOCK:
+            if _SEEDS_INDEX is None or _SEEDS_INDEX.version != version:
+                _SEEDS_INDEX = SeedsIndex(load_seeds_database(), version)
+                print(f"Seeds database indexed: {len(_SEEDS_INDEX.seeds)} crops")
+            index = _SEEDS_INDEX
+    return index
+
+
 def load_seeds_database() -> Dict:
     """Load the seeds database from JSON file"""
     try:
@@ -46,19 +132,25 @@ def get_seed_suggestions(
     Returns:
         Dictionary with seed suggestions including varieties, usage, and features
     """
-    db = load_seeds_database()
-    seeds_data = db.get("seeds", {})
-    
-    # Find crop in database (case-insensitive match)
-    crop_lower = crop.lower()
-    crop_data = None
-    crop_key = None
-    
-    for key in seeds_data:
-        if key.lower() == crop_lower or crop_lower in key.lower():
-            crop_data = seeds_data[key]
-            crop_key = key
-            break
+    index = get_seeds_index()
+    current_season = get_current_season()
+    cache_key = ("suggestions", crop.lower(), district, language, current_season, index.version)
+    cached = SEED_RENDER_CACHE.get(cache_key)
+    if cached is None:
+        cached = _render_seed_suggestions(index, crop, district, language, current_season)
+        SEED_RENDER_CACHE.set(cache_key, cached)
+    # Callers add keys (advice_text, audio_url) to the result, so hand out a copy
+    return dict(cached)
+
+def _render_seed_suggestions(
+    index: SeedsIndex,
+    crop: str,
+    district: Optional[str],
+    language: str,
+    current_season: str
+) -> Dict[str, Any]:
+    crop_key = index.find_crop(crop)
+    crop_data = index.seeds.get(crop_key) if crop_key else None
     
     if not crop_data:
         return {
@@ -68,26 +160,21 @@ def get_seed_suggestions(
             "varieties": []
         }
     
-    current_season = get_current_season()
     varieties = crop_data.get("varieties", [])
+    in_season = index.season_varieties[crop_key].get(current_season, set())
     
     # Filter and rank varieties
     ranked_varieties = []
-    for variety in varieties:
+    for i, variety in enumerate(varieties):
         score = 0
         
         # Check season match
-        variety_season = variety.get("season", "")
-        if current_season.lower() in variety_season.lower() or "all" in variety_season.lower():
+        if i in in_season:
             score += 10
         
         # Check district suitability
-        if district:
-            suitable_districts = variety.get("suitable_districts", [])
-            for sd in suitable_districts:
-                if district.lower() in sd.lower() or sd.lower() in district.lower():
-                    score += 5
-                    break
+        if district and index.suits_district(crop_key, i, district):
+            score += 5
         
         ranked_varieties.append((variety, score))
     
@@ -164,8 +251,12 @@ def generate_recommendation(
 
 def get_all_available_crops(language: str = "en") -> List[Dict]:
     """Get list of all crops with seed data available"""
-    db = load_seeds_database()
-    seeds_data = db.get("seeds", {})
+    index = get_seeds_index()
+    cache_key = ("crops", language, index.version)
+    cached = SEED_RENDER_CACHE.get(cache_key)
+    if cached is not None:
+        return list(cached)
+    seeds_data = index.seeds
     
     crops = []
     for crop_name, crop_data in seeds_data.items():
@@ -175,12 +266,23 @@ def get_all_available_crops(language: str = "en") -> List[Dict]:
             "variety_count": len(crop_data.get("varieties", []))
         })
     
-    return sorted(crops, key=lambda x: x["name"])
+    crops = sorted(crops, key=lambda x: x["name"])
+    SEED_RENDER_CACHE.set(cache_key, crops)
+    return list(crops)
 
 def generate_seed_advice_text(crop: str, district: str, language: str = "mr") -> str:
     """
     Generate a comprehensive Marathi advice text about seeds for TTS
     """
+    index = get_seeds_index()
+    cache_key = ("advice", crop.lower(), district, language, get_current_season(), index.version)
+    cached = SEED_RENDER_CACHE.get(cache_key)
+    if cached is None:
+        cached = _render_seed_advice_text(crop, district, language)
+        SEED_RENDER_CACHE.set(cache_key, cached)
+    return cached
+
+def _render_seed_advice_text(crop: str, district: str, language: str) -> str:
     suggestions = get_seed_suggestions(crop, district, language)
     
     if not suggestions.get("found"):
@@ -0,0 +1,163 @@
+"""
+Tree Ensemble
+A gradient-boosted tree classifier as flat node arrays, evaluated with NumPy.
+Built once from an XGBoost JSON model dump by export_crop_model.py, so serving
+needs neither xgboost nor its native library
+"""
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+TREE_CHUNK_ROWS = 1024   # samples walked through the trees at a time (bounds the rows x trees index array)
+
+NODE_ARRAYS = ("feature", "threshold", "left", "default_left", "value")
+FLOAT32_MAX = np.finfo(np.float32).max
+
+
+class TreeEnsemble:
+    """
+    All trees' nodes concatenated: node i goes to left[i] when feature[i] <
+    threshold[i] and to left[i] + 1 (its right child) otherwise; NaN follows
+    default_left. Leaves are their own left child with an infinite threshold
+    and hold their output in value. roots[t] is tree t's first node and
+    tree_class[t] the class whose margin it adds to.
+    """
+
+    def __init__(self, nodes: Dict[str, np.ndarray], roots: np.ndarray, tree_class: np.ndarray,
+                 base_margin: np.ndarray, depth: int, meta: Optional[Dict[str, Any]] = None):
+        self.nodes = nodes
+        self.roots = roots
+        self.tree_class = tree_class
+        self.base_margin = base_margin
+        self.depth = depth
+        self.meta = meta or {}
+        self.n_classes = len(base_margin)
+        # trees x classes indicator, summing leaf outputs into class margins with one matmul
+        self._class_matrix = np.zeros((len(roots), self.n_classes), dtype=np.float64)
+        self._class_matrix[np.arange(len(roots)), tree_class] = 1.0
+
+    @classmethod
+    def from_xgboost_json(cls, dump: Dict[str, Any], meta: Optional[Dict[str, Any]] = None,
+                          iterations: Optional[int] = None) -> "TreeEnsemble":
+        """
+        From Booster.save_raw("json") of a multi:softprob gbtree model, keeping
+        the first `iterations` boosting rounds (all by default)
+        """
+        learner = dump["learner"]
+        objective = learner["objective"]["name"]
+        booster = learner["gradient_booster"]
+        if objective not in ("multi:softprob", "multi:softmax") or booster["name"] != "gbtree":
+            raise ValueError(f"Unsupported model: {booster['name']} / {objective}")
+
+        params = learner["learner_model_param"]
+        n_classes = int(params["num_class"])
+        base_score = np.atleast_1d(np.asarray(json.loads(params["base_score"]), dtype=np.float64))
+        base_margin = np.broadcast_to(base_score, (n_classes,)).copy()
+
+        model = booster["model"]
+        n_trees = len(model["trees"])
+        if iterations is not None:
+            n_trees = int(model["iteration_indptr"][iterations])
+        feature, threshold, left, default_left, value, roots, depths = [], [], [], [], [], [], []
+        offset = 0
+        for tree in model["trees"][:n_trees]:
+            if any(tree.get("split_type", [])):
+                raise ValueError("Categorical splits are not supported")
+            children_left = np.asarray(tree["left_children"], dtype=np.int64)
+            children_right = np.asarray(tree["right_children"], dtype=np.int64)
+            conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+            is_leaf = children_left == -1
+            own = np.arange(len(children_left)) + offset
+            if np.any(children_right[~is_leaf] != children_left[~is_leaf] + 1):
+                raise ValueError("Expected right children to follow left children")
+
+            feature.append(np.where(is_leaf, 0, tree["split_indices"]))
+            threshold.append(np.where(is_leaf, np.float32(np.inf), conditions))
+            left.append(np.where(is_leaf, own, children_left + offset))
+            default_left.append(np.asarray(tree["default_left"], dtype=bool) | is_leaf)
+            # XGBoost keeps a leaf's output in split_conditions
+            value.append(np.where(is_leaf, conditions, 0))
+            roots.append(offset)
+            depths.append(_tree_depth(children_left, children_right))
+            offset += len(children_left)
+
+        nodes = {
+            "feature": np.concatenate(feature).astype(np.int32),
+            "threshold": np.concatenate(threshold).astype(np.float32),
+            "left": np.concatenate(left).astype(np.int32),
+            "default_left": np.concatenate(default_left),
+            "value": np.concatenate(value).astype(np.float32),
+        }
+        return cls(nodes, np.asarray(roots, dtype=np.int32), np.asarray(model["tree_info"][:n_trees], dtype=np.int32),
+                   base_margin, max(depths, default=0), meta)
+
+    def margins(self, X: np.ndarray) -> np.ndarray:
+        """Raw class scores (samples x classes)"""
+        # XGBoost compares in float32. ±inf goes to the largest finite value, which
+        # compares the same against every real threshold but never passes a leaf's
+        # infinite one (inf >= inf would walk off the leaf); NaN stays missing
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if np.isinf(X).any():
+            X = np.clip(X, -FLOAT32_MAX, FLOAT32_MAX)
+        n = self.nodes
+        out = np.empty((len(X), self.n_classes), dtype=np.float64)
+        for start in range(0, len(X), TREE_CHUNK_ROWS):
+            chunk = X[start:start + TREE_CHUNK_ROWS]
+            flat = chunk.ravel()
+            row_start = (np.arange(len(chunk), dtype=np.int64) * X.shape[1])[:, None]
+            missing = np.isnan(flat).any()
+            node = np.broadcast_to(self.roots, (len(chunk), len(self.roots)))
+            for _ in range(self.depth):
+                x = flat[row_start + n["feature"][node]]
+                go_right = x >= n["threshold"][node]
+                if missing:
+                    go_right |= np.isnan(x) & ~n["default_left"][node]
+                # Right child = left child + 1; leaves are their own left child with an infinite threshold
+                node = n["left"][node] + go_right
+            out[start:start + len(chunk)] = n["value"][node].astype(np.float64) @ self._class_matrix
+        return out + self.base_margin
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Softmax of the margins, like XGBClassifier.predict_proba"""
+        margins = self.margins(X)
+        margins -= margins.max(axis=1, keepdims=True)
+        exp = np.exp(margins)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def save(self, path: Path):
+        np.savez_compressed(
+            path,
+            roots=self.roots,
+            tree_class=self.tree_class,
+            base_margin=self.base_margin,
+            depth=np.asarray(self.depth),
+            meta=np.asarray(json.dumps(self.meta)),
+            **{f"node_{name}": self.nodes[name] for name in NODE_ARRAYS},
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "TreeEnsemble":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                nodes={name: data[f"node_{name}"] for name in NODE_ARRAYS},
+                roots=data["roots"],
+                tree_class=data["tree_class"],
+                base_margin=data["base_margin"],
+                depth=int(data["depth"]),
+                meta=json.loads(str(data["meta"])),
+            )
+
+
+def _tree_depth(left: np.ndarray, right: np.ndarray) -> int:
+    """Number of splits on the longest root-to-leaf path"""
+    depth, deepest, stack = {0: 0}, 0, [0]
+    while stack:
+        i = stack.pop()
+        deepest = max(deepest, depth[i])
+        if left[i] != -1:
+            for child in (int(left[i]), int(right[i])):
+                depth[child] = depth[i] + 1
+                stack.append(child)
+    return deepest
@@ -1,34 +1,118 @@
 from gtts import gTTS
 import base64
+import hashlib
 import os
 import io
+import re
+from pathlib import Path
+from typing import Optional
 
-async def generate_marathi_speech(text: str, api_key: str) -> str:
+from services.ai_pool import run_blocking
+from services.cache import TTLCache
+
+# Synthesized audio is content-addressed by sha256(lang, text): an in-memory LRU
+# in front of an on-disk store, served by the /audio endpoint
+AUDIO_CACHE_DIR = Path(os.getenv("AUDIO_CACHE_DIR", Path(__file__).parent.parent / "data" / "audio_cache"))
+AUDIO_MEMORY_CACHE = TTLCache("tts_audio", ttl=24 * 3600, max_size=128)
+# Public origin of the API for absolute audio URLs (e.g. from the MCP server); empty = relative
+AUDIO_BASE_URL = os.getenv("AUDIO_BASE_URL", "").rstrip("/")
+
+_AUDIO_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+def audio_id_for(text: str, lang: str = "mr") -> str:
+    """Content address of the speech for (text, lang)"""
+    return hashlib.sha256(f"{lang}\0{text}".encode("utf-8")).hexdigest()[:32]
+
+
+def audio_url(audio_id: str) -> str:
+    """URL of the /audio endpoint for an audio id ("" when there is no audio)"""
+    return f"{AUDIO_BASE_URL}/audio/{audio_id}.mp3" if audio_id else ""
+
+
+def _audio_path(audio_id: str) -> Path:
+    return AUDIO_CACHE_DIR / f"{audio_id}.mp3"
+
+
+def read_audio(audio_id: str) -> Optional[bytes]:
+    """Cached MP3 bytes for an audio id from memory or disk, or None"""
+    if not _AUDIO_ID.match(audio_id):
+        return None
+
+    audio_bytes = AUDIO_MEMORY_CACHE.get(audio_id)
+    if audio_bytes is not None:
+        return audio_bytes
+
+    path = _audio_path(audio_id)
+    if path.exists():
+        audio_bytes = path.read_bytes()
+        AUDIO_MEMORY_CACHE.set(audio_id, audio_bytes)
+        return audio_bytes
+    return None
+
+
+def _synthesize(text: str, lang: str) -> bytes:
+    """gTTS round trip to MP3 bytes"""
+    # Create a BytesIO buffer
+    mp3_fp = io.BytesIO()
+
+    # Generate speech (lang='mr' for Marathi)
+    tts = gTTS(text=text, lang=lang)
+
+    # Write to buffer
+    tts.write_to_fp(mp3_fp)
+    return mp3_fp.getvalue()
+
+
+def _store_on_disk(audio_id: str, audio_bytes: bytes):
+    """Atomic write so concurrent workers never serve a partial file"""
+    try:
+        AUDIO_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = AUDIO_CACHE_DIR / f".{audio_id}.{os.getpid()}.tmp"
+        tmp.write_bytes(audio_bytes)
+        os.replace(tmp, _audio_path(audio_id))
+    except OSError as e:
+        print(f"TTS cache write error: {e}")
+
+
+async def synthesize_speech(text: str, lang: str = "mr") -> str:
     """
-    Generates audio from text using gTTS (Google Text-to-Speech).
-    Returns base64 encoded audio string.
-    Note: api_key is unused for gTTS but kept for interface consistency.
+    Returns the audio id for text, synthesizing with gTTS only on a cache miss.
+    Returns "" when there is no text or synthesis fails.
     """
     if not text:
         return ""
 
-    try:
-        # Create a BytesIO buffer
-        mp3_fp = io.BytesIO()
-        
-        # Generate speech (lang='mr' for Marathi)
-        tts = gTTS(text=text, lang='mr')
-        
-        # Write to buffer
-        tts.write_to_fp(mp3_fp)
-        
-        # Get bytes and encode to base64
-        mp3_fp.seek(0)
-        audio_bytes = mp3_fp.read()
-        audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
-        
-        return audio_base64
+    audio_id = audio_id_for(text, lang)
+
+    def load_blocking() -> bytes:
+        path = _audio_path(audio_id)
+        if path.exists():
+            return path.read_bytes()
+        audio_bytes = _synthesize(text, lang)
+        _store_on_disk(audio_id, audio_bytes)
+        return audio_bytes
+
+    async def load() -> bytes:
+        return await run_blocking("tts", load_blocking)
 
+    try:
+        await AUDIO_MEMORY_CACHE.get_or_load(audio_id, load)
+        return audio_id
     except Exception as e:
         print(f"TTS Error: {e}")
         return ""
+
+
+async def generate_marathi_speech(text: str, api_key: str) -> str:
+    """
+    Generates audio from text using gTTS (Google Text-to-Speech).
+    Returns base64 encoded audio string.
+    Note: api_key is unused for gTTS but kept for interface consistency.
+    """
+    audio_id = await synthesize_speech(text, "mr")
+    if not audio_id:
+        return ""
+
+    audio_bytes = read_audio(audio_id)
+    return base64.b64encode(audio_bytes).decode('utf-8') if audio_bytes else ""
@@ -1,11 +1,31 @@
-import httpx
+import datetime
 from typing import Dict, Any
 
+from services import http_client
+from services.cache import TTLCache
+
+# Forecasts are cached per ~11 km grid cell (1 decimal degree) and forecast day,
+# so upstream traffic scales with the number of districts, not with requests
+WEATHER_COORD_DECIMALS = 1
+WEATHER_CACHE = TTLCache("weather", ttl=3600, max_size=512)
+
 async def get_weather(lat: float, lon: float) -> Dict[str, Any]:
     """
     Fetches weather data from OpenMeteo for the given coordinates.
     Returns parsed weather info focused on rain and temperature.
     """
+    lat_q = round(lat, WEATHER_COORD_DECIMALS)
+    lon_q = round(lon, WEATHER_COORD_DECIMALS)
+    key = (lat_q, lon_q, datetime.date.today().isoformat())
+
+    try:
+        return await WEATHER_CACHE.get_or_load(key, lambda: fetch_forecast(lat_q, lon_q))
+    except Exception as e:
+        return fallback_weather(str(e))
+
+
+async def fetch_forecast(lat: float, lon: float) -> Dict[str, Any]:
+    """Uncached Open-Meteo call; raises on failure so errors are never cached"""
     url = "https://api.open-meteo.com/v1/forecast"
     params = {
         "latitude": lat,
@@ -14,39 +34,39 @@ async def get_weather(lat: float, lon: float) -> Dict[str, Any]:
         "timezone": "auto",
         "forecast_days": 3
     }
-    
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            daily = data.get("daily", {})
-            
-            # Simple aggregation logic
-            rain_forecast = False
-            max_precip_prob = 0
-            if "precipitation_probability_max" in daily:
-                max_prob = max(daily["precipitation_probability_max"])
-                max_precip_prob = max_prob
-                if max_prob > 40: # Threshold for rain warning
-                    rain_forecast = True
-            
-            avg_temp = 0
-            if "temperature_2m_max" in daily:
-                avg_temp = sum(daily["temperature_2m_max"]) / len(daily["temperature_2m_max"])
-
-            return {
-                "rain_next_3_days": rain_forecast,
-                "max_rain_probability": max_precip_prob,
-                "avg_max_temp": round(avg_temp, 1),
-                "forecast_text": f"Max Rain Prob: {max_precip_prob}%, Temp: {round(avg_temp, 1)}C"
-            }
-
-        except Exception as e:
-            return {
-                "error": str(e),
-                "rain_next_3_days": False,
-                "max_rain_probability": 0,
-                "avg_max_temp": 0
-            }
+
+    response = await http_client.get("open_meteo", url, params=params)
+    response.raise_for_status()
+    data = response.json()
+
+    daily = data.get("daily", {})
+
+    # Simple aggregation logic
+    rain_forecast = False
+    max_precip_prob = 0
+    if "precipitation_probability_max" in daily:
+        max_prob = max(daily["precipitation_probability_max"])
+        max_precip_prob = max_prob
+        if max_prob > 40: # Threshold for rain warning
+            rain_forecast = True
+
+    avg_temp = 0
+    if "temperature_2m_max" in daily:
+        avg_temp = sum(daily["temperature_2m_max"]) / len(daily["temperature_2m_max"])
+
+    return {
+        "rain_next_3_days": rain_forecast,
+        "max_rain_probability": max_precip_prob,
+        "avg_max_temp": round(avg_temp, 1),
+        "forecast_text": f"Max Rain Prob: {max_precip_prob}%, Temp: {round(avg_temp, 1)}C"
+    }
+
+
+def fallback_weather(error: str) -> Dict[str, Any]:
+    """Neutral forecast used when Open-Meteo fails or times out"""
+    return {
+        "error": error,
+        "rain_next_3_days": False,
+        "max_rain_probability": 0,
+        "avg_max_temp": 0
+    }
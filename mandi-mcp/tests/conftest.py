@@ -0,0 +1,7 @@
+"""
+Tests import the app's modules the way api.py does, from the mandi-mcp directory
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
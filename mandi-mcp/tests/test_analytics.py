@@ -0,0 +1,79 @@
+"""
+Price analytics over daily rollup closes: calendar-day windows, trends, and
+recomputing only the series that changed
+"""
+import datetime
+
+import numpy as np
+
+from services.analytics import Analytics, compute_metrics, trend_label
+from services.price_store import date_to_days, days_to_date
+from services.rollups import Rollups
+
+START = date_to_days(datetime.date(2024, 1, 1))
+
+
+def day_series(days, closes):
+    return {"period": START + np.asarray(days, dtype=np.int64), "close": np.asarray(closes, dtype=np.float64)}
+
+
+def expected_metrics(days, closes):
+    """The same metrics, one series at a time in plain Python"""
+    last = days[-1]
+
+    def window(n):
+        return [c for d, c in zip(days, closes) if d > last - n]
+
+    def change(n):
+        before = [c for d, c in zip(days, closes) if d <= last - n]
+        return (closes[-1] / before[-1] - 1) * 100 if before else None
+
+    returns = [np.log(closes[i] / closes[i - 1]) for i in range(1, len(days)) if days[i] > last - 30]
+    return {
+        "ma_7d": np.mean(window(7)),
+        "ma_30d": np.mean(window(30)),
+        "change_7d_pct": change(7),
+        "change_30d_pct": change(30),
+        "volatility_30d_pct": np.std(returns, ddof=1) * 100,
+    }
+
+
+def test_metrics_use_calendar_day_windows_across_gaps():
+    rng = np.random.default_rng(0)
+    # 60 days with market holidays: windows count days, not bars
+    days = [d for d in range(60) if d % 7 != 6 and d not in (40, 41, 55)]
+    closes = (2000 + np.cumsum(rng.normal(scale=40, size=len(days)))).tolist()
+    short_days, short_closes = days[:5], closes[:5]
+    series = {(0, 0): day_series(days, closes), (0, 1): day_series(short_days, short_closes)}
+
+    metrics = compute_metrics(list(series), series)
+    expected = expected_metrics(days, closes)
+    entry = metrics[(0, 0)]
+    for name, value in expected.items():
+        assert entry[name] == round(value, 2), name
+    assert entry["last_date"] == days_to_date(START + days[-1]).isoformat()
+    assert entry["observations"] == len(days)
+    assert entry["trend"] == trend_label(entry["change_7d_pct"])
+
+    # Too short for a 7 or 30-day change: no base close, trend unknown
+    short = metrics[(0, 1)]
+    assert short["change_7d_pct"] is None and short["change_30d_pct"] is None
+    assert short["trend"] == "Unknown"
+    assert short["ma_7d"] == round(np.mean(short_closes), 2)
+
+
+def test_trend_label_thresholds():
+    assert [trend_label(c) for c in (None, 5.0, 4.99, -4.99, -5.0)] == ["Unknown", "Rising", "Stable", "Stable", "Falling"]
+
+
+def test_updated_recomputes_only_rebuilt_series():
+    flat = day_series(range(10), [100.0] * 10)
+    rising = day_series(range(10), [100.0 + 2 * d for d in range(10)])
+    analytics = Analytics(Rollups(None, {"day": {(0, 0): flat, (1, 0): rising}}))
+    assert analytics.metrics[(0, 0)]["trend"] == "Stable"
+
+    falling = day_series(range(12), [100.0 - 2 * d for d in range(12)])
+    updated = analytics.updated(Rollups(None, {"day": {(0, 0): falling, (1, 0): rising}}))
+    assert updated.metrics[(0, 0)]["trend"] == "Falling"
+    assert updated.metrics[(0, 0)]["observations"] == 12
+    assert updated.metrics[(1, 0)] is analytics.metrics[(1, 0)]
@@ -0,0 +1,45 @@
+"""
+Downsampling /history points: a fixed number of real points that keep the close series' shape
+"""
+import datetime
+
+import numpy as np
+
+from services.downsample import downsample_points, lttb_indices, minmax_indices
+
+
+def points(closes):
+    start = datetime.date(2024, 1, 1)
+    return [{"date": (start + datetime.timedelta(days=i)).isoformat(), "close": c} for i, c in enumerate(closes)]
+
+
+def test_short_series_are_returned_as_is():
+    series = points([1.0, 2.0, 3.0])
+    assert downsample_points(series, 10) is series
+    assert downsample_points(series, 0) is series
+
+
+def test_lttb_keeps_the_ends_and_the_spikes():
+    y = np.sin(np.arange(500) / 20.0)
+    y[123], y[377] = 5.0, -5.0
+    keep = lttb_indices(np.arange(500), y, 50)
+    assert len(keep) == 50
+    assert keep[0] == 0 and keep[-1] == 499
+    assert (np.diff(keep) > 0).all()
+    assert {123, 377} <= set(keep.tolist())
+
+
+def test_minmax_keeps_each_buckets_extremes():
+    y = np.asarray([3, 1, 4, 1, 5, 9, 2, 6, 5, 3, 5, 8], dtype=np.float64)
+    # Three buckets of four points: lowest and highest of each, first one on ties
+    assert minmax_indices(y, 6).tolist() == [1, 2, 5, 6, 9, 11]
+
+
+def test_downsampled_points_are_the_original_dicts_in_date_order():
+    series = points(np.cos(np.arange(365) / 10.0).tolist())
+    for method in ("lttb", "minmax"):
+        kept = downsample_points(series, 60, method)
+        assert 0 < len(kept) <= 60
+        assert all(any(p is q for q in series) for p in kept)
+        assert [p["date"] for p in kept] == sorted(p["date"] for p in kept)
+    assert max(p["close"] for p in downsample_points(series, 60, "minmax")) == max(p["close"] for p in series)
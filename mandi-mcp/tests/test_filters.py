@@ -0,0 +1,20 @@
+"""
+/filters: a failed first load still serves the store's filters
+"""
+import asyncio
+
+import api
+from services import cache
+
+FALLBACK = {"Pune": {"Pune": ["Onion"]}}
+
+
+def test_failed_first_load_falls_back_to_store_filters(monkeypatch):
+    async def failing_load():
+        raise RuntimeError("sync failed")
+
+    monkeypatch.setattr(cache, "CACHES", dict(cache.CACHES))
+    monkeypatch.setattr(api, "FILTERS_CACHE", cache.StaleWhileRevalidate("filters-test", failing_load, ttl=3600))
+    monkeypatch.setattr(api, "get_fallback_filters", lambda: FALLBACK)
+    assert asyncio.run(api.get_maharashtra_filters()) == FALLBACK
+    assert asyncio.run(api.get_localized_filters("en")) == FALLBACK
@@ -0,0 +1,130 @@
+"""
+Hedged reads in services.http_client: the first successful attempt wins
+"""
+import asyncio
+
+import pytest
+
+from services import http_client
+
+UPSTREAM = "open_meteo"
+
+
+def run_hedged(monkeypatch, outcomes):
+    """
+    Call http_client.get with a hedge after 10ms. Both attempts finish together
+    once released; outcomes[i] is the i-th attempt's result, or an exception to raise.
+    """
+    release = asyncio.Event()
+    calls = []
+
+    async def attempt(name, url, kwargs):
+        outcome = outcomes[len(calls)]
+        calls.append(outcome)
+        await release.wait()
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    async def scenario():
+        async def release_later():
+            await asyncio.sleep(0.05)
+            release.set()
+
+        releaser = asyncio.ensure_future(release_later())
+        try:
+            return await http_client.get(UPSTREAM, "/v1/forecast")
+        finally:
+            await releaser
+
+    monkeypatch.setattr(http_client, "_attempt", attempt)
+    monkeypatch.setattr(http_client, "_hedge_delay", lambda name: 0.01)
+    monkeypatch.setattr(http_client, "_hedge_allowed", lambda name: True)
+    monkeypatch.setattr(http_client.BREAKERS[UPSTREAM], "allow", lambda: True)
+    result = asyncio.run(scenario())
+    assert len(calls) == 2
+    return result
+
+
+def test_hedge_success_wins_when_first_attempt_fails_together(monkeypatch):
+    assert run_hedged(monkeypatch, [RuntimeError("first failed"), "second ok"]) == "second ok"
+
+
+def test_hedge_success_wins_when_hedge_fails_together(monkeypatch):
+    assert run_hedged(monkeypatch, ["first ok", RuntimeError("hedge failed")]) == "first ok"
+
+
+def test_hedge_raises_when_both_attempts_fail(monkeypatch):
+    with pytest.raises(RuntimeError, match="first failed"):
+        run_hedged(monkeypatch, [RuntimeError("first failed"), RuntimeError("hedge failed")])
+
+
+def test_cancelled_caller_cancels_the_pending_attempt(monkeypatch):
+    cancelled = asyncio.Event()
+
+    async def attempt(name, url, kwargs):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def scenario():
+        call = asyncio.ensure_future(http_client.get(UPSTREAM, "/v1/forecast"))
+        await asyncio.sleep(0.01)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        await asyncio.sleep(0)
+        return cancelled.is_set()
+
+    monkeypatch.setattr(http_client, "_attempt", attempt)
+    monkeypatch.setattr(http_client, "_hedge_delay", lambda name: 1.0)
+    monkeypatch.setattr(http_client.BREAKERS[UPSTREAM], "allow", lambda: True)
+    assert asyncio.run(scenario())
+
+
+def test_hedge_budget_does_not_accumulate_over_healthy_requests(monkeypatch):
+    delay = {"attempt": 0.0}
+
+    async def attempt(name, url, kwargs):
+        await asyncio.sleep(delay["attempt"])
+        return "ok"
+
+    async def calls(n):
+        for _ in range(n):
+            await http_client.get(UPSTREAM, "/v1/forecast")
+
+    monkeypatch.setattr(http_client, "_attempt", attempt)
+    monkeypatch.setattr(http_client, "_hedge_delay", lambda name: 0.001)
+    monkeypatch.setattr(http_client.BREAKERS[UPSTREAM], "allow", lambda: True)
+    monkeypatch.setitem(http_client._HEDGE_TOKENS, UPSTREAM, 0.0)
+    monkeypatch.setitem(http_client._STATS, UPSTREAM, dict(http_client._STATS[UPSTREAM], hedges_fired=0))
+
+    # A long healthy stretch saves up at most HEDGE_BURST hedges...
+    asyncio.run(calls(1000))
+    # ...so a slowdown afterwards hedges that many plus HEDGE_BUDGET of its own requests
+    delay["attempt"] = 0.005
+    asyncio.run(calls(100))
+    fired = http_client._STATS[UPSTREAM]["hedges_fired"]
+    assert fired <= http_client.HEDGE_BURST + 100 * http_client.HEDGE_BUDGET
+
+
+def test_cancelled_loser_records_its_latency(monkeypatch):
+    class SlowClient:
+        async def get(self, url, **kwargs):
+            await asyncio.sleep(10)
+
+    breaker = http_client.BREAKERS[UPSTREAM]
+    monkeypatch.setattr(breaker, "_latencies", type(breaker._latencies)(maxlen=breaker._latencies.maxlen))
+    monkeypatch.setattr(http_client, "get_client", lambda name: SlowClient())
+
+    async def scenario():
+        attempt = asyncio.ensure_future(http_client._attempt(UPSTREAM, "/v1/forecast", {}))
+        await asyncio.sleep(0.05)
+        attempt.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await attempt
+
+    asyncio.run(scenario())
+    assert len(breaker._latencies) == 1 and breaker._latencies[0] >= 0.05
@@ -0,0 +1,31 @@
+"""
+Mandi lookups: district-level positions tie, ties break the same way every time,
+and far queries find the same points as a full scan
+"""
+import numpy as np
+
+from services import geo_index
+from services.location_service import MandiIndex, get_district_coords
+
+
+def test_district_mandis_tie_with_the_district_named_mandi_first():
+    filters = {"Pune": {"Junnar": ["Onion"], "Pune(Pimpri)": ["Onion"], "Pune": ["Onion"]}}
+    for order in (filters, {"Pune": dict(reversed(list(filters["Pune"].items())))}):
+        index = MandiIndex(order, [])
+        lat, lon = get_district_coords("Pune")
+        nearest = index.nearest_mandis(lat + 0.05, lon, k=3)
+        assert [m["name"] for m in nearest] == ["Pune", "Pune(Pimpri)", "Junnar"]
+        assert len({m["distance_km"] for m in nearest}) == 1
+        assert all(m["position"] == "district" for m in nearest)
+
+
+def test_grid_scan_matches_a_full_scan_for_queries_far_from_the_data(monkeypatch):
+    rng = np.random.default_rng(0)
+    lats, lons = rng.uniform(15.6, 22.1, 500), rng.uniform(72.6, 80.9, 500)
+    index = geo_index.GeoIndex(lats, lons)
+    for lat, lon in [(18.5, 73.8), (-40.0, -120.0), (60.0, 150.0), (18.5, 100.0)]:
+        expected = index.nearest(lat, lon, k=5)
+        monkeypatch.setattr(geo_index, "BRUTE_FORCE_POINTS", 0)
+        assert index.nearest(lat, lon, k=5) == expected
+        assert index.nearest(lat, lon, k=5, max_km=500) == [p for p in expected if p[1] <= 500]
+        monkeypatch.undo()
@@ -0,0 +1,55 @@
+"""
+Advice pipeline: analytics runs alongside price and weather under its own deadline
+"""
+import asyncio
+
+from services import pipeline
+
+PRICE = {"market": "Pune", "crop": "Onion", "modal_price_kg": 20}
+WEATHER = {"max_rain_probability": 10}
+
+
+def run_pipeline(monkeypatch, analytics_delay, analytics_deadline=0.2):
+    seen = {}
+
+    async def advice(price_data, weather_data, api_key, analytics=None):
+        seen["analytics"] = analytics
+        return "सल्ला"
+
+    async def speech(text, lang):
+        return "audio"
+
+    async def delayed(value, delay):
+        await asyncio.sleep(delay)
+        return value
+
+    monkeypatch.setattr(pipeline, "generate_advice", advice)
+    monkeypatch.setattr(pipeline, "is_usable_advice", lambda text: True)
+    monkeypatch.setattr(pipeline, "synthesize_speech", speech)
+    monkeypatch.setitem(pipeline.STAGE_DEADLINES, "analytics", analytics_deadline)
+
+    result = asyncio.run(pipeline.run_advice_pipeline(
+        district="Pune",
+        crop="Onion",
+        price=delayed(PRICE, 0.1),
+        weather=delayed(WEATHER, 0.1),
+        price_fallback=lambda: {},
+        api_key="",
+        analytics=delayed({"trend": "rising"}, analytics_delay),
+    ))
+    return result, seen
+
+
+def test_analytics_runs_concurrently_with_price_and_weather(monkeypatch):
+    result, seen = run_pipeline(monkeypatch, analytics_delay=0.1)
+    assert result["analytics"] == {"trend": "rising"}
+    assert seen["analytics"] == {"trend": "rising"}
+    # Three 100ms stages side by side, not one after another
+    assert result["timings_ms"]["total"] < 250
+
+
+def test_analytics_past_its_deadline_falls_back_to_none(monkeypatch):
+    result, seen = run_pipeline(monkeypatch, analytics_delay=1.0, analytics_deadline=0.05)
+    assert result["analytics"] is None
+    assert seen["analytics"] is None
+    assert result["advice_marathi"] == "सल्ला"
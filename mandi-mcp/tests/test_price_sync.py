@@ -0,0 +1,104 @@
+"""
+Live records merged into the price store: duplicates of stored rows update them
+in place, and the base store's columns are never copied
+"""
+import asyncio
+import datetime
+
+import numpy as np
+
+from services import data_gov_sync
+from services.price_store import PriceStore, date_to_days
+
+DAY = datetime.date(2024, 11, 1)
+
+
+def make_store() -> PriceStore:
+    """Two CSV rows: Onion in Pune and Tomato in Nashik on DAY"""
+    return PriceStore(
+        states=["Maharashtra"],
+        districts=["Pune", "Nashik"],
+        markets=["Pune", "Nashik"],
+        commodities=["Onion", "Tomato"],
+        varieties=["Other"],
+        state_codes=np.zeros(2, dtype=np.int32),
+        district_codes=np.asarray([0, 1], dtype=np.int32),
+        market_codes=np.asarray([0, 1], dtype=np.int32),
+        commodity_codes=np.asarray([0, 1], dtype=np.int32),
+        variety_codes=np.zeros(2, dtype=np.int32),
+        dates=np.full(2, date_to_days(DAY), dtype=np.int32),
+        min_price=np.asarray([1000.0, 800.0]),
+        max_price=np.asarray([2000.0, 1600.0]),
+        modal_price=np.asarray([1500.0, 1200.0]),
+    )
+
+
+def record(market: str, commodity: str, day: datetime.date, modal: float, variety: str = "Other") -> dict:
+    return {
+        "state": "Maharashtra", "district": market, "market": market, "commodity": commodity,
+        "variety": variety, "grade": "FAQ", "arrival_date": day.strftime("%d/%m/%Y"),
+        "min_price": "1000", "max_price": "2000", "modal_price": str(modal),
+    }
+
+
+def test_records_already_in_the_store_update_it_instead_of_appending(monkeypatch):
+    store = make_store()
+    monkeypatch.setattr(data_gov_sync, "get_price_store", lambda: store)
+    new_rows, updates, newest = data_gov_sync._merge([
+        record("Pune", "Onion", DAY, 1500),                 # same as the CSV row
+        record("Nashik", "Tomato", DAY, 1300),              # CSV row with a new price
+        record("Pune", "Onion", DAY, 1450, "Red"),          # another variety
+        record("Pune", "Onion", DAY + datetime.timedelta(days=1), 1550),
+    ])
+    assert list(updates) == [1]
+    assert newest == DAY + datetime.timedelta(days=1)
+    assert [(r["variety"], r["date"]) for r in new_rows] == [("Red", DAY), ("Other", DAY + datetime.timedelta(days=1))]
+
+
+def test_overlay_keeps_base_columns_and_merges_lookups(monkeypatch):
+    base = make_store()
+    monkeypatch.setattr(data_gov_sync, "get_price_store", lambda: base)
+    later = DAY + datetime.timedelta(days=1)
+    new_rows, updates, _ = data_gov_sync._merge([
+        record("Nashik", "Tomato", DAY, 1300),
+        record("Pune", "Onion", later, 1550),
+    ])
+    store = base.with_rows(new_rows, updates)
+
+    assert store.base is base and base.modal_price.tolist() == [1500.0, 1200.0]
+    assert len(store) == 3
+    assert store.row(1)["modal_price"] == 1300.0
+    assert store.row(2)["live"] and store.row(2)["date"] == later
+    assert store.history("Onion", "Pune").tolist() == [0, 2]
+    assert store.latest("Onion", "Pune") == 2
+    assert store.rows_between(DAY, later).tolist() == [0, 1, 2]
+    assert store.repriced_rows(base).tolist() == [1]
+
+    # A second sync sees the live row and only re-prices it
+    monkeypatch.setattr(data_gov_sync, "get_price_store", lambda: store)
+    new_rows, updates, _ = data_gov_sync._merge([record("Pune", "Onion", later, 1600)])
+    assert new_rows == [] and list(updates) == [2]
+    assert store.with_rows(new_rows, updates).row(2)["modal_price"] == 1600.0
+
+
+def test_partial_sync_does_not_move_past_failed_pages(monkeypatch):
+    store = make_store()
+    monkeypatch.setattr(data_gov_sync, "get_price_store", lambda: store)
+    monkeypatch.setattr(data_gov_sync, "set_price_store", lambda new: None)
+    monkeypatch.setattr(data_gov_sync, "SYNC_PAGE_SIZE", 1)
+    monkeypatch.setattr(data_gov_sync, "SYNC_STATE", dict(data_gov_sync.SYNC_STATE, latest_arrival=None, last_sync=None))
+    later = DAY + datetime.timedelta(days=5)
+    cached = []
+
+    async def fetch(filters=None, limit=100, offset=0, cache=True):
+        cached.append(cache)
+        if offset == 1:
+            return None   # the second page fails
+        return {"records": [record("Pune", "Onion", later, 1550)], "total": 2, "updated_date": "x"}
+
+    monkeypatch.setattr(data_gov_sync, "fetch_from_data_gov", fetch)
+    status = asyncio.run(data_gov_sync.sync_data_gov())
+    assert status["failed_pages"] == 1 and status["records_new"] == 1
+    assert status["latest_arrival"] is None and status["updated_date"] is None
+    # Probe and sync pages all bypass the response cache
+    assert cached and not any(cached)
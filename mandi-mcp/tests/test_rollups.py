@@ -0,0 +1,123 @@
+"""
+OHLC rollups: day, week and month bars of one market, bars across markets, and
+incremental updates after live rows are merged in
+"""
+import datetime
+
+import numpy as np
+
+from services.price_store import PriceStore, date_to_days, days_to_date
+from services.rollups import ALL_MARKETS, RESOLUTIONS, Rollups
+
+MARKETS = ["Pune", "Nashik"]
+COMMODITIES = ["Onion", "Tomato"]
+JAN29, JAN31, FEB1, FEB5 = (datetime.date(2024, 1, 29), datetime.date(2024, 1, 31),
+                            datetime.date(2024, 2, 1), datetime.date(2024, 2, 5))
+
+# market, commodity, date, min, max, modal; out of date order like the CSV
+ROWS = [
+    ("Pune", "Onion", FEB1, 1200, 2500, 2000),
+    ("Pune", "Onion", JAN29, 1000, 2000, 1500),
+    ("Nashik", "Onion", JAN29, 800, 1600, 1200),
+    ("Pune", "Onion", JAN31, 900, 1800, 1400),
+    ("Pune", "Onion", JAN29, 1100, 2100, 1600),   # second report of the day closes it
+    ("Nashik", "Onion", FEB1, 1000, 3000, 2200),
+    ("Pune", "Onion", FEB5, 1300, 2200, 1800),
+    ("Pune", "Tomato", FEB1, 500, 900, 700),
+]
+
+
+def make_store(rows=ROWS) -> PriceStore:
+    markets = np.asarray([MARKETS.index(r[0]) for r in rows], dtype=np.int32)
+    columns = np.asarray([r[3:] for r in rows], dtype=np.float64)
+    return PriceStore(
+        states=["Maharashtra"],
+        districts=MARKETS,
+        markets=MARKETS,
+        commodities=COMMODITIES,
+        varieties=["Other"],
+        state_codes=np.zeros(len(rows), dtype=np.int32),
+        district_codes=markets,
+        market_codes=markets,
+        commodity_codes=np.asarray([COMMODITIES.index(r[1]) for r in rows], dtype=np.int32),
+        variety_codes=np.zeros(len(rows), dtype=np.int32),
+        dates=np.asarray([date_to_days(r[2]) for r in rows], dtype=np.int32),
+        min_price=columns[:, 0],
+        max_price=columns[:, 1],
+        modal_price=columns[:, 2],
+    )
+
+
+def ohlc(rollups: Rollups, key, resolution: str):
+    bars = rollups.series[resolution][key]
+    return [
+        (days_to_date(period), o, h, l, c, v)
+        for period, o, h, l, c, v in zip(*(bars[f].tolist() for f in ("period", "open", "high", "low", "close", "volume")))
+    ]
+
+
+def test_market_bars_at_every_resolution():
+    rollups = Rollups(make_store())
+    key = rollups.find_series("Onion", "Pune")
+    assert key == (0, 0)
+    assert ohlc(rollups, key, "day") == [
+        (JAN29, 1500, 2100, 1000, 1600, 2),
+        (JAN31, 1400, 1800, 900, 1400, 1),
+        (FEB1, 2000, 2500, 1200, 2000, 1),
+        (FEB5, 1800, 2200, 1300, 1800, 1),
+    ]
+    # Weeks start on Monday, months on the 1st
+    assert ohlc(rollups, key, "week") == [
+        (JAN29, 1500, 2500, 900, 2000, 4),
+        (FEB5, 1800, 2200, 1300, 1800, 1),
+    ]
+    assert ohlc(rollups, key, "month") == [
+        (datetime.date(2024, 1, 1), 1500, 2100, 900, 1400, 3),
+        (FEB1, 2000, 2500, 1200, 1800, 2),
+    ]
+
+
+def test_commodity_bars_average_opens_and_closes_across_markets():
+    rollups = Rollups(make_store())
+    key = rollups.find_series("Onion")
+    assert key == (0, ALL_MARKETS)
+    assert ohlc(rollups, key, "day") == [
+        (JAN29, 1350, 2100, 800, 1400, 3),
+        (JAN31, 1400, 1800, 900, 1400, 1),
+        (FEB1, 2100, 3000, 1000, 2100, 2),
+        (FEB5, 1800, 2200, 1300, 1800, 1),
+    ]
+    assert ohlc(rollups, key, "week") == [
+        (JAN29, 1350, 3000, 800, 2100, 6),
+        (FEB5, 1800, 2200, 1300, 1800, 1),
+    ]
+    assert rollups.market_name(key) == "All markets"
+
+
+def test_bars_cover_the_last_days_of_a_series():
+    rollups = Rollups(make_store())
+    bars = rollups.bars(0, 0, "day", days=5)
+    assert [days_to_date(p) for p in bars["period"].tolist()] == [FEB1, FEB5]
+    assert rollups.bars(0, 0, "week", days=5)["volume"].tolist() == [4, 1]
+
+
+def test_updated_matches_a_full_rebuild_and_keeps_untouched_series():
+    base = make_store()
+    rollups = Rollups(base)
+    later = FEB5 + datetime.timedelta(days=1)
+    row = {"state": "Maharashtra", "district": "Nashik", "market": "Nashik", "commodity": "Onion",
+           "variety": "Other", "date": later, "min_price": 900.0, "max_price": 1900.0, "modal_price": 1700.0}
+    repriced = dict(row, market="Pune", district="Pune", date=JAN31, modal_price=1450.0)
+    store = base.with_rows([row], {3: repriced})
+
+    updated = rollups.updated(store)
+    rebuilt = Rollups(store)
+    for resolution in RESOLUTIONS:
+        assert set(updated.series[resolution]) == set(rebuilt.series[resolution])
+        for key in rebuilt.series[resolution]:
+            assert ohlc(updated, key, resolution) == ohlc(rebuilt, key, resolution)
+        # Tomato had no new or re-priced rows
+        assert updated.series[resolution][(1, 0)] is rollups.series[resolution][(1, 0)]
+
+    assert ohlc(updated, (0, 0), "day")[1] == (JAN31, 1450, 1900, 900, 1450, 1)
+    assert ohlc(updated, (0, ALL_MARKETS), "day")[-1] == (later, 1700, 1900, 900, 1700, 1)
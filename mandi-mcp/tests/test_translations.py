@@ -0,0 +1,45 @@
+"""
+Localized filters: rendering has no side effects and Marathi names map back to the data's spellings
+"""
+import translations
+from translations import localize_filters, set_data_spellings, translate_commodity, translate_district
+
+FILTERS = {
+    "Amarawati": {"Amarawati": ["Tomato", "Onion"]},
+    "Amravati": {"Achalpur": ["Potato", "Onion"]},
+    "Pune": {"Pune": ["Tomato", "Bhindi(Ladies Finger)"]},
+}
+
+
+def test_localize_filters_merges_variants_in_sorted_order_without_side_effects():
+    reverse = dict(translations.DISTRICT_TRANSLATIONS_REVERSE), dict(translations.COMMODITY_TRANSLATIONS_REVERSE)
+    localized = localize_filters(FILTERS, "mr")
+    assert localized["अमरावती"]["अमरावती"] == sorted(["टोमॅटो", "कांदा"])
+    assert localized["अमरावती"]["Achalpur"] == sorted(["बटाटा", "कांदा"])
+    assert (translations.DISTRICT_TRANSLATIONS_REVERSE, translations.COMMODITY_TRANSLATIONS_REVERSE) == reverse
+
+
+def test_data_spellings_follow_the_latest_filters(monkeypatch):
+    monkeypatch.setattr(translations, "_DATA_SPELLINGS", translations._DATA_SPELLINGS)
+    set_data_spellings(FILTERS)
+    # Both spellings are in the data, so the dictionary's own wins
+    assert translate_district("अमरावती", to_marathi=False) == "Amravati"
+    assert translate_commodity("भेंडी", to_marathi=False) == "Bhindi(Ladies Finger)"
+
+    set_data_spellings({"Amarawati": {"Amarawati": ["Lady Finger"]}})
+    assert translate_district("अमरावती", to_marathi=False) == "Amarawati"
+    assert translate_commodity("भेंडी", to_marathi=False) == "Lady Finger"
+
+
+def test_market_lookups_only_remember_markets_in_the_data(monkeypatch):
+    monkeypatch.setattr(translations, "_DATA_SPELLINGS", translations._DATA_SPELLINGS)
+    set_data_spellings({"Pune": {"Pune APMC": ["Onion"]}})
+    spellings = translations._DATA_SPELLINGS
+    marathi = translations.translate_market("Pune APMC")
+
+    # User input is rendered but never stored, so it cannot take over the data's reverse mapping
+    for i in range(100):
+        translations.translate_market(f"Pune APMC {i}")
+    translations.translate_market("Pune APMC")
+    assert translations._DATA_SPELLINGS is spellings and len(spellings["market_names"]) == 1
+    assert translations.translate_market(marathi, to_marathi=False) == "Pune APMC"
@@ -0,0 +1,79 @@
+"""
+TreeEnsemble parity with XGBClassifier.predict_proba: missing values, inputs on
+split thresholds, infinities and early-stopped models
+"""
+import json
+
+import numpy as np
+import pytest
+
+from services.tree_model import TreeEnsemble
+
+xgb = pytest.importorskip("xgboost")
+
+N_FEATURES = 5
+N_CLASSES = 4
+
+
+def training_data(n: int, seed: int):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, N_FEATURES)).astype(np.float32)
+    score = X[:, 0] + 0.5 * X[:, 1] * X[:, 2] + rng.normal(scale=0.7, size=n)
+    y = np.digitize(score, np.quantile(score, [0.25, 0.5, 0.75]))
+    # Missing values in training give the splits learned default directions
+    X[rng.random(X.shape) < 0.1] = np.nan
+    return X, y
+
+
+def export(model) -> TreeEnsemble:
+    """As export_crop_model.py does, stopping at the best iteration when early-stopped"""
+    booster = model.get_booster()
+    best_iteration = booster.attr("best_iteration")
+    return TreeEnsemble.from_xgboost_json(
+        json.loads(booster.save_raw("json")),
+        iterations=None if best_iteration is None else int(best_iteration) + 1,
+    )
+
+
+def parity_inputs(trees: TreeEnsemble) -> np.ndarray:
+    rng = np.random.default_rng(1)
+    X = rng.normal(scale=1.5, size=(2000, N_FEATURES)).astype(np.float32)
+    X[rng.random(X.shape) < 0.1] = np.nan
+
+    nodes = trees.nodes
+    splits = np.flatnonzero(np.isfinite(nodes["threshold"]))
+    on_threshold = rng.normal(size=(len(splits), N_FEATURES)).astype(np.float32)
+    on_threshold[np.arange(len(splits)), nodes["feature"][splits]] = nodes["threshold"][splits]
+
+    infinite = rng.normal(size=(200, N_FEATURES)).astype(np.float32)
+    infinite[rng.random(infinite.shape) < 0.3] = np.inf
+    infinite[rng.random(infinite.shape) < 0.3] = -np.inf
+    return np.concatenate((X, on_threshold, infinite))
+
+
+def assert_parity(model, trees: TreeEnsemble):
+    X = parity_inputs(trees)
+    expected = np.asarray(model.predict_proba(X), dtype=np.float64)
+    actual = trees.predict_proba(X)
+    assert trees.n_classes == N_CLASSES
+    np.testing.assert_allclose(actual, expected, atol=1e-6)
+    assert (actual.argmax(axis=1) == expected.argmax(axis=1)).all()
+
+
+def test_predict_proba_matches_xgboost():
+    X, y = training_data(2000, seed=0)
+    model = xgb.XGBClassifier(objective="multi:softprob", n_estimators=30, max_depth=4, learning_rate=0.3)
+    model.fit(X, y)
+    assert_parity(model, export(model))
+
+
+def test_predict_proba_matches_early_stopped_xgboost():
+    X, y = training_data(2000, seed=0)
+    X_eval, y_eval = training_data(500, seed=2)
+    model = xgb.XGBClassifier(objective="multi:softprob", n_estimators=300, max_depth=6,
+                              learning_rate=0.5, early_stopping_rounds=5)
+    model.fit(X, y, eval_set=[(X_eval, y_eval)], verbose=False)
+    trees = export(model)
+    # Trained past the best iteration, so the export must cut the trailing rounds
+    assert len(trees.roots) < model.get_booster().num_boosted_rounds() * N_CLASSES
+    assert_parity(model, trees)
@@ -211,36 +211,102 @@ STATE_TRANSLATIONS = {
     "West Bengal": "पश्चिम बंगाल",
 }
 
+def _reverse(translations: dict) -> dict:
+    """Marathi -> English index; the first English spelling wins, as in a linear scan"""
+    reverse = {}
+    for eng, mar in translations.items():
+        reverse.setdefault(mar, eng)
+    return reverse
+
+# Marathi -> English indexes, built once at import
+DISTRICT_TRANSLATIONS_REVERSE = _reverse(DISTRICT_TRANSLATIONS)
+COMMODITY_TRANSLATIONS_REVERSE = _reverse(COMMODITY_TRANSLATIONS)
+STATE_TRANSLATIONS_REVERSE = _reverse(STATE_TRANSLATIONS)
+
+# Marathi -> the English spelling the price data uses (e.g. Amarawati rather than
+# Amravati), plus the Marathi rendering of every market in the data ("market_names");
+# rebuilt by set_data_spellings on each filters refresh and swapped in whole
+_DATA_SPELLINGS = {"districts": {}, "markets": {}, "commodities": {}, "market_names": {}}
+
 def translate_district(name: str, to_marathi: bool = True) -> str:
     """Translate district name"""
     if to_marathi:
         return DISTRICT_TRANSLATIONS.get(name, name)
-    else:
-        # Reverse lookup for Marathi to English
-        for eng, mar in DISTRICT_TRANSLATIONS.items():
-            if mar == name:
-                return eng
-        return name
+    return _DATA_SPELLINGS["districts"].get(name) or DISTRICT_TRANSLATIONS_REVERSE.get(name, name)
 
 def translate_commodity(name: str, to_marathi: bool = True) -> str:
     """Translate commodity name"""
     if to_marathi:
         return COMMODITY_TRANSLATIONS.get(name, name)
-    else:
-        for eng, mar in COMMODITY_TRANSLATIONS.items():
-            if mar == name:
-                return eng
-        return name
+    return _DATA_SPELLINGS["commodities"].get(name) or COMMODITY_TRANSLATIONS_REVERSE.get(name, name)
 
 def translate_state(name: str, to_marathi: bool = True) -> str:
     """Translate state name"""
     if to_marathi:
         return STATE_TRANSLATIONS.get(name, name)
-    else:
-        for eng, mar in STATE_TRANSLATIONS.items():
-            if mar == name:
-                return eng
-        return name
+    return STATE_TRANSLATIONS_REVERSE.get(name, name)
+
+def _render_market(name: str) -> str:
+    """Marathi market name, word by word (district names and APMC words, e.g. "Pune APMC")"""
+    if name in DISTRICT_TRANSLATIONS:
+        return DISTRICT_TRANSLATIONS[name]
+    return " ".join(
+        DISTRICT_TRANSLATIONS.get(word, MARKET_PATTERNS.get(word, word))
+        for word in name.split(" ")
+    )
+
+def translate_market(name: str, to_marathi: bool = True) -> str:
+    """Translate market name; markets in the data are pre-rendered, other names rendered on the fly"""
+    if not to_marathi:
+        return _DATA_SPELLINGS["markets"].get(name) or DISTRICT_TRANSLATIONS_REVERSE.get(name, name)
+    marathi = _DATA_SPELLINGS["market_names"].get(name)
+    return marathi if marathi is not None else _render_market(name)
+
+def _spellings(names, translate, reverse: dict) -> dict:
+    """
+    Marathi name -> data spelling. Where several spellings share a Marathi name the
+    dictionary's own spelling wins if the data uses it, else the first alphabetically
+    """
+    by_marathi = {}
+    for name in sorted(set(names)):
+        by_marathi.setdefault(translate(name), []).append(name)
+    return {
+        marathi: reverse.get(marathi) if reverse.get(marathi) in spellings else spellings[0]
+        for marathi, spellings in by_marathi.items()
+    }
+
+def set_data_spellings(filters: dict):
+    """Point Marathi -> English lookups at the spellings in a freshly loaded filters tree"""
+    global _DATA_SPELLINGS
+    markets = [market for district_markets in filters.values() for market in district_markets]
+    commodities = [
+        commodity
+        for district_markets in filters.values()
+        for market_commodities in district_markets.values()
+        for commodity in market_commodities
+    ]
+    _DATA_SPELLINGS = {
+        "districts": _spellings(filters, translate_district, DISTRICT_TRANSLATIONS_REVERSE),
+        "markets": _spellings(markets, _render_market, {}),
+        "commodities": _spellings(commodities, translate_commodity, COMMODITY_TRANSLATIONS_REVERSE),
+        "market_names": {market: _render_market(market) for market in markets},
+    }
+
+def localize_filters(filters: dict, lang: str) -> dict:
+    """District -> market -> commodity tree with every name rendered in lang"""
+    if lang != "mr":
+        return filters
+    localized = {}
+    for district, markets in filters.items():
+        # Spelling variants (e.g. Amravati/Amarawati) share one Marathi name, so merge them
+        district_markets = localized.setdefault(translate_district(district), {})
+        for market, commodities in markets.items():
+            names = district_markets.setdefault(translate_market(market), set())
+            names.update(translate_commodity(commodity) for commodity in commodities)
+    return {
+        district: {market: sorted(names) for market, names in markets.items()}
+        for district, markets in localized.items()
+    }
 
 def get_all_translations():
     """Return all translations for frontend use"""
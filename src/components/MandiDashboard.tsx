@@ -213,7 +213,7 @@ interface DashboardData {
     price_data: PriceData;
     weather_data: WeatherData;
     advice_marathi: string;
-    audio_base64: string;
+    audio_url: string;
 }
 
 // Fallback price data for common crops (prices in Rs/kg)
@@ -517,7 +517,7 @@ const MandiDashboardContent: React.FC = () => {
                 },
                 weather_data: generateFallbackWeather(language),
                 advice_marathi: '',
-                audio_base64: ''
+                audio_url: ''
             };
             setCurrentData(fallbackData);
 
@@ -537,9 +537,9 @@ const MandiDashboardContent: React.FC = () => {
 
     // Play voice with dashboard data context
     const playVoiceAdvice = () => {
-        if (currentData?.audio_base64) {
+        if (currentData?.audio_url) {
             setIsPlaying(true);
-            const audio = new Audio(`data:audio/mp3;base64,${currentData.audio_base64}`);
+            const audio = new Audio(currentData.audio_url.startsWith('http') ? currentData.audio_url : `${API_URL}${currentData.audio_url}`);
             audio.onended = () => setIsPlaying(false);
             audio.play();
         }
@@ -584,7 +584,7 @@ const MandiDashboardContent: React.FC = () => {
                             {/* Voice Agent Button - Uses Dashboard Data */}
                             <button
                                 onClick={playVoiceAdvice}
-                                disabled={!currentData?.audio_base64 || isPlaying}
+                                disabled={!currentData?.audio_url || isPlaying}
                                 className="flex items-center gap-1.5 px-3 py-2 bg-blue-500 hover:bg-blue-600 text-white rounded-full text-xs font-medium transition-colors disabled:opacity-50"
                             >
                                 {isPlaying ? (
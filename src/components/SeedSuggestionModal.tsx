@@ -40,7 +40,7 @@ interface SeedSuggestionResponse {
     varieties: SeedVariety[];
     recommendation: string;
     advice_text?: string;
-    audio_base64?: string;
+    audio_url?: string;
 }
 
 interface SeedCrop {
@@ -129,8 +129,8 @@ const SeedSuggestionModal: React.FC<SeedSuggestionModalProps> = ({
     };
 
     const playAudio = () => {
-        if (suggestionData?.audio_base64) {
-            const audio = new Audio(`data:audio/mp3;base64,${suggestionData.audio_base64}`);
+        if (suggestionData?.audio_url) {
+            const audio = new Audio(suggestionData.audio_url.startsWith('http') ? suggestionData.audio_url : `${API_URL}${suggestionData.audio_url}`);
             setIsPlaying(true);
             audio.onended = () => setIsPlaying(false);
             audio.play();
@@ -237,7 +237,7 @@ const SeedSuggestionModal: React.FC<SeedSuggestionModalProps> = ({
                     <div className="md:pt-5">
                         <button
                             onClick={playAudio}
-                            disabled={!suggestionData?.audio_base64 || isPlaying}
+                            disabled={!suggestionData?.audio_url || isPlaying}
                             className="flex items-center gap-2 px-6 py-2.5 bg-emerald-600 hover:bg-emerald-700 text-white rounded-xl text-sm font-semibold transition-all shadow-md shadow-emerald-200 disabled:opacity-50"
                         >
                             {isPlaying ? <Loader2 className="w-4 h-4 animate-spin" /> : <Volume2 className="w-4 h-4" />}